@@ -0,0 +1,166 @@
+"""
+Benchmark result files and regression comparison
+
+The micro, load and bulk benchmarks write one JSON document each:
+
+    {"suite": "micro", "meta": {...}, "results": {"<name>": {"<metric>": value, ...}}}
+
+`meta` records when and where the run happened (git commit, Python,
+platform, CPU count) and the benchmark's arguments. Comparing two files
+reports every metric present in both and flags regressions beyond a
+threshold: latency metrics (*_us, *_ms) are better lower, throughput metrics
+(rps, ops_per_sec, items_per_sec) better higher; other fields are
+informational.
+
+Usage (from server/):
+    python benchmarks/benchmark_results.py baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 when any metric regressed, so it can gate CI.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HIGHER_IS_BETTER = ("rps", "ops_per_sec", "items_per_sec")
+LOWER_IS_BETTER_SUFFIXES = ("_us", "_ms")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)]
+
+
+def latency_summary(samples: List[float], unit: str = "ms") -> Dict[str, float]:
+    """p50/p95/p99, mean and max of latency samples given in `unit`"""
+    ordered = sorted(samples)
+    return {
+        f"p50_{unit}": round(percentile(ordered, 0.50), 3),
+        f"p95_{unit}": round(percentile(ordered, 0.95), 3),
+        f"p99_{unit}": round(percentile(ordered, 0.99), 3),
+        f"mean_{unit}": round(statistics.fmean(ordered), 3),
+        f"max_{unit}": round(ordered[-1], 3),
+    }
+
+
+def run_metadata(args: Optional[argparse.Namespace] = None) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": vars(args) if args is not None else {},
+    }
+
+
+def write_results(suite: str, results: Dict[str, Dict], args: argparse.Namespace, path: Optional[str]) -> Dict:
+    """Print the result document and write it to `path` when given"""
+    document = {"suite": suite, "meta": run_metadata(args), "results": results}
+    text = json.dumps(document, indent=2)
+    print(text)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    return document
+
+
+def direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not comparable"""
+    if metric in HIGHER_IS_BETTER:
+        return 1
+    if metric.endswith(LOWER_IS_BETTER_SUFFIXES):
+        return -1
+    return 0
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float = 10.0) -> Dict[str, List[Dict]]:
+    """
+    Metric-by-metric changes between two result documents
+
+    Args:
+        baseline: Earlier result document
+        candidate: Result document to check
+        threshold: Percentage change beyond which a metric counts as changed
+
+    Returns:
+        {"regressions": [...], "improvements": [...], "unchanged": [...]}
+        with one {"benchmark", "metric", "baseline", "candidate", "change_pct"}
+        entry per comparable metric
+    """
+    report = {"regressions": [], "improvements": [], "unchanged": []}
+    for name, before in baseline.get("results", {}).items():
+        after = candidate.get("results", {}).get(name)
+        if after is None:
+            continue
+        for metric, old in before.items():
+            new = after.get(metric)
+            sign = direction(metric)
+            if not sign or not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / old * 100
+            entry = {
+                "benchmark": name,
+                "metric": metric,
+                "baseline": old,
+                "candidate": new,
+                "change_pct": round(change, 1),
+            }
+            if change * sign < -threshold:
+                report["regressions"].append(entry)
+            elif change * sign > threshold:
+                report["improvements"].append(entry)
+            else:
+                report["unchanged"].append(entry)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change that counts as a regression")
+    parser.add_argument("--output", help="Write the comparison as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("suite") != candidate.get("suite"):
+        raise SystemExit(f"❌ Different suites: {baseline.get('suite')} vs {candidate.get('suite')}")
+
+    report = compare(baseline, candidate, args.threshold)
+    for kind, marker in (("regressions", "🔴"), ("improvements", "🟢")):
+        for entry in report[kind]:
+            print(
+                f"{marker} {entry['benchmark']} {entry['metric']}: "
+                f"{entry['baseline']} -> {entry['candidate']} ({entry['change_pct']:+.1f}%)"
+            )
+    print(
+        f"{len(report['regressions'])} regressed, {len(report['improvements'])} improved, "
+        f"{len(report['unchanged'])} within ±{args.threshold:g}%"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
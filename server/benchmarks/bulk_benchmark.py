@@ -0,0 +1,118 @@
+"""
+Bulk grading scaling benchmark
+
+Grades the same synthetic class (--students answers to every active SQLite
+question, a mix of correct and wrong ones) through the bulk grader with each
+--processes count, and reports items_per_sec, the speedup over the first
+count and the parallel efficiency (speedup / process ratio). Close to linear
+scaling means efficiency stays near 1.0 up to the number of physical cores.
+
+Pools are started and fixtures warmed with an untimed pass first, so the
+numbers cover grading, not process start-up. The database is a throwaway
+SQLite file seeded from the question bank unless --database-url is given.
+
+Usage (from server/):
+    python benchmarks/bulk_benchmark.py --processes 1 2 4 8 --students 200 --output bulk.json
+    python benchmarks/benchmark_results.py bulk-baseline.json bulk.json
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_results import write_results  # noqa: E402
+from load_benchmark import prepare_environment, seed  # noqa: E402
+
+
+def build_items(students: int) -> list:
+    from src.db.database import SessionLocal
+    from src.models.question import Question
+    from src.services.bulk_grading import BulkItem
+
+    db = SessionLocal()
+    try:
+        questions = (
+            db.query(Question.id, Question.solution)
+            .filter(Question.is_active == True, Question.dialect == "sqlite")
+            .order_by(Question.id)
+            .all()
+        )
+    finally:
+        db.close()
+    if not questions:
+        raise SystemExit("❌ No active SQLite questions in the database")
+
+    items = []
+    for student in range(students):
+        for question_id, solution in questions:
+            # Two in three students get it right
+            sql = solution if student % 3 else "SELECT 1 AS wrong"
+            items.append(BulkItem(len(items), f"student-{student}", question_id, sql))
+    return items
+
+
+async def drain(grader, items: list, cases: dict) -> dict:
+    summary = None
+    async for line in grader.grade(items, cases, []):
+        summary = line.get("summary", summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bulk grading throughput per process count")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4], help="Pool sizes to compare")
+    parser.add_argument("--students", type=int, default=100, help="Answers per question")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--database-url", help="Database to test against (default: a fresh SQLite file)")
+    parser.add_argument("--bank", default=os.path.join(SERVER_DIR, "seed", "questions.json"))
+    parser.add_argument("--no-seed", action="store_true", help="Use the database as is")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    prepare_environment(args)
+    if not args.no_seed:
+        seed(args.bank)
+
+    from src.services.bulk_grading import BulkGrader, load_cases
+
+    items = build_items(args.students)
+    cases = load_cases(sorted({item.question_id for item in items}))
+    print(f"📝 {len(items)} answers to {len(cases)} questions", file=sys.stderr)
+
+    results = {}
+    baseline = None
+    for processes in args.processes:
+        grader = BulkGrader(processes, args.chunk_size)
+        try:
+            asyncio.run(drain(grader, items[:processes * 2 * len(cases)], cases))
+            start = time.perf_counter()
+            summary = asyncio.run(drain(grader, items, cases))
+            elapsed = time.perf_counter() - start
+        finally:
+            grader.shutdown()
+
+        throughput = len(items) / elapsed
+        baseline = baseline or (throughput, processes)
+        speedup = throughput / baseline[0]
+        results[f"bulk/{processes}"] = {
+            "items": len(items),
+            "items_per_sec": round(throughput, 1),
+            "speedup": round(speedup, 2),
+            "efficiency": round(speedup / (processes / baseline[1]), 2),
+            "verdicts": summary["verdicts"],
+        }
+        print(
+            f"⚙️  {processes} processes: {throughput:,.0f} items/s, "
+            f"speedup {speedup:.2f}x, efficiency {results[f'bulk/{processes}']['efficiency']:.2f}",
+            file=sys.stderr,
+        )
+
+    args.database_url = "custom" if args.database_url else "sqlite"
+    write_results("bulk", results, args, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Execution engine benchmark
+
+Generates an orders/customers dataset with the synthetic data generator and
+runs the same analytical queries (aggregation, GROUP BY, joins, window
+functions, top-N) on every execution backend. Reports the fixture build
+time, the time to open a session and p50/p95 query latency per engine, and
+whether all engines returned the same canonical result.
+
+Query times cover run + fetch; opening the session (a private copy of the
+fixture for SQLite without the shared store, a cursor for DuckDB) is
+reported separately.
+
+Usage (from server/):
+    python benchmarks/engine_benchmark.py --rows 1000000 --repeat 10 --output engines.json
+
+Requires duckdb for the DuckDB engine.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCHEMA = {
+    "tables": [
+        {
+            "name": "customers",
+            "columns": [
+                {"name": "id", "type": "INTEGER", "constraints": ["PRIMARY KEY"]},
+                {"name": "name", "type": "TEXT"},
+                {"name": "country", "type": "TEXT"},
+                {"name": "signed_up", "type": "DATE"},
+            ],
+        },
+        {
+            "name": "orders",
+            "columns": [
+                {"name": "id", "type": "INTEGER", "constraints": ["PRIMARY KEY"]},
+                {"name": "customer_id", "type": "INTEGER"},
+                {"name": "amount", "type": "REAL"},
+                {"name": "status", "type": "TEXT"},
+                {"name": "ordered_at", "type": "DATE"},
+            ],
+        },
+    ]
+}
+
+QUERIES = {
+    "aggregate": (
+        "SELECT COUNT(*) AS orders, ROUND(SUM(amount), 2) AS revenue, ROUND(AVG(amount), 2) AS average "
+        "FROM orders"
+    ),
+    "group_by": (
+        "SELECT status, COUNT(*) AS orders, ROUND(SUM(amount), 2) AS revenue "
+        "FROM orders GROUP BY status"
+    ),
+    "count_distinct": "SELECT COUNT(DISTINCT customer_id) AS customers FROM orders WHERE status = 'shipped'",
+    "join": (
+        "SELECT c.country, COUNT(*) AS orders, ROUND(SUM(o.amount), 2) AS revenue "
+        "FROM orders o JOIN customers c ON c.id = o.customer_id GROUP BY c.country"
+    ),
+    "window_top_per_group": (
+        "SELECT customer_id, id, amount FROM ("
+        "SELECT customer_id, id, amount, "
+        "ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY amount DESC, id) AS rank "
+        "FROM orders) ranked WHERE rank = 1"
+    ),
+    "window_running_total": (
+        "SELECT ordered_at, ROUND(SUM(SUM(amount)) OVER (ORDER BY ordered_at), 2) AS running_revenue "
+        "FROM orders GROUP BY ordered_at"
+    ),
+    "top_n": "SELECT id, customer_id, amount FROM orders ORDER BY amount DESC, id LIMIT 10",
+}
+
+
+def dataset_spec(rows: int) -> dict:
+    customers = max(rows // 100, 1)
+    return {
+        "seed": 7,
+        "tables": {
+            "customers": {
+                "rows": customers,
+                "columns": {
+                    "name": {"kind": "pattern", "format": "customer_{}"},
+                    "country": {"kind": "choice", "values": ["US", "DE", "IN", "BR", "JP", "FR", "GB", "NG"], "skew": 1.1},
+                    "signed_up": {"kind": "date", "start": "2018-01-01", "end": "2023-12-31"},
+                },
+            },
+            "orders": {
+                "rows": rows,
+                "columns": {
+                    "customer_id": {"kind": "foreign_key", "table": "customers"},
+                    "amount": {"kind": "normal", "mean": 80, "stddev": 40, "min": 1, "round": 2},
+                    "status": {"kind": "choice", "values": ["shipped", "pending", "returned", "cancelled"], "weights": [80, 10, 7, 3]},
+                    "ordered_at": {"kind": "date", "start": "2020-01-01", "end": "2024-12-31"},
+                },
+            },
+        },
+    }
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)]
+
+
+def run(rows: int, repeat: int, engines: list) -> dict:
+    from src.services.engines import BackendUnavailableError, get_backend
+    from src.services.fixture_bundle import result_hash
+    from src.services.sql_engine import normalize_result
+    from src.services.synthetic_data import directive_setup_sql
+
+    setup_sql = directive_setup_sql(SCHEMA, dataset_spec(rows))
+    summary = {"rows": rows, "repeat": repeat, "engines": {}, "queries": {}}
+
+    available = []
+    for name in engines:
+        backend = get_backend(name)
+        start = time.perf_counter()
+        try:
+            backend.prepare(setup_sql)
+        except BackendUnavailableError as e:
+            summary["engines"][name] = {"skipped": str(e)}
+            continue
+        build_ms = (time.perf_counter() - start) * 1000
+
+        opens = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with backend.session(setup_sql):
+                opens.append((time.perf_counter() - start) * 1000)
+        summary["engines"][name] = {
+            **backend.stats(),
+            "fixture_build_ms": round(build_ms, 1),
+            "session_open_p50_ms": round(statistics.median(opens), 2),
+        }
+        available.append(name)
+
+    for query_name, sql in QUERIES.items():
+        results = {}
+        hashes = set()
+        for name in available:
+            with get_backend(name).session(setup_sql) as session:
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    session.run(sql)
+                    columns, result_rows = session.fetch()
+                    samples.append((time.perf_counter() - start) * 1000)
+            hashes.add(result_hash(normalize_result(result_rows, columns)))
+            ordered = sorted(samples)
+            results[name] = {
+                "rows": len(result_rows),
+                "p50_ms": round(statistics.median(ordered), 2),
+                "p95_ms": round(percentile(ordered, 0.95), 2),
+            }
+        if len(available) > 1 and "sqlite" in results:
+            for name in available:
+                results[name]["speedup_vs_sqlite"] = round(results["sqlite"]["p50_ms"] / max(results[name]["p50_ms"], 1e-6), 1)
+        summary["queries"][query_name] = {"engines": results, "results_match": len(hashes) <= 1}
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the same analytical queries on every execution backend")
+    parser.add_argument("--rows", type=int, default=1000000, help="Orders rows (customers get rows / 100)")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per query per engine")
+    parser.add_argument("--engines", nargs="+", default=["sqlite", "duckdb"])
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqltown-engines-")
+    # Fresh fixtures for this run, and no shared store: each engine builds its own
+    os.environ.update({
+        "DUCKDB_FIXTURE_DIR": os.path.join(workdir, "duckdb"),
+        "SHARED_FIXTURE_DIR": "",
+        "FIXTURE_BUNDLE_PATH": "",
+        "SQL_MAX_RESULT_ROWS": str(max(args.rows, 100000)),
+    })
+    sys.path.insert(0, SERVER_DIR)
+
+    summary = run(args.rows, args.repeat, args.engines)
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Fixture memory benchmark
+
+Seeds a throwaway database with questions whose fixtures are large, starts
+`uvicorn --workers N`, sends submissions until every worker has touched every
+fixture, and sums RSS and PSS over the worker processes. Runs with the shared
+fixture store enabled and disabled for each worker count, so the effect of
+sharing shows up as PSS that stays flat as workers are added.
+
+RSS counts shared pages in every process that maps them; PSS splits them
+between those processes and is the number that adds up to real memory use.
+The shared store itself lives on tmpfs and is reported separately
+(shared_store_mb), as it is charged to the host once rather than to workers.
+
+Usage (from server/):
+    python benchmarks/fixture_memory_benchmark.py --workers 1 8 --rows 200000 --output memory.json
+
+Linux only (reads /proc). Requires httpx and uvicorn.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SEED_SCRIPT = """
+import sys
+from src.db.migrations import upgrade_to_head
+from src.db.database import SessionLocal
+from src.models.question import Question
+from src.models.test_case import TestCase
+
+fixtures, rows = int(sys.argv[1]), int(sys.argv[2])
+upgrade_to_head()
+db = SessionLocal()
+for index in range(fixtures):
+    question = Question(
+        title=f"Memory benchmark {index}",
+        slug=f"memory-benchmark-{index}",
+        description="Large fixture",
+        difficulty="Easy",
+        topics=[],
+        companies=[],
+        hints=[],
+        solution="SELECT COUNT(*) AS n FROM events",
+    )
+    db.add(question)
+    db.flush()
+    setup_sql = (
+        f"CREATE TABLE events (id INTEGER PRIMARY KEY, fixture INTEGER, payload TEXT);"
+        f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {rows}) "
+        f"INSERT INTO events SELECT n, {index}, printf('%064d', n) FROM seq;"
+    )
+    db.add(TestCase(question_id=question.id, setup_sql=setup_sql, expected_output=[{"n": rows}]))
+db.commit()
+print(",".join(str(q.id) for q in db.query(Question.id).order_by(Question.id)))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def children(pid: int) -> list:
+    result = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                # Skip multiprocessing's resource tracker; only workers count
+                if b"resource_tracker" in f.read():
+                    continue
+            result.append(int(entry))
+    return result
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    values[name.lower()] = int(rest.split()[0])
+    except OSError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    values["rss"] = int(line.split()[1])
+    return values
+
+
+def total_memory(server_pid: int) -> dict:
+    """Summed RSS and PSS (MiB) of the server's worker processes"""
+    worker_pids = children(server_pid) or [server_pid]
+    usage = [memory_kb(pid) for pid in worker_pids]
+    return {
+        "workers": len(worker_pids),
+        "rss_mb": round(sum(u.get("rss", 0) for u in usage) / 1024, 1),
+        "pss_mb": round(sum(u.get("pss", 0) for u in usage) / 1024, 1) if all("pss" in u for u in usage) else None,
+    }
+
+
+def directory_mb(path: str) -> float:
+    if not path or not os.path.isdir(path):
+        return 0.0
+    return round(sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file()) / 1024 / 1024, 1)
+
+
+def measure(env: dict, workers: int, question_ids: list, requests_per_worker: int) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base}/api/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("API did not come up")
+            time.sleep(0.2)
+
+        time.sleep(2)  # the health check only proves one worker is up
+        idle = total_memory(server.pid)
+
+        # Requests are spread over workers by the kernel; send enough that
+        # every worker very likely opens every fixture
+        payloads = [
+            {"question_id": question_id, "sql": "SELECT COUNT(*) AS n FROM events"}
+            for _ in range(requests_per_worker * workers)
+            for question_id in question_ids
+        ]
+
+        def submit(payload):
+            with httpx.Client(base_url=base, timeout=120) as client:
+                return client.post("/api/sql/execute", json=payload).json().get("passed")
+
+        with ThreadPoolExecutor(max_workers=4 * workers) as pool:
+            passed = list(pool.map(submit, payloads))
+        time.sleep(1)
+
+        return {
+            "submissions": len(payloads),
+            "all_passed": all(passed),
+            "idle": idle,
+            "loaded": total_memory(server.pid),
+            # tmpfs pages, counted once for the host rather than per process
+            "shared_store_mb": directory_mb(env.get("SHARED_FIXTURE_DIR", "")),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixture memory use across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--fixtures", type=int, default=4, help="Questions with a large fixture each")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows per fixture (~100 bytes each)")
+    parser.add_argument("--requests", type=int, default=8, help="Submissions per fixture per worker")
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqltown-memory-")
+    try:
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "WARMUP_ENABLED": "false",
+            "FIXTURE_BUNDLE_PATH": "",
+        })
+        question_ids = subprocess.run(
+            [sys.executable, "-c", SEED_SCRIPT, str(args.fixtures), str(args.rows)],
+            cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1].split(",")
+        question_ids = [int(question_id) for question_id in question_ids]
+
+        results = []
+        for workers in args.workers:
+            for shared in (True, False):
+                run_env = dict(env, SHARED_FIXTURE_DIR=os.path.join(workdir, "shared") if shared else "")
+                result = measure(run_env, workers, question_ids, args.requests)
+                result["shared_fixtures"] = shared
+                results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = {"fixtures": args.fixtures, "rows_per_fixture": args.rows, "runs": results}
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
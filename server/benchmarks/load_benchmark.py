@@ -0,0 +1,207 @@
+"""
+In-process load test
+
+Drives the FastAPI app through httpx's ASGI transport (no network, no
+uvicorn), one endpoint at a time, with --concurrency clients issuing
+requests back to back for --duration seconds. Reports throughput and
+p50/p95/p99 latency per endpoint plus status code counts:
+
+    health            GET  /api/health
+    questions_list    GET  /api/questions/
+    question_detail   GET  /api/questions/{id}
+    sql_execute_pass  POST /api/sql/execute (the question's solution)
+    sql_execute_fail  POST /api/sql/execute (a wrong answer)
+    auth_login        POST /api/auth/login (bcrypt)
+    auth_me           GET  /api/auth/me (JWT + user sync)
+
+The database is a throwaway SQLite file seeded from the question bank unless
+--database-url points elsewhere (e.g. a disposable Postgres to stand in for
+production). Rate limiting is disabled, as every request comes from one
+client; admission control stays on, so 503s under heavy concurrency are
+load shedding working as intended.
+
+Usage (from server/):
+    python benchmarks/load_benchmark.py --duration 10 --concurrency 16 --output load.json
+    python benchmarks/load_benchmark.py --database-url postgresql://... --endpoints sql_execute_pass
+    python benchmarks/benchmark_results.py load-baseline.json load.json
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_results import latency_summary, write_results  # noqa: E402
+
+ENDPOINTS = (
+    "health",
+    "questions_list",
+    "question_detail",
+    "sql_execute_pass",
+    "sql_execute_fail",
+    "auth_login",
+    "auth_me",
+)
+
+
+def prepare_environment(args: argparse.Namespace) -> None:
+    workdir = tempfile.mkdtemp(prefix="sqltown-load-")
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        "WARMUP_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "SHARED_FIXTURE_DIR": "",
+        "FIXTURE_BUNDLE_PATH": "",
+        "DUCKDB_FIXTURE_DIR": os.path.join(workdir, "duckdb"),
+        "LOG_LEVEL": "WARNING",
+        "TRACE_SAMPLE_RATE": "0",
+        "TRACE_SLOW_REQUEST_MS": str(10 ** 9),
+    })
+    sys.path.insert(0, SERVER_DIR)
+
+
+def seed(bank: str) -> None:
+    sys.path.insert(0, os.path.join(SERVER_DIR, "seed"))
+    from seed_questions import seed_questions
+
+    # Seeder progress goes to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        seed_questions(bank, validate=False, bundle=False)
+
+
+def graded_question() -> tuple:
+    """(id, solution) of an active SQLite question that has test cases"""
+    from src.db.database import SessionLocal
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(Question.id, Question.solution)
+            .join(TestCase, TestCase.question_id == Question.id)
+            .filter(Question.is_active == True, Question.dialect == "sqlite", TestCase.expected_output.isnot(None))
+            .order_by(Question.id)
+            .first()
+        )
+    finally:
+        db.close()
+    if row is None:
+        raise SystemExit("❌ No gradable SQLite question in the database")
+    return row
+
+
+async def drive(client, request: dict, concurrency: int, duration: float, warmup: int) -> dict:
+    for _ in range(warmup):
+        await client.request(**request)
+
+    latencies = []
+    statuses = Counter()
+    failures = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                statuses[str(response.status_code)] += 1
+            except Exception:
+                failures += 1
+                statuses["exception"] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    errors = failures + sum(count for status, count in statuses.items() if status.startswith("5"))
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies or [0.0], "ms"),
+        "errors": errors,
+        "statuses": dict(statuses),
+        "concurrency": concurrency,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from main import app
+
+    question_id, solution = graded_question()
+    email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+    password = "load-test-password"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+        signup = await client.post("/api/auth/signup", json={"email": email, "password": password})
+        signup.raise_for_status()
+        token = signup.json()["access_token"]
+
+        requests = {
+            "health": {"method": "GET", "url": "/api/health"},
+            "questions_list": {"method": "GET", "url": "/api/questions/"},
+            "question_detail": {"method": "GET", "url": f"/api/questions/{question_id}"},
+            "sql_execute_pass": {
+                "method": "POST", "url": "/api/sql/execute",
+                "json": {"question_id": question_id, "sql": solution},
+            },
+            "sql_execute_fail": {
+                "method": "POST", "url": "/api/sql/execute",
+                "json": {"question_id": question_id, "sql": "SELECT 1 AS wrong"},
+            },
+            "auth_login": {
+                "method": "POST", "url": "/api/auth/login",
+                "json": {"email": email, "password": password},
+            },
+            "auth_me": {
+                "method": "GET", "url": "/api/auth/me",
+                "headers": {"Authorization": f"Bearer {token}"},
+            },
+        }
+
+        results = {}
+        for name in args.endpoints:
+            results[name] = await drive(client, requests[name], args.concurrency, args.duration, args.warmup)
+            print(
+                f"🚀 {name}: {results[name]['rps']} req/s, p50 {results[name]['p50_ms']} ms, "
+                f"p99 {results[name]['p99_ms']} ms, {results[name]['errors']} errors",
+                file=sys.stderr,
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API in process and report RPS and latency percentiles")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per endpoint first")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--database-url", help="Database to test against (default: a fresh SQLite file)")
+    parser.add_argument("--bank", default=os.path.join(SERVER_DIR, "seed", "questions.json"))
+    parser.add_argument("--no-seed", action="store_true", help="Use the database as is")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    prepare_environment(args)
+    if not args.no_seed:
+        seed(args.bank)
+
+    results = asyncio.run(run(args))
+    # The database URL may hold credentials
+    args.database_url = "custom" if args.database_url else "sqlite"
+    write_results("load", results, args, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Micro-benchmarks for the grading and request hot paths
+
+Times single functions in isolation, across fixture sizes where the cost
+depends on data volume:
+
+    execute_sql_safely/select_all/<rows>   fixture open + query + normalize + compare, full result
+    execute_sql_safely/aggregate/<rows>    same, one-row result (engine cost only)
+    normalize_result/<rows>                DB rows -> list of dicts
+    compare_results/<rows>                 order-insensitive comparison of two results
+    question_serialization/<rows>          QuestionResponse JSON for a question whose
+                                           test case expects <rows> rows
+    verify_token/hs256, verify_token/rs256 local and Cognito-style JWT verification
+
+Each benchmark is calibrated so one sample takes about --sample-ms, then
+timed --samples times; per-call p50/p95/min (microseconds) and ops_per_sec
+are reported. Fixtures are generated with the synthetic data generator and
+stay in memory (no shared store, no bundle).
+
+Usage (from server/):
+    python benchmarks/micro_benchmark.py --sizes 100 1000 10000 --output micro.json
+    python benchmarks/benchmark_results.py micro-baseline.json micro.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_results import percentile, write_results  # noqa: E402
+
+SCHEMA = {
+    "tables": [
+        {
+            "name": "employees",
+            "columns": [
+                {"name": "id", "type": "INTEGER", "constraints": ["PRIMARY KEY"]},
+                {"name": "name", "type": "TEXT"},
+                {"name": "department", "type": "TEXT"},
+                {"name": "salary", "type": "INTEGER"},
+                {"name": "hired_on", "type": "DATE"},
+            ],
+        }
+    ]
+}
+
+SELECT_ALL = "SELECT id, name, department, salary FROM employees"
+AGGREGATE = "SELECT department, COUNT(*) AS headcount, MAX(salary) AS top_salary FROM employees GROUP BY department"
+
+
+def dataset_spec(rows: int) -> dict:
+    return {
+        "seed": 11,
+        "tables": {
+            "employees": {
+                "rows": rows,
+                "columns": {
+                    "name": {"kind": "pattern", "format": "employee_{}"},
+                    "department": {"kind": "choice", "values": ["Engineering", "Sales", "HR", "Finance", "Legal"]},
+                    "salary": {"kind": "normal", "mean": 70000, "stddev": 20000, "min": 20000, "round": 0},
+                    "hired_on": {"kind": "date", "start": "2015-01-01", "end": "2024-12-31"},
+                },
+            }
+        },
+    }
+
+
+def measure(fn, samples: int, sample_ms: float) -> dict:
+    """Per-call timings of `fn` in microseconds"""
+    fn()  # warm caches (fixture build, JWKS, imports)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed * 1000 >= sample_ms or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    per_call = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - start) / loops * 1e6)
+    ordered = sorted(per_call)
+    p50 = percentile(ordered, 0.50)
+    return {
+        "p50_us": round(p50, 3),
+        "p95_us": round(percentile(ordered, 0.95), 3),
+        "min_us": round(ordered[0], 3),
+        "ops_per_sec": round(1e6 / p50, 1) if p50 else None,
+        "loops": loops,
+        "samples": samples,
+    }
+
+
+def token_benchmarks() -> dict:
+    """verify_token callables for a local HS256 token and an RS256 token against a cached JWKS"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk, jwt
+
+    from src.auth.jwt_verifier import ALGORITHM, SECRET_KEY, CognitoJWTVerifier
+
+    expires = int(time.time()) + 3600
+    verifier = CognitoJWTVerifier()
+    local_token = jwt.encode({"sub": "benchmark-user", "exp": expires}, SECRET_KEY, algorithm=ALGORITHM)
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": "benchmark", "use": "sig"}
+    verifier.issuer = "https://cognito-idp.local/benchmark"
+    verifier.client_id = "benchmark-client"
+    # Pre-populated JWKS cache: measures verification, not the HTTP fetch
+    verifier._jwks_cache = {"keys": [public_jwk]}
+    verifier._cache_timestamp = time.time()
+    cognito_token = jwt.encode(
+        {
+            "sub": "benchmark-user",
+            "aud": verifier.client_id,
+            "iss": verifier.issuer,
+            "token_use": "id",
+            "exp": expires,
+        },
+        private_pem.decode(),
+        algorithm="RS256",
+        headers={"kid": "benchmark"},
+    )
+    return {
+        "verify_token/hs256": lambda: verifier.verify_token(local_token),
+        "verify_token/rs256": lambda: verifier.verify_token(cognito_token),
+    }
+
+
+def sized_benchmarks(rows: int) -> dict:
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+    from src.schemas.question import QuestionResponse
+    from src.services.engines import get_backend
+    from src.services.sql_engine import compare_results, execute_sql_safely, normalize_result
+    from src.services.synthetic_data import directive_setup_sql
+
+    setup_sql = directive_setup_sql(SCHEMA, dataset_spec(rows))
+    with get_backend("sqlite").session(setup_sql) as session:
+        session.run(SELECT_ALL)
+        columns, result_rows = session.fetch()
+        session.run(AGGREGATE)
+        aggregate_columns, aggregate_rows = session.fetch()
+    expected = normalize_result(result_rows, columns)
+    expected_aggregate = normalize_result(aggregate_rows, aggregate_columns)
+    shuffled = list(expected)
+    random.Random(rows).shuffle(shuffled)
+
+    question = Question(
+        id=1,
+        title="Employees by department",
+        slug="employees-by-department",
+        description="List every employee.",
+        difficulty="easy",
+        topics=["SELECT"],
+        companies=[],
+        schema=SCHEMA,
+        examples=None,
+        hints=[],
+        solution=SELECT_ALL,
+        dialect="sqlite",
+        test_cases=[TestCase(setup_sql=setup_sql, expected_output=expected)],
+    )
+
+    def check(result):
+        assert result.get("passed"), result
+
+    return {
+        f"execute_sql_safely/select_all/{rows}": lambda: check(execute_sql_safely(setup_sql, SELECT_ALL, expected)),
+        f"execute_sql_safely/aggregate/{rows}": lambda: check(execute_sql_safely(setup_sql, AGGREGATE, expected_aggregate)),
+        f"normalize_result/{rows}": lambda: normalize_result(result_rows, columns),
+        f"compare_results/{rows}": lambda: compare_results(shuffled, expected),
+        f"question_serialization/{rows}": lambda: QuestionResponse.model_validate(question).model_dump_json(by_alias=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the grading and request hot paths in isolation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Fixture rows")
+    parser.add_argument("--samples", type=int, default=20, help="Timed samples per benchmark")
+    parser.add_argument("--sample-ms", type=float, default=50.0, help="Target duration of one sample")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqltown-micro-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'micro.db')}")
+    # In-memory fixtures only, so results do not depend on a prebuilt bundle or shared store
+    os.environ.update({
+        "SHARED_FIXTURE_DIR": "",
+        "FIXTURE_BUNDLE_PATH": "",
+        "LOG_LEVEL": "WARNING",
+        "SQL_MAX_RESULT_ROWS": str(max(max(args.sizes), 100000)),
+    })
+    sys.path.insert(0, SERVER_DIR)
+
+    benchmarks = token_benchmarks()
+    for rows in args.sizes:
+        benchmarks.update(sized_benchmarks(rows))
+
+    results = {}
+    for name, fn in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.samples, args.sample_ms)
+        print(f"⏱️  {name}: {results[name]['p50_us']:,.1f} µs", file=sys.stderr)
+
+    write_results("micro", results, args, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Replay captured submissions
+
+Re-grades a corpus captured with CAPTURE_ENABLED (see
+src/services/submission_capture.py) against this checkout's engine, using
+the test cases in DATABASE_URL, and reports:
+
+- throughput and the grading latency distribution (p50/p95/p99)
+- verdict drift: submissions whose verdict differs from the captured one,
+  counted per transition ("pass->fail", "error->pass", ...) with examples
+- latency drift: replayed vs captured grading time per submission
+
+Run it before rolling out an engine change: a drifted verdict is either a
+bug or a behaviour change to call out. Captured timings come from production
+hardware, so compare latency between replays on the same machine (via
+--output and benchmarks/benchmark_results.py) rather than with the capture.
+
+Usage (from server/):
+    python benchmarks/replay_submissions.py build/captures --concurrency 4 --output replay.json
+    python benchmarks/replay_submissions.py capture-a.jsonl capture-b.jsonl --unique --limit 50000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_results import latency_summary, write_results  # noqa: E402
+
+EXAMPLES_PER_TRANSITION = 5
+
+# Set in each replay process by _init_worker
+_cases = {}
+
+
+def iter_records(paths: list):
+    """Captured records from files and directories of capture files, in order"""
+    from src.services.submission_capture import capture_files
+
+    for path in paths:
+        files = capture_files(path) if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            # A worker killed mid-write leaves a partial last line
+                            continue
+
+
+def load_cases(question_ids: set) -> dict:
+    """question_id -> [GradingCase] from the database"""
+    from sqlalchemy.orm import joinedload
+
+    from src.db.database import SessionLocal
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+    from src.services.sql_engine import GradingCase
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(TestCase, Question.dialect)
+            .join(Question, Question.id == TestCase.question_id)
+            .options(joinedload(TestCase.dataset))
+            .filter(TestCase.question_id.in_(question_ids))
+            .order_by(TestCase.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+    cases = {}
+    for test_case, dialect in rows:
+        cases.setdefault(test_case.question_id, []).append(
+            GradingCase(*test_case.fixture, test_case.expected_output, test_case.expected_state, dialect)
+        )
+    return cases
+
+
+def _init_worker(cases: dict) -> None:
+    global _cases
+    _cases = cases
+
+
+def replay_one(question_id: int, sql: str) -> tuple:
+    """(verdict, seconds, error) of grading one submission in this process"""
+    from src.services.sql_engine import grade_submission
+
+    start = time.perf_counter()
+    body, verdict = grade_submission(_cases.get(question_id, []), sql)
+    return verdict, time.perf_counter() - start, body.get("error")
+
+
+def replay(records: list, cases: dict, concurrency: int) -> dict:
+    latencies = []
+    verdicts = Counter()
+    transitions = Counter()
+    examples = {}
+    ratios = []
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker, initargs=(cases,)) as pool:
+        outcomes = pool.map(
+            replay_one,
+            [record["question_id"] for record in records],
+            [record["sql"] for record in records],
+            chunksize=16,
+        )
+        for record, (verdict, seconds, error) in zip(records, outcomes):
+            latencies.append(seconds * 1000)
+            verdicts[verdict] += 1
+            captured = record.get("verdict")
+            if captured and captured != verdict:
+                transition = f"{captured}->{verdict}"
+                transitions[transition] += 1
+                bucket = examples.setdefault(transition, [])
+                if len(bucket) < EXAMPLES_PER_TRANSITION:
+                    bucket.append({
+                        "question_id": record["question_id"],
+                        "sql": record["sql"][:500],
+                        "captured_error": record.get("error"),
+                        "replay_error": error,
+                    })
+            if record.get("duration_ms"):
+                ratios.append(seconds * 1000 / record["duration_ms"])
+    elapsed = time.perf_counter() - started
+
+    compared = sum(1 for record in records if record.get("verdict"))
+    drifted = sum(transitions.values())
+    return {
+        "replay": {
+            "submissions": len(records),
+            "rps": round(len(records) / elapsed, 1) if elapsed else None,
+            **latency_summary(latencies or [0.0], "ms"),
+            "concurrency": concurrency,
+        },
+        "verdicts": dict(verdicts),
+        "drift": {
+            "compared": compared,
+            "drifted": drifted,
+            "drift_rate": round(drifted / compared, 6) if compared else 0.0,
+            "transitions": dict(transitions),
+            "examples": examples,
+            "latency_ratio_p50": round(statistics.median(ratios), 3) if ratios else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade captured submissions and report throughput and drift")
+    parser.add_argument("paths", nargs="+", help="Capture files or directories of them")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count(), help="Grading processes")
+    parser.add_argument("--limit", type=int, help="Replay at most this many submissions")
+    parser.add_argument("--question", type=int, action="append", help="Only these question IDs (repeatable)")
+    parser.add_argument("--unique", action="store_true", help="Replay each (question, SQL) pair once")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, SERVER_DIR)
+
+    records = []
+    seen = set()
+    for record in iter_records(args.paths):
+        if args.question and record.get("question_id") not in args.question:
+            continue
+        if args.unique:
+            key = (record.get("question_id"), record.get("sql"))
+            if key in seen:
+                continue
+            seen.add(key)
+        records.append(record)
+        if args.limit and len(records) >= args.limit:
+            break
+    if not records:
+        raise SystemExit("❌ No captured submissions found")
+
+    cases = load_cases({record["question_id"] for record in records})
+    missing = {record["question_id"] for record in records} - set(cases)
+    if missing:
+        records = [record for record in records if record["question_id"] in cases]
+        print(f"⚠️  Skipping {len(missing)} captured questions without test cases in this database", file=sys.stderr)
+        if not records:
+            raise SystemExit("❌ None of the captured questions exist in this database")
+
+    print(f"🔁 Replaying {len(records)} submissions with {args.concurrency} processes...", file=sys.stderr)
+    results = replay(records, cases, args.concurrency)
+    drift = results["drift"]
+    print(
+        f"✅ {results['replay']['rps']} submissions/s, p50 {results['replay']['p50_ms']} ms, "
+        f"{drift['drifted']} of {drift['compared']} verdicts drifted",
+        file=sys.stderr,
+    )
+    write_results("replay", results, args, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+S3 latency isolation benchmark
+
+Starts a deliberately slow S3 stand-in and the API under uvicorn, then
+measures /api/health latency on its own and while concurrent uploads and
+listings are waiting on S3. With S3 calls off the event loop the two
+distributions should be close; if an endpoint blocks the loop, health-check
+latency jumps to the S3 delay.
+
+Usage (from server/):
+    python benchmarks/s3_latency_benchmark.py --delay 1.0 --uploads 8 --output s3.json
+
+Requires httpx and uvicorn (both used by the API test client and server).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+EMPTY_LISTING = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+    b'<Name>bench</Name><Prefix>datasets/</Prefix><KeyCount>0</KeyCount>'
+    b'<MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated></ListBucketResult>'
+)
+
+NO_SUCH_KEY = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message></Error>'
+)
+
+
+def slow_s3_handler(delay: float):
+    class SlowS3Handler(BaseHTTPRequestHandler):
+        """Accepts every PUT, has no objects, and answers everything after `delay` seconds"""
+
+        def log_message(self, *args):
+            pass
+
+        def _drain(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    self.rfile.read(size + 2)
+                    if size == 0:
+                        break
+            else:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _reply(self, status: int, body: bytes = b""):
+            time.sleep(delay)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"0"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_PUT(self):
+            self._drain()
+            self._reply(200)
+
+        def do_GET(self):
+            if "list-type=2" in self.path:
+                self._reply(200, EMPTY_LISTING)
+            else:
+                self._reply(404, NO_SUCH_KEY)
+
+        def do_HEAD(self):
+            self._reply(404)
+
+    return SlowS3Handler
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def sample_latency(client: httpx.Client, url: str, duration: float) -> list:
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+    return samples
+
+
+def stats(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def run(delay: float, uploads: int, duration: float) -> dict:
+    s3_port = free_port()
+    s3 = ThreadingHTTPServer(("127.0.0.1", s3_port), slow_s3_handler(delay))
+    threading.Thread(target=s3.serve_forever, daemon=True).start()
+
+    api_port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "S3_ENDPOINT_URL": f"http://127.0.0.1:{s3_port}",
+        "AWS_S3_BUCKET": "bench",
+        "AWS_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "WARMUP_ENABLED": "false",
+        "DATASET_INDEX_TTL_SECONDS": "0",
+    })
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'sqltown-s3-bench.db')}")
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{api_port}"
+
+    try:
+        wait_for(f"{base}/api/health")
+        with httpx.Client(base_url=base, timeout=60) as client:
+            baseline = sample_latency(client, "/api/health", duration)
+
+            stop = threading.Event()
+            statuses: list = []
+
+            def load(index: int):
+                with httpx.Client(base_url=base, timeout=60) as load_client:
+                    while not stop.is_set():
+                        dump = f"CREATE TABLE t{index}(x INTEGER); INSERT INTO t{index} VALUES ({time.time_ns()});"
+                        response = load_client.post(
+                            "/api/upload-sql-database",
+                            files={"file": (f"bench{index}.sql", dump.encode(), "application/sql")},
+                        )
+                        statuses.append(response.status_code)
+                        statuses.append(load_client.get("/api/list-databases").status_code)
+
+            workers = [threading.Thread(target=load, args=(i,), daemon=True) for i in range(uploads)]
+            for worker in workers:
+                worker.start()
+            time.sleep(delay)  # let the uploads reach S3
+            under_load = sample_latency(client, "/api/health", duration)
+            stop.set()
+            for worker in workers:
+                worker.join()
+    finally:
+        api.terminate()
+        api.wait()
+        s3.shutdown()
+
+    return {
+        "s3_delay_ms": delay * 1000,
+        "concurrent_uploads": uploads,
+        "health_baseline": stats(baseline),
+        "health_during_uploads": stats(under_load),
+        "s3_backed_requests_ok": statuses.count(200),
+        "s3_backed_requests_failed": len(statuses) - statuses.count(200),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that slow S3 calls do not stall other endpoints")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds the S3 stand-in takes per response")
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent upload clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to sample each phase")
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    summary = run(args.delay, args.uploads, args.duration)
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Startup benchmark
+
+Boots the API in fresh interpreters and reports import time per subsystem
+and time-to-first-request, so cold-start regressions show up in review.
+
+Usage (from server/):
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+
+DATABASE_URL defaults to a throwaway SQLite file; startup no longer touches
+the database, so no schema is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Runs inside a fresh interpreter: import the app, serve one request, dump the report
+CHILD_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/api/health")
+report = main.startup_profiler.report()
+report["import_main_ms"] = round((imported - t0) * 1000, 2)
+print(json.dumps(report))
+"""
+
+
+def run_once(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=SERVER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    def stats(values):
+        return {
+            "median_ms": round(statistics.median(values), 2),
+            "min_ms": round(min(values), 2),
+            "max_ms": round(max(values), 2),
+        }
+
+    phase_names = [phase["name"] for phase in runs[0]["phases"]]
+    return {
+        "runs": len(runs),
+        "import_main": stats([run["import_main_ms"] for run in runs]),
+        "time_to_first_request": stats([run["time_to_first_request_ms"] for run in runs]),
+        "phases": {
+            name: stats([
+                next(p["duration_ms"] for p in run["phases"] if p["name"] == name)
+                for run in runs
+            ])
+            for name in phase_names
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SQLTown API cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'sqltown-startup.db')}"
+
+    summary = summarize([run_once(env) for _ in range(args.runs)])
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
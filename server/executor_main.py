@@ -0,0 +1,70 @@
+"""
+Grading executor entry point (see src/executor/service.py)
+
+Usage:
+    python executor_main.py --port 9101                   # one executor
+    python executor_main.py --processes 4 --port 9101     # executors on ports 9101-9104
+    EXECUTOR_API_KEY=... python executor_main.py --host 0.0.0.0 --port 9101
+
+Binding anywhere but loopback requires EXECUTOR_API_KEY; point the API at the
+executors with EXECUTOR_URLS and the same key.
+"""
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.config import settings  # noqa: E402
+from src.utils.log_config import configure_logging  # noqa: E402
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+from src.executor.service import app, is_loopback  # noqa: E402,F401
+
+
+def serve(host: str, port: int) -> None:
+    import uvicorn
+
+    uvicorn.run("executor_main:app", host=host, port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run grading executors")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101, help="Port of the first executor")
+    parser.add_argument("--processes", type=int, default=1, help="Executors to start on consecutive ports")
+    args = parser.parse_args()
+
+    if not settings.EXECUTOR_API_KEY and not is_loopback(args.host):
+        parser.error(f"EXECUTOR_API_KEY must be set to listen on {args.host}; without it executors only bind to loopback")
+
+    if args.processes <= 1:
+        serve(args.host, args.port)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    ports = range(args.port, args.port + args.processes)
+    processes = [context.Process(target=serve, args=(args.host, port), daemon=True) for port in ports]
+    for process in processes:
+        process.start()
+    print(f"🚀 {args.processes} executors; for the API:")
+    print(f"EXECUTOR_URLS='{json.dumps([f'http://{args.host}:{port}' for port in ports])}'")
+    # Stopping the launcher stops its executors
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
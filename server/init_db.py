@@ -1,15 +1,14 @@
 """
 Database initialization script
-Creates all tables defined in models
+Applies all Alembic migrations (equivalent to `alembic upgrade head`)
 """
-from src.db.database import engine, Base
-from src.models.user import User
+from src.db.migrations import upgrade_to_head
 
 def init_db():
-    """Create all tables"""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✓ Database tables created successfully!")
+    """Bring the schema up to the latest migration"""
+    print("Applying database migrations...")
+    upgrade_to_head()
+    print("✓ Database schema is up to date!")
 
 if __name__ == "__main__":
     init_db()
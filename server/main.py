@@ -1,53 +1,127 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-
-from src.config import settings
-from src.middleware import setup_cors
-from src.controllers import upload_router, health_router
-from src.auth.auth_router import router as auth_router
-from src.controllers.question_router import router as question_router
-from src.routes.progress import router as progress_router
-from src.routes.sql_executor import router as sql_router
-from src.db.database import engine, Base
+from src.utils.startup import startup_profiler
+
+with startup_profiler.phase("framework"):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from dotenv import load_dotenv
+
+with startup_profiler.phase("config"):
+    import logging
+    from src.config import settings
+    from src.utils.log_config import configure_logging
+
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+with startup_profiler.phase("db"):
+    from src.db.database import engine
+    from src.core.warmup import start_warmup
+    from src.services.fixture_cache import fixture_cache
+    from src.services.submission_capture import submission_capture
+    from src.services.contest_scheduler import contest_scheduler
+    from src.services.executor_pool import executor_pool
+    from src.services.bulk_grading import bulk_grader
+    import src.models  # This loads all models
+
+with startup_profiler.phase("middleware"):
+    from src.middleware import (
+        setup_cors,
+        setup_metrics,
+        setup_profiling,
+        setup_query_stats,
+        setup_rate_limit,
+        setup_read_your_writes,
+        setup_startup_profiler,
+        setup_tracing,
+        trace_endpoints,
+        profile_endpoints,
+    )
+    from src.utils.profiling import continuous_profiler
+
+with startup_profiler.phase("routers.upload_health_admin"):
+    from src.controllers import upload_router, health_router, admin_router, metrics_router, contest_router
+    from src.core.metrics import start_gauge_sampler, worker_exited
+    from src.integrations.s3_service import s3_service
+    from src.services.dataset_compiler import shutdown_compile_executor
+
+with startup_profiler.phase("routers.auth"):
+    from src.auth.auth_router import router as auth_router
+
+with startup_profiler.phase("routers.questions"):
+    from src.controllers.question_router import router as question_router
+
+with startup_profiler.phase("routers.progress"):
+    from src.routes.progress import router as progress_router
+
+with startup_profiler.phase("routers.sql"):
+    from src.routes.sql_executor import router as sql_router
 
 # Load environment variables
 load_dotenv()
 
-import src.models  # This loads all models
+logger = logging.getLogger("sqltown.app")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created")
+    # Startup: the schema is managed by Alembic migrations (alembic upgrade head).
+    # Warm caches in the background; /api/ready gates traffic until this finishes.
+    if fixture_cache.shared is not None:
+        fixture_cache.shared.attach()
+    start_warmup()
+    sampler = start_gauge_sampler()
+    continuous_profiler.start()
+    executor_pool.start()
     yield
-    # Shutdown: Add cleanup code here if needed
-    print("👋 Shutting down...")
+    # Shutdown: finish in-flight S3 operations and release pooled connections
+    if sampler is not None:
+        sampler.cancel()
+    worker_exited()
+    continuous_profiler.stop()
+    await contest_scheduler.shutdown()
+    executor_pool.stop()
+    bulk_grader.shutdown()
+    submission_capture.close()
+    if fixture_cache.shared is not None:
+        fixture_cache.shared.detach()
+    shutdown_compile_executor()
+    s3_service.shutdown()
+    engine.dispose()
+    logger.info("Shutting down")
 
 
 # Initialize FastAPI app
-app = FastAPI(
-    title=settings.APP_NAME,
-    description="Server for SQLTown - A SQL query playground",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    lifespan=lifespan
-)
-
-# Setup middleware
-setup_cors(app)
-
-# Include routers
-app.include_router(upload_router)
-app.include_router(health_router)
-app.include_router(auth_router)
-app.include_router(question_router)
-app.include_router(progress_router)
-app.include_router(sql_router)
+with startup_profiler.phase("app"):
+    app = FastAPI(
+        title=settings.APP_NAME,
+        description="Server for SQLTown - A SQL query playground",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+
+    # Setup middleware
+    setup_rate_limit(app)  # innermost, so CORS, metrics and tracing also cover its 429s
+    setup_cors(app)
+    setup_metrics(app)
+    setup_query_stats(app)
+    setup_read_your_writes(app)
+    setup_startup_profiler(app)
+    setup_profiling(app)
+    setup_tracing(app)  # outermost, so its timings cover the whole stack
+
+    # Include routers
+    app.include_router(upload_router)
+    app.include_router(health_router)
+    app.include_router(auth_router)
+    app.include_router(question_router)
+    app.include_router(progress_router)
+    app.include_router(sql_router)
+    app.include_router(contest_router)
+    app.include_router(admin_router)
+    app.include_router(metrics_router)
+    trace_endpoints(app)
+    profile_endpoints(app)
 
 
 @app.get("/")
@@ -66,4 +140,4 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=settings.PORT,
         reload=True
-    )
\ No newline at end of file
+    )
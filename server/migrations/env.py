@@ -0,0 +1,85 @@
+"""
+Alembic environment
+
+Uses the application's engine and model metadata so migrations always run
+against the same DATABASE_URL as the server.
+
+Databases created by the server's old boot-time create_all have the tables
+of revision 0001 but no alembic_version table; they are stamped 0001
+automatically before migrating, so `alembic upgrade head` works on them.
+"""
+import logging
+from logging.config import fileConfig
+
+import sqlalchemy as sa
+from alembic import context
+from alembic.script import ScriptDirectory
+
+from src.db.database import Base, engine
+import src.models  # noqa: F401  (registers all models on Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+logger = logging.getLogger("alembic.env")
+
+# What create_all made before migrations existed, i.e. revision 0001
+INITIAL_REVISION = "0001"
+INITIAL_TABLES = {"questions", "users", "test_cases", "user_progress"}
+
+
+def stamp_pre_alembic_database(connection) -> None:
+    """
+    Stamp a database created by create_all with the initial revision
+
+    Raises:
+        RuntimeError: If the database has some of the initial tables but
+            not all of them, and so cannot be adopted safely
+    """
+    tables = set(sa.inspect(connection).get_table_names())
+    if "alembic_version" in tables or not tables & INITIAL_TABLES:
+        return
+    missing = INITIAL_TABLES - tables
+    if missing:
+        raise RuntimeError(
+            "Database has no alembic_version table and only part of the initial schema "
+            f"(missing {', '.join(sorted(missing))}); create the missing tables, then run "
+            f"`alembic stamp {INITIAL_REVISION}`"
+        )
+    logger.info("Database predates migrations; stamping it as revision %s", INITIAL_REVISION)
+    context.get_context().stamp(ScriptDirectory.from_config(config), INITIAL_REVISION)
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of running it (alembic upgrade --sql)"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database"""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            stamp_pre_alembic_database(connection)
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,97 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Matches the tables previously created at boot by Base.metadata.create_all.
+Existing databases created that way are stamped with this revision by
+migrations/env.py instead of being upgraded from scratch.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+StringArray = sa.ARRAY(sa.String()).with_variant(sa.JSON(), "sqlite")
+JSONB = postgresql.JSONB().with_variant(sa.JSON(), "sqlite")
+
+
+def upgrade() -> None:
+    op.create_table('questions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('difficulty', sa.String(), nullable=False),
+        sa.Column('topics', StringArray, nullable=True),
+        sa.Column('companies', StringArray, nullable=True),
+        sa.Column('schema', sa.JSON(), nullable=True),
+        sa.Column('examples', sa.JSON(), nullable=True),
+        sa.Column('hints', StringArray, nullable=True),
+        sa.Column('solution', sa.Text(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slug')
+    )
+    op.create_index('ix_questions_id', 'questions', ['id'], unique=False)
+
+    op.create_table('users',
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('email_verified', sa.Boolean(), nullable=True),
+        sa.Column('cognito_username', sa.String(length=255), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('picture_url', sa.Text(), nullable=True),
+        sa.Column('auth_provider', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('last_login', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('preferences', sa.JSON(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_auth_provider', 'users', ['auth_provider'], unique=False)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    op.create_table('test_cases',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=True),
+        sa.Column('setup_sql', sa.Text(), nullable=True),
+        sa.Column('expected_output', JSONB, nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('user_progress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('question_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('time_taken', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_progress')
+    op.drop_table('test_cases')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_auth_provider', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_questions_id', table_name='questions')
+    op.drop_table('questions')
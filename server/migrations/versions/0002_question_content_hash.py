@@ -0,0 +1,27 @@
+"""question content hash
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Stores a hash of each question's seed content so the incremental seeder can
+skip questions that did not change.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_column('content_hash')
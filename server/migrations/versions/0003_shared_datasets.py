@@ -0,0 +1,87 @@
+"""shared datasets
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Adds a library of named, versioned datasets that test cases reference
+instead of carrying their own setup_sql, plus an optional per-test-case
+delta script. Existing inline setup scripts are deduplicated into datasets.
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    datasets = op.create_table('datasets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('setup_sql', sa.Text(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name', 'version', name='uq_datasets_name_version')
+    )
+    op.create_index('ix_datasets_content_hash', 'datasets', ['content_hash'], unique=False)
+
+    with op.batch_alter_table('test_cases') as batch_op:
+        batch_op.add_column(sa.Column('dataset_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('delta_sql', sa.Text(), nullable=True))
+        batch_op.create_foreign_key('fk_test_cases_dataset_id', 'datasets', ['dataset_id'], ['id'])
+        batch_op.create_index('ix_test_cases_dataset_id', ['dataset_id'], unique=False)
+
+    # Move inline setup scripts into one dataset per distinct script
+    conn = op.get_bind()
+    test_cases = sa.table('test_cases', sa.column('id'), sa.column('setup_sql'), sa.column('dataset_id'))
+    scripts = [
+        row.setup_sql
+        for row in conn.execute(sa.select(test_cases.c.setup_sql).where(test_cases.c.setup_sql.is_not(None)).distinct())
+    ]
+    for setup_sql in scripts:
+        digest = hashlib.sha256(setup_sql.encode('utf-8')).hexdigest()
+        dataset_id = conn.execute(
+            datasets.insert()
+            .values(name=f'inline-{digest[:12]}', version=1, setup_sql=setup_sql, content_hash=digest)
+            .returning(datasets.c.id)
+        ).scalar_one()
+        conn.execute(
+            test_cases.update()
+            .where(test_cases.c.setup_sql == setup_sql)
+            .values(dataset_id=dataset_id, setup_sql=None)
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    test_cases = sa.table(
+        'test_cases', sa.column('setup_sql'), sa.column('delta_sql'), sa.column('dataset_id')
+    )
+    datasets = sa.table('datasets', sa.column('id'), sa.column('setup_sql'))
+    base = sa.select(datasets.c.setup_sql).where(datasets.c.id == test_cases.c.dataset_id).scalar_subquery()
+    conn.execute(
+        test_cases.update()
+        .where(test_cases.c.dataset_id.is_not(None))
+        .values(setup_sql=sa.case(
+            (test_cases.c.delta_sql.is_(None), base),
+            else_=base + '\n' + test_cases.c.delta_sql,
+        ))
+    )
+
+    with op.batch_alter_table('test_cases') as batch_op:
+        batch_op.drop_index('ix_test_cases_dataset_id')
+        batch_op.drop_constraint('fk_test_cases_dataset_id', type_='foreignkey')
+        batch_op.drop_column('delta_sql')
+        batch_op.drop_column('dataset_id')
+
+    op.drop_index('ix_datasets_content_hash', table_name='datasets')
+    op.drop_table('datasets')
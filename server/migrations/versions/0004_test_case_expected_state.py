@@ -0,0 +1,30 @@
+"""test case expected state
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Data-modifying questions are graded on the final state of their tables;
+expected_state holds a fingerprint per table.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+JSONB = postgresql.JSONB().with_variant(sa.JSON(), "sqlite")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('test_cases') as batch_op:
+        batch_op.add_column(sa.Column('expected_state', JSONB, nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('test_cases') as batch_op:
+        batch_op.drop_column('expected_state')
@@ -0,0 +1,27 @@
+"""question dialect
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Questions choose the execution backend they are graded on; existing
+questions stay on SQLite.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.add_column(sa.Column('dialect', sa.String(length=16), nullable=False, server_default='sqlite'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_column('dialect')
@@ -0,0 +1,66 @@
+"""contests
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Timed contests over a set of questions, and the graded submissions made
+during them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('contests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(length=255), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slug')
+    )
+    op.create_table('contest_questions',
+        sa.Column('contest_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['contest_id'], ['contests.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.PrimaryKeyConstraint('contest_id', 'question_id')
+    )
+    op.create_table('contest_submissions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('contest_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('verdict', sa.String(length=16), nullable=False),
+        sa.Column('queue_seconds', sa.Float(), nullable=True),
+        sa.Column('grading_seconds', sa.Float(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('graded_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['contest_id'], ['contests.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_contest_submissions_contest_user_question',
+        'contest_submissions',
+        ['contest_id', 'user_id', 'question_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contest_submissions_contest_user_question', table_name='contest_submissions')
+    op.drop_table('contest_submissions')
+    op.drop_table('contest_questions')
+    op.drop_table('contests')
@@ -0,0 +1,53 @@
+"""
+Fixture bundle builder
+
+Compiles every test case's fixture (dataset plus delta) into the fixture
+bundle workers map at startup (FIXTURE_BUNDLE_PATH). Rebuilds are
+incremental: only new or changed datasets are executed, everything else is
+copied from the existing bundle. seed_questions.py runs this automatically
+after changing questions.
+
+Usage (from server/):
+    python seed/build_fixture_bundle.py [--output build/fixtures.bundle] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import settings
+from src.db.database import SessionLocal
+from src.services.fixture_bundle import build_from_database
+
+
+def build_fixture_bundle(path: str = settings.FIXTURE_BUNDLE_PATH, workers: int = None) -> dict:
+    """Rebuild the fixture bundle from the test_cases table"""
+    db = SessionLocal()
+    try:
+        print(f"📦 Building fixture bundle {path}...")
+        result = build_from_database(db, path, workers=workers)
+    finally:
+        db.close()
+
+    print(
+        f"✅ {result['fixtures']} fixtures ({result['bytes'] / 1024 / 1024:.1f} MiB): "
+        f"{result['built']} built, {result['reused']} reused, {result['removed']} removed"
+    )
+    if result["failed"]:
+        print(f"⚠️  {result['failed']} setup script(s) failed and were left out of the bundle")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile test-case fixtures into a bundle")
+    parser.add_argument("--output", default=settings.FIXTURE_BUNDLE_PATH, help="Bundle file to write")
+    parser.add_argument("--workers", type=int, default=None, help="Build processes (default: CPU count)")
+    args = parser.parse_args()
+
+    build_fixture_bundle(args.output, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Synthetic dataset generator
+
+Builds a large, deterministic SQLite database from a question's schema (or a
+schema JSON file) and an optional distribution spec, for performance test
+cases and engine benchmarks. The same schema, spec and seed always produce
+the same file.
+
+Usage (from server/):
+    python seed/generate_dataset.py --question highest-paid-employee --rows 1000000 \
+        [--spec spec.json] [--seed 42] --output build/employees.sqlite
+    python seed/generate_dataset.py --schema schema.json --rows 100000 --directive
+
+--directive prints the setup_sql to paste into a test case instead of
+writing a file (or use "generate": {spec} in the question bank directly).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# Add parent directory to path to import from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.synthetic_data import DEFAULT_BATCH_SIZE, directive_setup_sql, generate
+from src.utils.json_stream import iter_json_array
+
+DEFAULT_BANK = os.path.join(os.path.dirname(__file__), 'questions.json')
+
+
+def load_schema(question: str = None, schema_path: str = None, bank: str = DEFAULT_BANK) -> dict:
+    """Schema of a question in the bank, or from a JSON file"""
+    if schema_path:
+        with open(schema_path, 'r') as f:
+            return json.load(f)
+    with open(bank, 'r') as f:
+        for q in iter_json_array(f):
+            if q["slug"] == question:
+                return q["schema"]
+    raise SystemExit(f"❌ No question with slug {question!r} in {bank}")
+
+
+def generate_file(schema: dict, spec: dict, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Generate a dataset into a new SQLite file
+
+    Returns:
+        Rows per table, elapsed seconds, file size and content hash
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        # Scratch build: nothing to recover if it is interrupted
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        tables = generate(conn, schema, spec, batch_size=batch_size)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return {
+        "tables": tables,
+        "seconds": round(elapsed, 3),
+        "bytes": os.path.getsize(path),
+        "sha256": digest.hexdigest(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--question", help="Slug of a question in the bank whose schema to use")
+    source.add_argument("--schema", help="Schema JSON file ({\"tables\": [...]})")
+    parser.add_argument("--bank", default=DEFAULT_BANK, help="Question bank for --question")
+    parser.add_argument("--spec", help="Distribution spec JSON file")
+    parser.add_argument("--rows", type=int, help="Rows per table not given a count in the spec")
+    parser.add_argument("--seed", type=int, help="Overrides the spec's seed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="SQLite file to write")
+    target.add_argument("--directive", action="store_true", help="Print the test-case setup_sql instead")
+    args = parser.parse_args()
+
+    schema = load_schema(args.question, args.schema, args.bank)
+    spec = {}
+    if args.spec:
+        with open(args.spec, 'r') as f:
+            spec = json.load(f)
+    if args.rows is not None:
+        spec["rows"] = args.rows
+    if args.seed is not None:
+        spec["seed"] = args.seed
+
+    if args.directive:
+        print(directive_setup_sql(schema, spec))
+        return
+
+    print(f"🎲 Generating {args.output}...")
+    result = generate_file(schema, spec, args.output, batch_size=args.batch_size)
+    rows = sum(result["tables"].values())
+    print(
+        f"✅ {rows} rows in {result['seconds']}s ({rows / max(result['seconds'], 1e-9):,.0f} rows/s), "
+        f"{result['bytes'] / 1024 / 1024:.1f} MiB, sha256 {result['sha256'][:12]}"
+    )
+
+
+if __name__ == "__main__":
+    main()
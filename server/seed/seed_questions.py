@@ -1,89 +1,515 @@
+"""
+Incremental question seeder
+
+Streams a question bank (JSON array), hashes each question and upserts only
+new or changed questions by slug, in batches. Each changed question's
+solution is first run against its test cases in a process pool, so broken
+content fails the seed before it reaches users. Everything runs in one
+transaction; nothing is written unless the whole bank is valid. When
+anything changed, the fixture bundle is rebuilt incrementally afterwards.
+
+A test case may replace setup_sql with "generate", a synthetic-data spec
+(see src/services/synthetic_data.py) applied to the question's schema; if it
+has no expected_output, the solution's result on the generated data is used.
+
+Test-case data lives in a shared dataset library. Named, versioned datasets
+come from datasets.json ({"name", "version", "setup_sql" or "schema" +
+"generate"}); a version cannot change once seeded. A test case (or a whole
+question) references one with "dataset": "name" (latest version) or
+"name@version", optionally with a "delta_sql" applied on top. Inline setup
+scripts are deduplicated across the bank into anonymous datasets, so each
+distinct dataset is stored and built once.
+
+Questions whose solution modifies data give their test cases an
+"expected_state" instead of an expected_output: either {table: [rows]} or
+just a list of table names, whose expected contents are then taken from
+running the solution. Only table fingerprints are stored.
+
+"dialect" picks the engine a question is graded on: "sqlite" (default) or
+"duckdb" for analytical questions over large generated datasets.
+
+Usage (from server/):
+    python seed/seed_questions.py [questions.json] [--datasets datasets.json] [--batch-size 500]
+                                  [--workers N] [--no-validate] [--prune] [--no-bundle]
+"""
+import argparse
+import hashlib
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 # Add parent directory to path to import from src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import delete, exists, insert, select, update
 from sqlalchemy.orm import Session
-from src.db.database import SessionLocal, engine, Base
+from src.db.database import SessionLocal
+from src.config import settings
+from src.db.migrations import upgrade_to_head
+from src.models.dataset import Dataset
 from src.models.question import Question
 from src.models.test_case import TestCase
+from src.services.fixture_bundle import build_from_database
+from src.services.fixture_cache import fixture_key
+from src.services.synthetic_data import directive_setup_sql
+from src.utils.json_stream import iter_json_array
+
+DEFAULT_BANK = os.path.join(os.path.dirname(__file__), 'questions.json')
+DEFAULT_DATASETS = os.path.join(os.path.dirname(__file__), 'datasets.json')
+
+# Datasets created for deduplicated inline setup scripts
+INLINE_PREFIX = 'inline-'
+
+
+class SeedValidationError(Exception):
+    """
+    Raised when one or more question solutions fail their own test cases
+    """
+
 
-def load_questions_data():
-    """Load questions from JSON file"""
-    json_path = os.path.join(os.path.dirname(__file__), 'questions.json')
+def iter_questions(json_path: str) -> Iterator[dict]:
+    """Stream questions from a JSON array without loading the whole file"""
     with open(json_path, 'r') as f:
-        return json.load(f)
+        yield from iter_json_array(f)
+
+
+def dataset_refs(q: dict) -> List[str]:
+    refs = [tc["dataset"] for tc in q.get("test_cases", []) if "dataset" in tc]
+    return refs + ([q["dataset"]] if "dataset" in q else [])
+
+
+def content_hash(q: dict, library: Optional[Dict[str, str]] = None) -> str:
+    """Stable hash of everything the seeder writes for a question"""
+    refs = dataset_refs(q)
+    if refs:
+        # "name" follows the latest version, so the resolved data is part of the content
+        q = dict(q, _datasets={ref: fixture_key(resolve_dataset(ref, library or {})) for ref in refs})
+    canonical = json.dumps(q, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def resolve_dataset(ref: str, library: Dict[str, str]) -> str:
+    """
+    setup_sql of a dataset reference ("name" for the latest version, or "name@version")
+
+    Raises:
+        SeedValidationError: If no such dataset exists
+    """
+    if "@" in ref:
+        if ref in library:
+            return library[ref]
+    else:
+        versions = [int(key.rsplit("@", 1)[1]) for key in library if key.rsplit("@", 1)[0] == ref]
+        if versions:
+            return library[f"{ref}@{max(versions)}"]
+    raise SeedValidationError(f"Unknown dataset {ref!r}")
+
+
+def load_dataset_library(db: Session, json_path: Optional[str]) -> Dict[str, str]:
+    """
+    Insert new named datasets from a JSON array and return every named dataset
+
+    Returns:
+        "name@version" -> setup_sql
+
+    Raises:
+        SeedValidationError: If an already seeded version has different content
+    """
+    if json_path and os.path.exists(json_path):
+        with open(json_path, 'r') as f:
+            entries = list(iter_json_array(f))
+        existing = {
+            (name, version): digest
+            for name, version, digest in db.execute(select(Dataset.name, Dataset.version, Dataset.content_hash))
+        }
+        for entry in entries:
+            if "generate" in entry:
+                setup_sql = directive_setup_sql(entry["schema"], entry["generate"])
+            else:
+                setup_sql = entry["setup_sql"]
+            version = entry.get("version", 1)
+            digest = fixture_key(setup_sql)
+            previous = existing.get((entry["name"], version))
+            if previous is None:
+                db.execute(insert(Dataset).values(
+                    name=entry["name"],
+                    version=version,
+                    description=entry.get("description"),
+                    setup_sql=setup_sql,
+                    content_hash=digest,
+                ))
+                existing[(entry["name"], version)] = digest
+            elif previous != digest:
+                raise SeedValidationError(
+                    f"Dataset {entry['name']}@{version} changed; datasets are immutable, add a new version"
+                )
+
+    return {
+        f"{name}@{version}": setup_sql
+        for name, version, setup_sql in db.execute(
+            select(Dataset.name, Dataset.version, Dataset.setup_sql).where(Dataset.name.not_like(f"{INLINE_PREFIX}%"))
+        )
+    }
+
+
+def dataset_ids(db: Session, scripts: List[str]) -> Dict[str, int]:
+    """
+    Dataset id for each distinct setup script, creating anonymous datasets as needed
+
+    Returns:
+        content hash -> dataset id
+    """
+    by_hash = {fixture_key(setup_sql): setup_sql for setup_sql in scripts}
+    ids = {}
+    for digest, dataset_id in db.execute(
+        select(Dataset.content_hash, Dataset.id).where(Dataset.content_hash.in_(list(by_hash))).order_by(Dataset.id)
+    ):
+        ids.setdefault(digest, dataset_id)
+    for digest in sorted(set(by_hash) - set(ids)):
+        ids[digest] = db.execute(
+            insert(Dataset)
+            .values(name=f"{INLINE_PREFIX}{digest[:12]}", version=1, setup_sql=by_hash[digest], content_hash=digest)
+            .returning(Dataset.id)
+        ).scalar_one()
+    return ids
+
+
+def batched(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def solution_output(
+    setup_sql: str,
+    solution: str,
+    delta_sql: Optional[str] = None,
+    dialect: str = "sqlite"
+) -> List[dict]:
+    """Result of the reference solution on a fixture, run on the question's backend"""
+    from src.services.engines import get_backend
+    from src.services.sql_engine import normalize_result
+
+    with get_backend(dialect).session(setup_sql, delta_sql) as session:
+        session.run(solution)
+        columns, rows = session.fetch()
+    return normalize_result(rows, columns)
+
+
+def solution_state(setup_sql: str, solution: str, tables: List[str], delta_sql: Optional[str] = None) -> dict:
+    """Fingerprints of the given tables after running a data-modifying solution"""
+    from src.services.fixture_cache import fixture_cache
+    from src.services.sql_engine import table_fingerprint
+    from src.utils.sql_statements import split_statements
+
+    with fixture_cache.scratch(setup_sql, delta_sql) as conn:
+        for statement in split_statements(solution.splitlines(keepends=True)):
+            conn.execute(statement).fetchall()
+        return {table: table_fingerprint(conn, table) for table in tables}
+
+
+def resolve_test_cases(q: dict, library: Optional[Dict[str, str]] = None) -> List[dict]:
+    """Dataset script, delta and expected output or state of each test case"""
+    from src.services.sql_engine import rows_fingerprint
+
+    resolved = []
+    for tc in q.get("test_cases", []):
+        if "generate" in tc:
+            setup_sql = directive_setup_sql(q.get("schema"), tc["generate"])
+        elif "setup_sql" in tc:
+            setup_sql = tc["setup_sql"]
+        else:
+            setup_sql = resolve_dataset(tc.get("dataset", q.get("dataset", "")), library or {})
+        delta_sql = tc.get("delta_sql") or None
+        expected_output = tc.get("expected_output")
+        expected_state = tc.get("expected_state")
+        if isinstance(expected_state, list):
+            expected_state = solution_state(setup_sql, q["solution"], expected_state, delta_sql)
+        elif expected_state is not None:
+            expected_state = {
+                table: None if rows is None else rows_fingerprint(rows)
+                for table, rows in expected_state.items()
+            }
+        elif expected_output is None:
+            expected_output = solution_output(setup_sql, q["solution"], delta_sql, q.get("dialect", "sqlite"))
+        resolved.append({
+            "setup_sql": setup_sql,
+            "delta_sql": delta_sql,
+            "expected_output": expected_output or [],
+            "expected_state": expected_state,
+        })
+    return resolved
+
+
+def prepare_question(
+    q: dict,
+    validate: bool = True,
+    library: Optional[Dict[str, str]] = None
+) -> Tuple[str, List[dict], List[str]]:
+    """
+    Resolve a question's test cases and run its solution against each
+
+    Executed in worker processes, so it only takes and returns plain data.
+
+    Returns:
+        (slug, resolved test cases, list of failure messages)
+    """
+    from src.services.sql_engine import execute_dml_safely, execute_sql_safely
 
-def seed_questions():
+    try:
+        test_cases = resolve_test_cases(q, library)
+    except Exception as e:
+        return q["slug"], [], [f"generating test cases: {e}"]
+
+    solution = q.get("solution")
+    if not validate or not solution:
+        return q["slug"], test_cases, []
+
+    dialect = q.get("dialect", "sqlite")
+    failures = []
+    for index, tc in enumerate(test_cases, start=1):
+        if tc["expected_state"] is not None:
+            execution = execute_dml_safely(
+                tc["setup_sql"], solution, tc["expected_state"], delta_sql=tc["delta_sql"], dialect=dialect
+            )
+        else:
+            execution = execute_sql_safely(
+                tc["setup_sql"], solution, tc["expected_output"], delta_sql=tc["delta_sql"], dialect=dialect
+            )
+        if "error" in execution:
+            failures.append(f"test case {index}: {execution['error']}")
+        elif not execution["passed"]:
+            failures.append(f"test case {index}: solution output does not match expected_output")
+    return q["slug"], test_cases, failures
+
+
+def question_values(q: dict, digest: str) -> dict:
+    return {
+        "title": q["title"],
+        "slug": q["slug"],
+        "description": q["description"],
+        "difficulty": q["difficulty"],
+        "topics": q.get("topics", []),
+        "companies": q.get("companies", []),
+        "schema": q.get("schema"),
+        "examples": q.get("examples", []),
+        "hints": q.get("hints", []),
+        "solution": q.get("solution"),
+        "dialect": q.get("dialect", "sqlite"),
+        "is_active": True,
+        "content_hash": digest,
+    }
+
+
+def check_unique_slugs(batch: List[dict], seen: Optional[Set[str]] = None) -> None:
+    """
+    Fail on a slug given twice, in the batch or in an earlier one
+
+    A single upsert cannot touch the same row twice (PostgreSQL rejects it
+    with "ON CONFLICT DO UPDATE command cannot affect row a second time"),
+    and across batches the later copy would silently win.
+
+    Raises:
+        SeedValidationError: Naming every duplicated slug
+    """
+    seen = set(seen or ())
+    duplicates = []
+    for q in batch:
+        if q["slug"] in seen and q["slug"] not in duplicates:
+            duplicates.append(q["slug"])
+        seen.add(q["slug"])
+    if duplicates:
+        raise SeedValidationError(f"Duplicate question slug(s): {', '.join(duplicates)}")
+
+
+def upsert_statement(db: Session, rows: List[dict]):
+    """INSERT ... ON CONFLICT (slug) DO UPDATE for the session's dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise RuntimeError(f"Upsert is not supported for the {dialect} dialect")
+
+    stmt = dialect_insert(Question).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Question.slug],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "slug"}
+    ).returning(Question.id, Question.slug)
+
+
+def seed_batch(
+    db: Session,
+    batch: List[dict],
+    pool: ProcessPoolExecutor,
+    library: Optional[Dict[str, str]] = None
+) -> Tuple[int, int]:
+    """
+    Upsert the changed questions of one batch
+
+    Returns:
+        (number of questions written, number skipped as unchanged)
+    """
+    check_unique_slugs(batch)
+    hashes = {q["slug"]: content_hash(q, library) for q in batch}
+    existing = dict(
+        db.execute(
+            select(Question.slug, Question.content_hash).where(Question.slug.in_(list(hashes)))
+        ).all()
+    )
+    changed = [q for q in batch if existing.get(q["slug"]) != hashes[q["slug"]]]
+    if not changed:
+        return 0, len(batch)
+
+    if pool is not None:
+        prepared = list(pool.map(partial(prepare_question, library=library), changed))
+    else:
+        prepared = [prepare_question(q, validate=False, library=library) for q in changed]
+    resolved = {slug: test_cases for slug, test_cases, _ in prepared}
+    failures = {slug: errors for slug, _, errors in prepared if errors}
+    if failures:
+        details = "\n".join(
+            f"  {slug}: {error}" for slug, errors in failures.items() for error in errors
+        )
+        raise SeedValidationError(f"{len(failures)} question(s) failed validation:\n{details}")
+
+    ids = dict(
+        (slug, question_id)
+        for question_id, slug in db.execute(
+            upsert_statement(db, [question_values(q, hashes[q["slug"]]) for q in changed])
+        ).all()
+    )
+
+    # Test cases of changed questions are replaced wholesale
+    db.execute(delete(TestCase).where(TestCase.question_id.in_(list(ids.values()))))
+    datasets = dataset_ids(db, [tc["setup_sql"] for test_cases in resolved.values() for tc in test_cases])
+    test_cases = [
+        {
+            "question_id": ids[q["slug"]],
+            "dataset_id": datasets[fixture_key(tc["setup_sql"])],
+            "setup_sql": None,
+            "delta_sql": tc["delta_sql"],
+            "expected_output": tc["expected_output"],
+            "expected_state": tc["expected_state"],
+        }
+        for q in changed
+        for tc in resolved[q["slug"]]
+    ]
+    if test_cases:
+        db.execute(insert(TestCase), test_cases)
+
+    return len(changed), len(batch) - len(changed)
+
+
+def seed_questions(
+    json_path: str = DEFAULT_BANK,
+    datasets_path: Optional[str] = DEFAULT_DATASETS,
+    batch_size: int = 500,
+    workers: int = None,
+    validate: bool = True,
+    prune: bool = False,
+    bundle: bool = True
+) -> Dict[str, int]:
     """Seed questions and test cases into the database"""
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    
+    # Make sure the schema is migrated
+    upgrade_to_head()
+
     # Create database session
     db: Session = SessionLocal()
-    
+    pool = ProcessPoolExecutor(max_workers=workers) if validate else None
+
     try:
-         # 🔥 Clear old data
-        db.query(TestCase).delete()
-        db.query(Question).delete()
-        db.commit()
+        written = skipped = 0
+        seen_slugs = set()
 
-        # Load questions data
-        questions_data = load_questions_data()
-        
-        print(f"📚 Loading {len(questions_data)} questions...")
-        
-        for q in questions_data:
-            # Check if question already exists
-            existing = db.query(Question).filter_by(slug=q["slug"]).first()
-            
-            if existing:
-                print(f"⚠️  Skipping existing question: {q['slug']}")
-                continue
-            
-            # Create question
-            question = Question(
-                title=q["title"],
-                slug=q["slug"],
-                description=q["description"],
-                difficulty=q["difficulty"],
-                topics=q.get("topics", []),
-                companies=q.get("companies", []),
-                schema=q.get("schema"),          # ✅ ADD THIS
-                examples=q.get("examples", []),  # ✅ ADD THIS
-                hints=q.get("hints", []),        # ✅ ADD THIS
-                solution=q.get("solution"),      # ✅ ADD THIS
-                is_active=True
-            )
-            
-            db.add(question)
-            db.flush()
-            
-            print(f"✅ Added question: {q['title']}")
-            
-            # Create test cases
-            for tc in q["test_cases"]:
-                test_case = TestCase(
-                    question_id=question.id,
-                    setup_sql=tc["setup_sql"],
-                    expected_output=tc["expected_output"]
+        library = load_dataset_library(db, datasets_path)
+        print(f"🗃️  {len(library)} named datasets")
+
+        print(f"📚 Streaming questions from {json_path}...")
+
+        for batch in batched(iter_questions(json_path), batch_size):
+            check_unique_slugs(batch, seen_slugs)
+            seen_slugs.update(q["slug"] for q in batch)
+            batch_written, batch_skipped = seed_batch(db, batch, pool, library)
+            written += batch_written
+            skipped += batch_skipped
+            print(f"✅ {written} written, {skipped} unchanged")
+
+        deactivated = 0
+        if prune:
+            deactivated = db.execute(
+                update(Question)
+                .where(Question.slug.not_in(seen_slugs), Question.is_active == True)
+                .values(is_active=False)
+            ).rowcount
+            # Anonymous datasets no test case uses any more
+            db.execute(
+                delete(Dataset).where(
+                    Dataset.name.like(f"{INLINE_PREFIX}%"),
+                    ~exists().where(TestCase.dataset_id == Dataset.id),
                 )
-                db.add(test_case)
-            
-            print(f"   └─ Added {len(q['test_cases'])} test case(s)")
-        
+            )
+
         # Commit all changes
         db.commit()
-        print(f"\n🎉 Successfully seeded {len(questions_data)} questions!")
-        
+        print(
+            f"\n🎉 Seeded {len(seen_slugs)} questions: {written} written, "
+            f"{skipped} unchanged, {deactivated} deactivated"
+        )
+
+        if bundle and written and settings.FIXTURE_BUNDLE_PATH:
+            try:
+                result = build_from_database(db, settings.FIXTURE_BUNDLE_PATH, workers=workers)
+                print(
+                    f"📦 Fixture bundle: {result['built']} built, {result['reused']} reused, "
+                    f"{result['removed']} removed"
+                )
+            except Exception as e:
+                # The questions are committed; workers fall back to building fixtures
+                print(f"⚠️  Fixture bundle rebuild failed: {e}")
+
+        return {"written": written, "unchanged": skipped, "deactivated": deactivated}
+
     except Exception as e:
         db.rollback()
         print(f"\n❌ Error seeding questions: {str(e)}")
         raise
     finally:
+        if pool is not None:
+            pool.shutdown()
         db.close()
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally seed the question bank")
+    parser.add_argument("path", nargs="?", default=DEFAULT_BANK, help="JSON array of questions")
+    parser.add_argument("--datasets", default=DEFAULT_DATASETS, help="JSON array of named datasets")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="Validation processes (default: CPU count)")
+    parser.add_argument("--no-validate", action="store_true", help="Skip running solutions against test cases")
+    parser.add_argument("--prune", action="store_true", help="Deactivate questions missing from the bank")
+    parser.add_argument("--no-bundle", action="store_true", help="Do not rebuild the fixture bundle")
+    args = parser.parse_args()
+
+    seed_questions(
+        args.path,
+        datasets_path=args.datasets,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        validate=not args.no_validate,
+        prune=args.prune,
+        bundle=not args.no_bundle
+    )
+
+
 if __name__ == "__main__":
-    seed_questions()
\ No newline at end of file
+    main()
@@ -1,4 +1,5 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Dict, Optional
@@ -6,6 +7,7 @@ from src.auth.jwt_verifier import get_jwt_verifier, CognitoJWTVerifier
 from src.db.database import get_db
 from src.auth.user_service import UserService
 from src.models.user import User
+from src.config import settings
 
 # Security scheme for Swagger UI
 security = HTTPBearer()
@@ -102,3 +104,18 @@ def require_verified_email(user: Dict = Depends(get_current_user)) -> Dict:
             detail="Email verification required"
         )
     return user
+
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Guard for operational endpoints.
+    Requires the X-Admin-Key header to match ADMIN_API_KEY; admin endpoints
+    are hidden entirely while no key is configured.
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
@@ -1,10 +1,10 @@
-import requests
 from jose import jwt, jwk, JWTError
 from jose.utils import base64url_decode
 from typing import Dict, Optional
 from functools import lru_cache
 from fastapi import HTTPException, status
 from src.config import settings
+from src.utils.tracing import trace_phase
 import time
 
 # JWT settings for local tokens (matches auth_router.py)
@@ -28,7 +28,8 @@ class CognitoJWTVerifier:
         if self._jwks_cache and (current_time - self._cache_timestamp) < self._cache_ttl:
             return self._jwks_cache
         
-        # Fetch fresh JWKS
+        # Fetch fresh JWKS (requests is imported lazily to keep startup fast)
+        import requests
         try:
             response = requests.get(self.jwks_url, timeout=10)
             response.raise_for_status()
@@ -82,6 +83,32 @@ class CognitoJWTVerifier:
         Raises:
             HTTPException: If token is invalid
         """
+        with trace_phase("auth"):
+            return self._verify_token(token)
+
+    def verified_subject(self, token: str) -> Optional[str]:
+        """
+        `sub` of a valid token, or None if it cannot be verified without I/O
+
+        Never fetches JWKS and never raises, so it is safe to call on the
+        event loop (e.g. to key rate limits); Cognito tokens are only
+        recognised once JWKS has been cached.
+        """
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get('sub')
+        except JWTError:
+            pass
+        if not self._jwks_cache:
+            return None
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+            key = next(k for k in self._jwks_cache.get('keys', []) if k.get('kid') == kid)
+            claims = jwt.decode(token, key, algorithms=['RS256'], audience=self.client_id, issuer=self.issuer)
+            return claims.get('sub')
+        except Exception:
+            return None
+
+    def _verify_token(self, token: str) -> Dict:
         try:
             # First, try to decode as a local JWT token (HS256)
             try:
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -31,6 +31,123 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a pooled connection
+    DB_ECHO: bool = False
+    
+    # Read Replicas (reads use the primary while empty)
+    DATABASE_READ_URLS: List[str] = []
+    DB_READ_STRATEGY: str = "round_robin"  # round_robin | least_connections
+    DB_REPLICA_RETRY_SECONDS: int = 30  # how long an unhealthy replica is skipped
+    DB_READ_YOUR_WRITES_SECONDS: int = 0  # pin a client's reads to the primary after it writes
+    
+    # Database Instrumentation
+    DB_SLOW_QUERY_MS: int = 200
+    DB_SLOW_QUERY_LOG_PARAMS: bool = False  # parameters are redacted unless enabled
+    DB_QUERY_STATS_HEADERS: bool = False  # expose X-DB-* headers on every response
+    
+    # Logging & Request Tracing
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    TRACING_ENABLED: bool = True
+    TRACE_SERVER_TIMING_HEADER: bool = True  # phase breakdown in a Server-Timing response header
+    TRACE_SLOW_REQUEST_MS: int = 500  # slower requests are always logged
+    TRACE_SAMPLE_RATE: float = 0.01  # fraction of other requests logged
+    
+    # Metrics (GET /metrics)
+    METRICS_ENABLED: bool = True
+    PROMETHEUS_MULTIPROC_DIR: str = ""  # required with --workers > 1; must be emptied before the server starts
+    METRICS_PER_QUESTION: bool = True  # grading latency histogram per question rather than one overall
+    METRICS_SAMPLE_SECONDS: float = 5.0  # threadpool and DB pool gauges refresh interval
+    
+    # Profiling (admin only; nothing is installed while disabled)
+    PROFILING_ENABLED: bool = False  # on-demand profiles of single requests; needs ADMIN_API_KEY
+    PROFILE_DIR: str = "build/profiles"
+    PROFILE_MAX_STORED: int = 200  # oldest profiles are deleted beyond this
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILE_TOP_N: int = 30  # functions and allocation sites kept in a profile summary
+    PROFILE_CONTINUOUS_HZ: float = 0.0  # low-rate sampling of every busy thread per worker; 0 disables
+    
+    # Warm-up & Caching
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: int = 30  # /api/ready reports ready after this even if warm-up is still running
+    WARMUP_DB_CONNECTIONS: int = 5
+    WARMUP_POPULAR_QUESTIONS: int = 20
+    QUESTION_CATALOG_TTL_SECONDS: int = 60
+    FIXTURE_CACHE_SIZE: int = 256  # serialized fixture databases kept per worker
+    FIXTURE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # and their total size; larger images are rebuilt each time
+    FIXTURE_BUNDLE_PATH: str = "build/fixtures.bundle"  # prebuilt fixtures; ignored if missing
+    FIXTURE_BUNDLE_CHECK_SECONDS: int = 30  # how often workers look for a rebuilt bundle
+    SHARED_FIXTURE_DIR: str = "/dev/shm/sqltown-fixtures"  # fixtures shared by all workers; empty disables
+    SHARED_FIXTURE_MAX_BYTES: int = 1024 * 1024 * 1024
+    FIXTURE_SCRATCH_CONNECTIONS: int = 32  # idle writable fixtures kept per worker for DML grading
+    
+    # Rate Limiting (token buckets per JWT sub, or per client IP without a valid token)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {  # "METHOD /exact/path": "<requests>/<second|minute|hour|day>"
+        "POST /api/sql/execute": "60/minute",
+        "POST /api/auth/login": "10/minute",
+        "POST /api/auth/signup": "5/minute",
+        "POST /api/sql/bulk": "10/hour",
+    }
+    RATE_LIMIT_REDIS_URL: str = ""  # e.g. redis://localhost:6379/0 to share buckets across workers; per worker while empty
+    RATE_LIMIT_MAX_KEYS: int = 100000  # in-process buckets per route; least recently seen are evicted
+    
+    # Admission Control (per worker; grading only, other endpoints are always admitted)
+    ADMISSION_CAPACITY_SECONDS: float = 8.0  # estimated grading seconds in flight; 0 disables
+    ADMISSION_MAX_QUEUE: int = 64  # submissions waiting for capacity before new ones are rejected
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0  # queued submissions are rejected after this
+    ADMISSION_DEFAULT_COST_SECONDS: float = 0.05  # estimate for questions not graded yet
+    ADMISSION_MAX_RETRY_AFTER_SECONDS: int = 30
+    
+    # Submission Capture (opt-in; anonymized grading records for offline replay)
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_DIR: str = "build/captures"
+    CAPTURE_SAMPLE_RATE: float = 1.0  # fraction of graded submissions captured
+    CAPTURE_MAX_FILE_BYTES: int = 64 * 1024 * 1024  # a new file is started beyond this
+    CAPTURE_MAX_FILES: int = 50  # oldest files in CAPTURE_DIR are deleted beyond this
+    CAPTURE_QUEUE_SIZE: int = 10000  # records are dropped rather than delaying grading when the writer falls behind
+    CAPTURE_MAX_SQL_CHARS: int = 100000  # longer submissions are not captured
+    CAPTURE_REDACT_LITERALS: bool = False  # replace string literals with '?' (their replays may then drift)
+    
+    # Contests (fair-share grading queue per worker: deficit round robin across users)
+    CONTEST_GRADING_SLOTS: int = 4  # contest submissions graded at once
+    CONTEST_DRR_QUANTUM_SECONDS: float = 0.05  # estimated grading seconds credited to each user per round (> 0)
+    CONTEST_MAX_INFLIGHT_PER_USER: int = 1  # a user's submissions graded at once
+    CONTEST_MAX_QUEUED_PER_USER: int = 5  # further submissions are rejected with 429
+    CONTEST_RESUBMIT_PROMOTE_SECONDS: float = 30.0  # resubmissions queued this long compete with first submissions
+    CONTEST_POSITION_UPDATE_SECONDS: float = 0.5  # how often queue positions are recomputed and pushed
+    CONTEST_HEARTBEAT_SECONDS: float = 15.0  # idle event streams get a comment line this often
+
+    # Remote Executors (grading runs in process while EXECUTOR_URLS is empty)
+    EXECUTOR_URLS: List[str] = []  # e.g. ["http://10.0.1.5:9101", "http://10.0.1.6:9101"]
+    EXECUTOR_API_KEY: str = ""  # shared X-Executor-Key between API nodes and executors; while empty, executors serve loopback only
+    EXECUTOR_TIMEOUT_SECONDS: float = 30.0  # per attempt; keep above SQL_TIMEOUT_SECONDS times the test cases
+    EXECUTOR_RETRIES: int = 2  # further attempts on other executors after a connection error, 503 or 5xx
+    EXECUTOR_HEALTH_INTERVAL_SECONDS: float = 2.0
+    EXECUTOR_FALLBACK_LOCAL: bool = True  # grade in process when no executor is reachable; 503 otherwise
+    # Executor processes (executor_main.py)
+    EXECUTOR_SLOTS: int = 4  # submissions graded at once
+    EXECUTOR_MAX_PENDING: int = 16  # submissions waiting for a slot before the executor answers 503
+    EXECUTOR_SCRIPT_CACHE_SIZE: int = 512  # setup scripts held by key
+
+    # Bulk Grading (POST /api/sql/bulk)
+    BULK_PROCESSES: int = 0  # grading processes per API worker; 0 uses every core but one, the most allowed
+    BULK_CHUNK_SIZE: int = 64  # answers to one question sent to a process at a time
+    BULK_MAX_ITEMS: int = 20000  # per request
+    BULK_MAX_UPLOAD_BYTES: int = 32 * 1024 * 1024
+    BULK_MAX_SQL_CHARS: int = 100000  # longer answers are reported as errors
+
+    # SQL Execution
+    SQL_TIMEOUT_SECONDS: float = 10.0  # per statement, on every backend; per submission for data-modifying SQL
+    SQL_MAX_RESULT_ROWS: int = 100000  # larger results are rejected rather than compared
+    DUCKDB_FIXTURE_DIR: str = "build/duckdb-fixtures"  # DuckDB copies of fixtures, built on first use
+    DUCKDB_THREADS: int = 2  # per query
+    DUCKDB_MEMORY_LIMIT: str = "1GB"  # per worker
+    
+    # Admin Configuration (admin endpoints are disabled while empty)
+    ADMIN_API_KEY: str = ""
     
     # CORS Configuration
     CORS_ORIGINS: List[str] = ["http://localhost:5173"]
@@ -39,6 +156,21 @@ class Settings(BaseSettings):
     CORS_ALLOW_HEADERS: List[str] = ["*"]    # S3 Upload Configuration
     S3_PRESIGNED_URL_EXPIRATION: int = 300  # 5 minutes in seconds
     S3_UPLOAD_PREFIX: str = "resumes"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO or a moto server
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024  # bytes per part (S3 minimum is 5 MiB)
+    S3_MULTIPART_CONCURRENCY: int = 4  # parts uploaded in parallel per upload
+    S3_EXECUTOR_WORKERS: int = 8  # blocking S3 calls run concurrently per worker
+    S3_MAX_POOL_CONNECTIONS: int = 48  # >= S3_EXECUTOR_WORKERS * (1 + S3_MULTIPART_CONCURRENCY)
+    S3_CONNECT_TIMEOUT: int = 5  # seconds
+    S3_READ_TIMEOUT: int = 30  # seconds
+    S3_MAX_ATTEMPTS: int = 3  # including the first attempt
+    S3_RETRY_MODE: str = "standard"  # legacy | standard | adaptive
+    DATASET_INDEX_TTL_SECONDS: int = 300  # dataset listing is rebuilt from S3 after this
+    DATASET_MANIFEST_KEY: str = "manifests/datasets.json"
+    DATASET_COMPILE_TIMEOUT_SECONDS: int = 60  # max time to execute an uploaded dump
+    DATASET_COMPILE_WORKERS: int = 2  # uploads hashed and compiled at once per worker, apart from S3 calls
+    DATASET_MAX_IMAGE_BYTES: int = 512 * 1024 * 1024  # max size of a compiled dataset
+    DATASET_CACHE_DIR: str = ""  # local copies of compiled datasets (default: system temp dir)
 
 
 settings = Settings()
@@ -1,4 +1,7 @@
 from .upload_controller import router as upload_router
 from .health_controller import router as health_router
+from .admin_controller import router as admin_router
+from .metrics_controller import router as metrics_router
+from .contest_controller import router as contest_router
 
-__all__ = ["upload_router", "health_router"]
+__all__ = ["upload_router", "health_router", "admin_router", "metrics_router", "contest_router"]
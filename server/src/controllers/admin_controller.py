@@ -0,0 +1,213 @@
+import os
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.auth.dependencies import require_admin
+from src.config import settings
+from src.controllers.contest_controller import contest_response
+from src.db.database import get_db
+from src.db.instrumentation import pool_telemetry
+from src.models.contest import Contest, ContestQuestion
+from src.models.question import Question
+from src.schemas import ContestCreateRequest, ContestResponse, ProfileTokenRequest, ProfileTokenResponse
+from src.services.contest_scheduler import contest_scheduler
+from src.services.executor_pool import executor_pool
+from src.utils.profiling import ProfilingError, continuous_profiler, profile_store, sign_profile_request
+from src.utils.startup import startup_profiler
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/db/pool")
+async def get_pool_telemetry():
+    """
+    Connection pool gauges
+
+    Returns checked-out connections, overflow, threads waiting for a
+    connection and invalidation counts for every instrumented engine.
+    Requires the X-Admin-Key header.
+    """
+    return {"pools": pool_telemetry()}
+
+
+@router.get("/startup")
+async def get_startup_report():
+    """
+    Startup timing report for this worker
+
+    Import/initialisation time per subsystem and time-to-first-request.
+    Requires the X-Admin-Key header.
+    """
+    return startup_profiler.report()
+
+
+@router.post("/profiles/token", response_model=ProfileTokenResponse)
+async def create_profile_token(request: ProfileTokenRequest):
+    """
+    Signed token for profiling requests to one method and path
+
+    Send it as the X-Profile header (or __profile query parameter) of the
+    request to profile, optionally with X-Profile-Mode: sample | cprofile.
+    Requires the X-Admin-Key header and PROFILING_ENABLED.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    expires_at = int(time.time()) + request.ttl_seconds
+    token = sign_profile_request(settings.ADMIN_API_KEY, request.method, request.path, expires_at)
+    return ProfileTokenResponse(token=token, expires_at=expires_at)
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    Stored on-demand profiles on this host, newest first
+
+    Requires the X-Admin-Key header.
+    """
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/continuous")
+async def get_continuous_profile(top: int = Query(30, ge=1, le=500)):
+    """
+    Hot functions from continuous sampling in this worker
+
+    Requires the X-Admin-Key header and PROFILE_CONTINUOUS_HZ > 0.
+    """
+    return continuous_profiler.report(top)
+
+
+@router.get("/profiles/continuous/speedscope")
+async def get_continuous_speedscope():
+    """
+    This worker's aggregated samples as a speedscope file
+
+    Requires the X-Admin-Key header.
+    """
+    document = continuous_profiler.speedscope()
+    if document is None:
+        raise HTTPException(status_code=404, detail="Continuous profiling is not running")
+    return document
+
+
+@router.delete("/profiles/continuous")
+async def reset_continuous_profile():
+    """
+    Discard this worker's aggregated samples
+
+    Requires the X-Admin-Key header.
+    """
+    continuous_profiler.reset()
+    return {"reset": continuous_profiler.running}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """
+    Summary of a stored profile: duration, hot functions, cProfile
+    statistics and top allocation sites
+
+    Requires the X-Admin-Key header.
+    """
+    try:
+        summary = profile_store.get(profile_id)
+    except ProfilingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """
+    The profile's speedscope file (sample mode) or pstats file (cprofile mode)
+
+    Requires the X-Admin-Key header.
+    """
+    try:
+        summary = profile_store.get(profile_id)
+    except ProfilingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if summary is None or not summary.get("files"):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    suffix = "speedscope.json" if "speedscope.json" in summary["files"] else summary["files"][0]
+    path = profile_store.path(profile_id, suffix)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile file not found")
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+@router.post("/contests", response_model=ContestResponse, status_code=201)
+def create_contest(request: ContestCreateRequest, db: Session = Depends(get_db)):
+    """
+    Define a contest: its submission window and question set
+
+    Requires the X-Admin-Key header.
+    """
+    found = {
+        question_id for (question_id,) in
+        db.query(Question.id).filter(Question.id.in_(request.question_ids)).all()
+    }
+    missing = [question_id for question_id in request.question_ids if question_id not in found]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Unknown question IDs: {missing}")
+
+    contest = Contest(
+        slug=request.slug,
+        title=request.title,
+        description=request.description,
+        starts_at=request.starts_at,
+        ends_at=request.ends_at,
+        questions=[
+            ContestQuestion(question_id=question_id, position=position)
+            for position, question_id in enumerate(request.question_ids)
+        ],
+    )
+    db.add(contest)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A contest with this slug already exists")
+    db.refresh(contest)
+    return contest_response(contest)
+
+
+@router.delete("/contests/{slug}", status_code=204)
+def delete_contest(slug: str, db: Session = Depends(get_db)):
+    """
+    Delete a contest and its submissions
+
+    Requires the X-Admin-Key header.
+    """
+    contest = db.query(Contest).filter(Contest.slug == slug).first()
+    if contest is None:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    db.delete(contest)
+    db.commit()
+
+
+@router.get("/contests/scheduler")
+async def get_contest_scheduler():
+    """
+    This worker's contest queue: submissions queued per tier and running
+
+    Requires the X-Admin-Key header.
+    """
+    return contest_scheduler.report()
+
+
+@router.get("/executors")
+async def get_executors():
+    """
+    Remote grading executors as this worker sees them: health, slots, load
+    and fixtures held
+
+    Requires the X-Admin-Key header.
+    """
+    return executor_pool.report()
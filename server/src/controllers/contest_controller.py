@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.auth.dependencies import get_current_user
+from src.config import settings
+from src.db.database import SessionLocal, get_read_db
+from src.models.contest import Contest, ContestQuestion, ContestSubmission
+from src.schemas.contest import ContestResponse, ContestSubmitRequest
+from src.services.contest_scheduler import ContestJob, contest_scheduler
+
+router = APIRouter(prefix="/api/contests", tags=["Contests"])
+
+logger = logging.getLogger("sqltown.contests")
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they were stored as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def contest_status(contest: Contest, now: Optional[datetime] = None) -> str:
+    """upcoming | running | ended"""
+    now = now or datetime.now(timezone.utc)
+    if now < _utc(contest.starts_at):
+        return "upcoming"
+    if now >= _utc(contest.ends_at):
+        return "ended"
+    return "running"
+
+
+def contest_response(contest: Contest) -> ContestResponse:
+    state = contest_status(contest)
+    return ContestResponse(
+        slug=contest.slug,
+        title=contest.title,
+        description=contest.description,
+        starts_at=_utc(contest.starts_at),
+        ends_at=_utc(contest.ends_at),
+        status=state,
+        # The question set is revealed when the contest starts
+        question_ids=[] if state == "upcoming" else [entry.question_id for entry in contest.questions],
+    )
+
+
+def _open_submission(slug: str, question_id: int, user_id: str) -> Tuple[int, bool]:
+    """
+    (contest ID, whether this is the user's first submission to the question)
+
+    Raises:
+        HTTPException: 404 for an unknown contest or a question outside its
+            set, 403 outside the contest window
+    """
+    db = SessionLocal()
+    try:
+        contest = db.query(Contest).filter(Contest.slug == slug).first()
+        if contest is None:
+            raise HTTPException(status_code=404, detail="Contest not found")
+        state = contest_status(contest)
+        if state != "running":
+            raise HTTPException(
+                status_code=403,
+                detail="Contest has not started" if state == "upcoming" else "Contest has ended"
+            )
+        in_contest = db.query(exists().where(
+            ContestQuestion.contest_id == contest.id,
+            ContestQuestion.question_id == question_id
+        )).scalar()
+        if not in_contest:
+            raise HTTPException(status_code=404, detail="Question is not part of this contest")
+        submitted = db.query(exists().where(
+            ContestSubmission.contest_id == contest.id,
+            ContestSubmission.user_id == user_id,
+            ContestSubmission.question_id == question_id
+        )).scalar()
+        return contest.id, not submitted
+    finally:
+        db.close()
+
+
+def _event(name: str, data: Dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream(job: ContestJob):
+    try:
+        while True:
+            try:
+                name, data = await asyncio.wait_for(job.updates.get(), settings.CONTEST_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield _event(name, data)
+            if name in ("result", "error"):
+                return
+    finally:
+        # Client went away while still queued: give the slot to someone else
+        contest_scheduler.cancel(job)
+
+
+@router.get("", response_model=List[ContestResponse])
+def list_contests(db: Session = Depends(get_read_db)):
+    """All contests, most recent first"""
+    contests = db.query(Contest).order_by(Contest.starts_at.desc()).all()
+    return [contest_response(contest) for contest in contests]
+
+
+@router.get("/{slug}", response_model=ContestResponse)
+def get_contest(slug: str, db: Session = Depends(get_read_db)):
+    """A contest and, once it has started, its question set"""
+    contest = db.query(Contest).filter(Contest.slug == slug).first()
+    if contest is None:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    return contest_response(contest)
+
+
+@router.post("/{slug}/submissions")
+async def submit(
+    slug: str,
+    payload: ContestSubmitRequest,
+    user: Dict = Depends(get_current_user),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Grade a submission through the contest's fair-share queue
+
+    With `Accept: text/event-stream` the response is a stream of events:
+    `queued` (position and estimated wait, again whenever they change),
+    `running`, then `result` with the grading body (or `error`).
+    Otherwise the request waits and returns the grading body.
+
+    Returns 429 when the user already has CONTEST_MAX_QUEUED_PER_USER
+    submissions waiting.
+    """
+    user_id = user["sub"]
+    contest_id, first = await run_in_threadpool(_open_submission, slug, payload.question_id, user_id)
+
+    streaming = "text/event-stream" in (accept or "")
+    job = contest_scheduler.submit(contest_id, user_id, payload.question_id, payload.sql, first, listen=streaming)
+
+    if streaming:
+        return StreamingResponse(
+            _stream(job),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    try:
+        result = await job.future
+    except asyncio.CancelledError:
+        contest_scheduler.cancel(job)
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Grading failed")
+    return {"submission_id": job.id, "tier": job.tier, **result}
@@ -1,6 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
-from src.schemas import HealthResponse
+from src.core.admission import admission_controller
+from src.core.warmup import warmup_state
+from src.schemas import HealthResponse, ReadinessResponse
 
 router = APIRouter(prefix="/api", tags=["Health"])
 
@@ -17,3 +20,29 @@ async def health_check():
         status="ok",
         message="Server is running"
     )
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse, "description": "Worker is warming up or saturated"}}
+)
+async def readiness_check():
+    """
+    Readiness check endpoint
+
+    Returns 503 until this worker has finished warming up (DB pool, JWKS,
+    question catalog, popular fixtures) or the warm-up timeout has passed,
+    and while its grading capacity is exhausted (submissions queued), so
+    the load balancer drains saturated workers.
+    Point load balancer readiness probes here and liveness probes at /health.
+    """
+    warm = warmup_state.is_ready()
+    saturated = admission_controller.saturated()
+    ready = warm and not saturated
+    body = ReadinessResponse(
+        status="ready" if ready else "warming_up" if not warm else "saturated",
+        warmup=warmup_state.report(),
+        admission=admission_controller.report()
+    )
+    return JSONResponse(status_code=200 if ready else 503, content=body.model_dump())
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from src.config import settings
+from src.core.metrics import render
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus scrape endpoint
+
+    Aggregated over all workers when PROMETHEUS_MULTIPROC_DIR is set,
+    otherwise this worker's metrics only.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
@@ -1,46 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
-from src.db.database import get_db
-from src.models.question import Question
+from src.db.database import get_read_db
 from src.schemas.question import QuestionResponse
-from sqlalchemy.orm import joinedload
+from src.services.question_catalog import question_catalog
 
 router = APIRouter(prefix="/api/questions", tags=["Questions"])
 
+logger = logging.getLogger("sqltown.questions")
+
 
 @router.get("/", response_model=List[QuestionResponse])
-def get_questions(db: Session = Depends(get_db)):
-    """Get all questions"""
+def get_questions(db: Session = Depends(get_read_db)):
+    """Get all questions (served from the pre-serialized catalog)"""
     try:
-        questions = db.query(Question).filter(Question.is_active == True).all()
-        return questions
+        return Response(content=question_catalog.list_body(db), media_type="application/json")
     except Exception as e:
-        print(f"Error fetching questions: {e}")
+        logger.exception("Error fetching questions")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-def get_question(question_id: int, db: Session = Depends(get_db)):
+def get_question(question_id: int, db: Session = Depends(get_read_db)):
     """Get a single question by ID"""
     try:
-        question = (
-            db.query(Question)
-            .options(joinedload(Question.test_cases))  # 🔥 ADD THIS
-            .filter(
-                Question.id == question_id,
-                Question.is_active == True
-            )
-            .first()
-        )
-        
-        if not question:
+        body = question_catalog.question_body(db, question_id)
+
+        if body is None:
             raise HTTPException(status_code=404, detail="Question not found")
-        
-        return question
+
+        return Response(content=body, media_type="application/json")
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error fetching question {question_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception("Error fetching question %s", question_id)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,21 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from botocore.exceptions import ClientError
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from botocore.exceptions import BotoCoreError, ClientError
+import logging
 import os
 from pathlib import Path
 import shutil
 import re
+from typing import Optional
 
 from src.schemas import UploadURLRequest, UploadURLResponse
 from src.integrations.s3_service import s3_service
+from src.integrations.dataset_index import dataset_index
+from src.services.dataset_compiler import DatasetValidationError, get_metadata, ingest_dataset_async
 
 router = APIRouter(prefix="/api", tags=["Upload"])
 
+logger = logging.getLogger("sqltown.uploads")
+
 
 @router.post("/upload-url", response_model=UploadURLResponse)
 async def generate_upload_url(request: UploadURLRequest):
@@ -29,8 +35,10 @@ async def generate_upload_url(request: UploadURLRequest):
                 detail="fileName and fileType are required"
             )
         
-        # Generate presigned URL using S3 service
-        upload_url, file_url = s3_service.generate_presigned_upload_url(
+        # Generate presigned URL using S3 service (off the event loop: signing
+        # may need to fetch credentials)
+        upload_url, file_url = await s3_service.run(
+            s3_service.generate_presigned_upload_url,
             file_name=request.fileName,
             file_type=request.fileType
         )
@@ -40,14 +48,14 @@ async def generate_upload_url(request: UploadURLRequest):
             fileUrl=file_url
         )
         
-    except ClientError as e:
-        print(f"AWS Error: {e}")
+    except (ClientError, BotoCoreError) as e:
+        logger.warning("AWS error generating upload URL: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to generate upload URL due to AWS error"
         )
     except Exception as e:
-        print(f"Error generating upload URL: {e}")
+        logger.exception("Error generating upload URL")
         raise HTTPException(
             status_code=500,
             detail="Failed to generate upload URL"
@@ -59,10 +67,16 @@ async def upload_sql_database(file: UploadFile = File(...)):
     """
     Upload SQL database file to AWS S3
     
-    This endpoint accepts SQL files and saves them to AWS S3
-    for use in the practice environment.
+    This endpoint accepts SQL files, validates them by executing them once in
+    a sandboxed SQLite database and saves both the dump and the compiled
+    database image to AWS S3 for use in the practice environment.
     
     - **file**: SQL file to upload (.sql extension required)
+    
+    Uploads are identified by their SHA-256; uploading the same content again
+    returns the existing dataset without storing anything. Large files are
+    sent as a parallel S3 multipart upload with per-part checksums; memory use
+    stays constant regardless of file size.
     """
     try:
         # Validate file type
@@ -75,25 +89,31 @@ async def upload_sql_database(file: UploadFile = File(...)):
         # Sanitize filename to prevent issues
         filename = re.sub(r'[^a-zA-Z0-9_\-.]', '_', file.filename)
         
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload to S3
+        # The upload is spooled to disk by the multipart parser; it is hashed,
+        # compiled and streamed to S3 from there without loading it into memory
+        await file.seek(0)
         try:
-            file_url = s3_service.upload_file(
-                file_content=file_content,
-                file_name=filename,
-                content_type='application/sql'
-            )
+            metadata, entry = await ingest_dataset_async(file.file, filename)
+            if entry is not None:
+                # Keep the cached listing current without rescanning the bucket
+                await s3_service.run(dataset_index.add, entry)
             
             return {
                 "success": True,
-                "message": "SQL database uploaded successfully to S3",
+                "message": (
+                    "SQL database uploaded successfully to S3" if entry is not None
+                    else "SQL database already uploaded"
+                ),
                 "filename": filename,
-                "url": file_url
+                "url": metadata["url"],
+                "sha256": metadata["sha256"],
+                "duplicate": entry is None,
+                "dataset": metadata
             }
-        except ClientError as e:
-            print(f"AWS S3 Error: {e}")
+        except DatasetValidationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except (ClientError, BotoCoreError) as e:
+            logger.warning("S3 error uploading SQL database: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="Failed to upload to S3. Please check AWS credentials."
@@ -102,7 +122,7 @@ async def upload_sql_database(file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error uploading SQL database: {e}")
+        logger.exception("Error uploading SQL database")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to upload SQL database: {str(e)}"
@@ -110,30 +130,74 @@ async def upload_sql_database(file: UploadFile = File(...)):
 
 
 @router.get("/list-databases")
-async def list_databases():
+async def list_databases(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None,
+    name: Optional[str] = None
+):
     """
-    List all SQL database files from AWS S3
+    List SQL database files stored in AWS S3
+    
+    Served from a cached index of the bucket, so listing does not hit S3 on
+    every request. Results are ordered by key.
     
-    Returns a list of all available database files stored in S3
-    with their metadata (filename, URL, size, last modified date).
+    - **limit**: Page size (omit to return every remaining entry)
+    - **cursor**: `next_cursor` from the previous page
+    - **prefix**: Only keys under `datasets/<prefix>`
+    - **name**: Case-insensitive substring of the file name
     """
     try:
-        files = s3_service.list_database_files()
+        files, next_cursor, total = await s3_service.run(
+            dataset_index.query, prefix, name, cursor, limit
+        )
         
         return {
             "success": True,
             "databases": files,
-            "count": len(files)
+            "count": len(files),
+            "total": total,
+            "next_cursor": next_cursor
         }
-    except ClientError as e:
-        print(f"AWS S3 Error: {e}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except (ClientError, BotoCoreError) as e:
+        logger.warning("S3 error listing databases: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to list databases from S3"
         )
     except Exception as e:
-        print(f"Error listing databases: {e}")
+        logger.exception("Error listing databases")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to list databases: {str(e)}"
         )
+
+
+@router.get("/datasets/{sha256}")
+async def get_dataset(sha256: str):
+    """
+    Get metadata of an uploaded dataset
+    
+    Returns the schema, row counts and S3 keys of the raw dump and the
+    compiled SQLite image.
+    
+    - **sha256**: SHA-256 of the uploaded dump
+    """
+    try:
+        metadata = await s3_service.run(get_metadata, sha256)
+    except (ClientError, BotoCoreError) as e:
+        logger.warning("S3 error reading dataset metadata: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to read dataset from S3"
+        )
+    
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    return {
+        "success": True,
+        "dataset": metadata
+    }
@@ -0,0 +1,219 @@
+"""
+Admission control for grading
+
+Every submission to /api/sql/execute holds a threadpool thread and a DB
+session while it runs, so a burst of expensive submissions slows every
+request on the worker. Submissions are admitted against a per-worker budget
+of estimated grading seconds instead: each question's cost is an
+exponentially weighted moving average of how long it has taken to grade. While
+the work in flight would exceed ADMISSION_CAPACITY_SECONDS, new submissions
+wait in a bounded FIFO queue for up to ADMISSION_QUEUE_TIMEOUT_SECONDS and
+are otherwise rejected with 503 and a Retry-After estimate. Other endpoints
+(question list, health, auth) are never held back.
+
+The controller lives on the event loop: admission and release happen in an
+async dependency, so no locking is needed. /api/ready reports a saturated
+worker so the load balancer can route around it until it drains.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException, Request, status
+
+from src.config import settings
+from src.core.metrics import ADMISSION_DECISIONS, ADMISSION_INFLIGHT_SECONDS
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: float, future: asyncio.Future):
+        self.cost = cost
+        self.future = future
+
+
+class AdmissionController:
+    """
+    Cost-weighted concurrency limit with a bounded wait queue (per worker)
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        max_queue: int,
+        queue_timeout: float,
+        default_cost: float = 0.05,
+        smoothing: float = 0.2,
+        max_retry_after: int = 30
+    ):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.default_cost = default_cost
+        self.smoothing = smoothing
+        self.max_retry_after = max_retry_after
+        self.inflight = 0
+        self.inflight_cost = 0.0
+        self.costs: Dict[Any, float] = {}  # by question ID
+        self.queue: Deque[_Waiter] = deque()
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def estimate(self, key: Any) -> float:
+        """Expected grading seconds for a question"""
+        return self.costs.get(key, self.default_cost)
+
+    def observe(self, key: Any, seconds: float) -> None:
+        """Fold a measured grading time into the question's estimate"""
+        previous = self.costs.get(key)
+        if previous is None:
+            self.costs[key] = seconds
+        else:
+            self.costs[key] = previous + self.smoothing * (seconds - previous)
+
+    def _fits(self, cost: float) -> bool:
+        # An idle worker always admits, or one very expensive question could never run
+        return self.inflight == 0 or self.inflight_cost + cost <= self.capacity
+
+    def saturated(self) -> bool:
+        """True while submissions are queued or in-flight work fills the budget"""
+        return self.enabled and (bool(self.queue) or self.inflight_cost >= self.capacity)
+
+    def retry_after(self, cost: float) -> int:
+        """
+        Seconds until the queued and in-flight work ahead should have drained
+
+        Each running submission retires about one second of estimated work per
+        second, so the backlog drains at roughly `inflight` seconds per second.
+        """
+        backlog = self.inflight_cost + sum(waiter.cost for waiter in self.queue) + cost - self.capacity
+        seconds = backlog / max(self.inflight, 1)
+        return min(max(math.ceil(seconds), 1), self.max_retry_after)
+
+    def _start(self, cost: float) -> None:
+        self.inflight += 1
+        self.inflight_cost += cost
+        ADMISSION_INFLIGHT_SECONDS.set(self.inflight_cost)
+
+    def _reject(self, cost: float, reason: str) -> HTTPException:
+        self.rejected += 1
+        ADMISSION_DECISIONS.labels("rejected").inc()
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server is busy grading other submissions ({reason}); retry shortly",
+            headers={"Retry-After": str(self.retry_after(cost))}
+        )
+
+    async def acquire(self, cost: float) -> None:
+        """
+        Wait until `cost` seconds of grading fit in the budget
+
+        Raises:
+            HTTPException: 503 with Retry-After when the queue is full or the
+                wait times out
+        """
+        if not self.queue and self._fits(cost):
+            self._start(cost)
+            ADMISSION_DECISIONS.labels("admitted").inc()
+            return
+
+        if len(self.queue) >= self.max_queue:
+            raise self._reject(cost, "queue full")
+
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        self.queue.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Unless it was admitted just as the wait expired
+            if not waiter.future.done():
+                self._abandon(waiter)
+                raise self._reject(cost, "queue timeout")
+        except asyncio.CancelledError:
+            # Client disconnected while queued
+            if waiter.future.done():
+                self.release(cost)
+            else:
+                self._abandon(waiter)
+            raise
+        ADMISSION_DECISIONS.labels("queued").inc()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        self.queue.remove(waiter)
+        # The submissions behind it may fit now
+        self._wake()
+
+    def release(self, cost: float) -> None:
+        """Return a finished submission's cost and admit queued ones that now fit"""
+        self.inflight -= 1
+        self.inflight_cost = max(self.inflight_cost - cost, 0.0) if self.inflight else 0.0
+        ADMISSION_INFLIGHT_SECONDS.set(self.inflight_cost)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Strict FIFO: a cheap submission does not overtake an expensive one at the head
+        while self.queue and self._fits(self.queue[0].cost):
+            waiter = self.queue.popleft()
+            self._start(waiter.cost)
+            waiter.future.set_result(None)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "saturated": self.saturated(),
+            "inflight": self.inflight,
+            "inflight_seconds": round(self.inflight_cost, 3),
+            "capacity_seconds": self.capacity,
+            "queued": len(self.queue),
+            "rejected": self.rejected,
+        }
+
+
+admission_controller = AdmissionController(
+    capacity=settings.ADMISSION_CAPACITY_SECONDS,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    default_cost=settings.ADMISSION_DEFAULT_COST_SECONDS,
+    max_retry_after=settings.ADMISSION_MAX_RETRY_AFTER_SECONDS,
+)
+
+
+async def admit_grading(request: Request) -> AsyncIterator[Optional[float]]:
+    """
+    Dependency that holds an admission slot for the duration of a submission
+
+    Declare it before the DB session dependency so a rejected submission
+    never opens one. Yields the question's estimated cost, or None when
+    admission control is disabled. The measured time updates the estimate
+    only when the submission was graded, so made-up question IDs (rejected
+    by the route) never get an entry of their own.
+    """
+    controller = admission_controller
+    if not controller.enabled:
+        yield None
+        return
+
+    try:
+        # FastAPI has already parsed and cached the body
+        question_id = int((await request.json()).get("question_id"))
+    except (ValueError, TypeError, AttributeError):
+        question_id = None
+
+    cost = controller.estimate(question_id)
+    await controller.acquire(cost)
+    start = time.perf_counter()
+    graded = False
+    try:
+        yield cost
+        graded = True
+    finally:
+        controller.release(cost)
+        if graded and question_id is not None:
+            controller.observe(question_id, time.perf_counter() - start)
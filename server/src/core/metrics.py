@@ -0,0 +1,231 @@
+"""
+Prometheus metrics
+
+All metrics are defined here. With PROMETHEUS_MULTIPROC_DIR set, every
+worker writes its values to mmap-backed files in that directory and /metrics
+aggregates them across workers (counters and histograms are summed, gauges
+summed over live workers). The directory must be emptied before the server
+starts.
+
+Hot-path updates go to label children bound once at import (or cached on
+first use), so recording a value does not take the metric's label lock.
+Per-worker gauges (threadpool, DB pool) are sampled by a background task
+instead of being updated per request.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from src.config import settings
+
+# prometheus_client picks its value store at import time
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess  # noqa: E402
+
+logger = logging.getLogger("sqltown.metrics")
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+GRADING_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "sqltown_http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "sqltown_http_requests_in_progress",
+    "Requests being served",
+    multiprocess_mode="livesum",
+)
+
+GRADING_SUBMISSIONS = Counter(
+    "sqltown_grading_submissions_total",
+    "Graded submissions by verdict",
+    ["verdict", "dialect"],
+)
+GRADING_DURATION = Histogram(
+    "sqltown_grading_duration_seconds",
+    "Time to grade a submission against all of a question's test cases",
+    ["question"],
+    buckets=GRADING_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "sqltown_cache_requests_total",
+    "Cache lookups by cache and result (hit ratio = hit / (hit + miss))",
+    ["cache", "result"],
+)
+
+THREADPOOL_BUSY = Gauge(
+    "sqltown_threadpool_busy_threads",
+    "Threadpool threads running sync endpoints and blocking work",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_SIZE = Gauge(
+    "sqltown_threadpool_threads",
+    "Threadpool capacity",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_QUEUED = Gauge(
+    "sqltown_threadpool_queued_tasks",
+    "Work waiting for a threadpool thread",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "sqltown_db_pool_checked_out_connections",
+    "Connections checked out of the database pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITERS = Gauge(
+    "sqltown_db_pool_waiters",
+    "Threads waiting for a pooled database connection",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_DECISIONS = Counter(
+    "sqltown_admission_decisions_total",
+    "Grading submissions admitted immediately, admitted after queueing, or rejected",
+    ["outcome"],
+)
+ADMISSION_INFLIGHT_SECONDS = Gauge(
+    "sqltown_admission_inflight_seconds",
+    "Estimated grading seconds in flight",
+    multiprocess_mode="livesum",
+)
+
+RATE_LIMITED = Counter(
+    "sqltown_rate_limited_requests_total",
+    "Requests rejected with 429 by route",
+    ["route"],
+)
+
+CAPTURED_SUBMISSIONS = Counter(
+    "sqltown_captured_submissions_total",
+    "Graded submissions written to capture files or dropped",
+    ["outcome"],
+)
+
+CONTEST_QUEUED = Gauge(
+    "sqltown_contest_queued_submissions",
+    "Contest submissions waiting to be graded by tier",
+    ["tier"],
+    multiprocess_mode="livesum",
+)
+CONTEST_QUEUE_WAIT = Histogram(
+    "sqltown_contest_queue_wait_seconds",
+    "Time contest submissions waited before grading by tier",
+    ["tier"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+
+EXECUTOR_REQUESTS = Counter(
+    "sqltown_executor_requests_total",
+    "Submissions graded remotely, timed out on an executor, retried on another executor, graded locally as a fallback, or failed",
+    ["outcome"],
+)
+
+GRADING_VERDICTS = ("pass", "fail", "error", "timeout")
+
+_cache_children: Dict[Tuple[str, str], Counter] = {}
+_request_children: Dict[Tuple[str, str, str], Histogram] = {}
+_grading_children: Dict[str, Histogram] = {}
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    key = (cache, "hit" if hit else "miss")
+    child = _cache_children.get(key)
+    if child is None:
+        child = _cache_children.setdefault(key, CACHE_REQUESTS.labels(*key))
+    child.inc()
+
+
+def record_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, str(status))
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children.setdefault(key, HTTP_REQUEST_DURATION.labels(*key))
+    child.observe(seconds)
+
+
+def record_grading(question_id: Optional[int], dialect: str, verdict: str, seconds: float) -> None:
+    """
+    Count a graded submission
+
+    Args:
+        question_id: A question found in the database, or None; anything else
+            would add a latency series per ID a client makes up
+    """
+    GRADING_SUBMISSIONS.labels(verdict, dialect).inc()
+    if not settings.METRICS_PER_QUESTION:
+        question = "all"
+    elif question_id is None:
+        question = "unknown"
+    else:
+        question = str(question_id)
+    child = _grading_children.get(question)
+    if child is None:
+        child = _grading_children.setdefault(question, GRADING_DURATION.labels(question))
+    child.observe(seconds)
+
+
+def sample_worker_gauges() -> None:
+    """Refresh this worker's threadpool and DB pool gauges (call from the event loop)"""
+    from anyio.to_thread import current_default_thread_limiter
+    from src.db.instrumentation import pool_telemetry
+
+    limiter = current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_BUSY.set(statistics.borrowed_tokens)
+    THREADPOOL_SIZE.set(statistics.total_tokens)
+    THREADPOOL_QUEUED.set(statistics.tasks_waiting)
+    for name, pool in pool_telemetry().items():
+        if "checked_out" in pool:
+            DB_POOL_CHECKED_OUT.labels(name).set(pool["checked_out"])
+            DB_POOL_WAITERS.labels(name).set(pool["waiters"])
+
+
+async def _sample_forever(interval: float) -> None:
+    while True:
+        try:
+            sample_worker_gauges()
+        except Exception as e:
+            logger.warning("Sampling worker gauges failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def start_gauge_sampler() -> Optional[asyncio.Task]:
+    if not settings.METRICS_ENABLED:
+        return None
+    return asyncio.get_running_loop().create_task(_sample_forever(settings.METRICS_SAMPLE_SECONDS))
+
+
+def worker_exited() -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render() -> Tuple[bytes, str]:
+    """Metrics in the Prometheus text format, aggregated over workers when multiprocess"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
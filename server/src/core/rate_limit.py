@@ -0,0 +1,218 @@
+"""
+Rate limiting
+
+Token buckets per route, keyed by the caller's JWT `sub` (or client IP for
+anonymous requests), implemented as GCRA: a bucket of `limit` tokens refilled
+at `limit / period` is fully described by one number, the time at which it
+will be full again (its "theoretical arrival time"). A check is a dict lookup
+and a float comparison.
+
+Two backends:
+
+- in-process (default): buckets live in each worker, so the effective limit
+  is per worker. Timestamps are kept in a flat array of doubles with an
+  OrderedDict mapping keys to slots, least recently used keys being evicted
+  beyond RATE_LIMIT_MAX_KEYS. Checking a known key creates no objects beyond
+  transient floats.
+- Redis (RATE_LIMIT_REDIS_URL): one Lua script call per check using the Redis
+  clock, so limits hold across workers and hosts. Requires the optional
+  `redis` package. If Redis is unreachable the check falls back to the
+  in-process buckets rather than failing requests.
+"""
+import logging
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger("sqltown.rate_limit")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+_RATE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+class RateLimitRule:
+    """
+    A route's limit: `limit` requests per `period` seconds, bursts up to `limit`
+    """
+
+    __slots__ = ("name", "limit", "period", "interval", "tolerance", "policy")
+
+    def __init__(self, name: str, limit: int, period: float):
+        if limit < 1 or period <= 0:
+            raise ValueError(f"Rate limit for {name} must allow at least one request per period")
+        self.name = name
+        self.limit = limit
+        self.period = period
+        # Seconds one request adds to the bucket, and how far ahead of now it may run
+        self.interval = period / limit
+        self.tolerance = self.interval * limit
+        self.policy = f"{limit};w={period:g}"
+
+    def remaining(self, debt: float) -> int:
+        """Requests left after a check that returned `debt`"""
+        return max(int((self.tolerance - debt) / self.interval + 1e-9), 0)
+
+
+def parse_rate(name: str, rate: str) -> RateLimitRule:
+    """
+    Parse "60/minute", "5/second" or "100/10minutes"
+
+    Raises:
+        ValueError: If the rate is malformed
+    """
+    match = _RATE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit {rate!r} for {name} (expected e.g. '60/minute')")
+    limit, multiplier, unit = match.groups()
+    return RateLimitRule(name, int(limit), int(multiplier or 1) * PERIODS[unit])
+
+
+class _Buckets:
+    """
+    One rule's buckets: key -> slot in a flat array of arrival times
+    """
+
+    __slots__ = ("slots", "arrivals", "max_keys")
+
+    def __init__(self, max_keys: int):
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+        self.arrivals = array("d")
+        self.max_keys = max_keys
+
+    def hit(self, key: str, now: float, interval: float, tolerance: float) -> float:
+        slots = self.slots
+        slot = slots.get(key)
+        if slot is None:
+            if len(slots) < self.max_keys:
+                slot = len(self.arrivals)
+                self.arrivals.append(now)
+            else:
+                # Reuse the least recently seen key's slot
+                slot = slots.popitem(last=False)[1]
+            slots[key] = slot
+            arrival = now
+        else:
+            slots.move_to_end(key)
+            arrival = self.arrivals[slot]
+            if arrival < now:
+                arrival = now
+        debt = arrival + interval - now
+        if debt <= tolerance:
+            self.arrivals[slot] = arrival + interval
+        return debt
+
+
+class InProcessLimiter:
+    """
+    Buckets held in this worker
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, _Buckets] = {}
+
+    def buckets(self, rule: RateLimitRule) -> _Buckets:
+        buckets = self._buckets.get(rule.name)
+        if buckets is None:
+            buckets = self._buckets[rule.name] = _Buckets(self.max_keys)
+        return buckets
+
+    def hit(self, rule: RateLimitRule, key: str) -> float:
+        """
+        Take a token from `key`'s bucket
+
+        Returns:
+            Seconds until the bucket is full again; the request is allowed if
+            this is at most `rule.tolerance`, otherwise the bucket is left
+            untouched and the caller may retry in `debt - rule.tolerance`
+        """
+        return self.buckets(rule).hit(key, time.monotonic(), rule.interval, rule.tolerance)
+
+
+# KEYS[1] bucket; ARGV interval and tolerance in microseconds. Returns the debt in microseconds.
+_GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local arrival = tonumber(redis.call('GET', KEYS[1]) or now)
+if arrival < now then
+  arrival = now
+end
+local debt = arrival + interval - now
+if debt <= tolerance then
+  redis.call('SET', KEYS[1], string.format('%d', arrival + interval), 'PX', math.ceil(debt / 1000) + 1)
+end
+return debt
+"""
+
+
+class RedisLimiter:
+    """
+    Buckets shared through Redis, falling back to in-process buckets on errors
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "sqltown:ratelimit:",
+        fallback: Optional[InProcessLimiter] = None,
+        retry_seconds: float = 5.0
+    ):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL requires the redis package (pip install redis)")
+        self.client = aioredis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.script = self.client.register_script(_GCRA_SCRIPT)
+        self.prefix = prefix
+        self.fallback = fallback or InProcessLimiter()
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    async def hit(self, rule: RateLimitRule, key: str) -> float:
+        if self._down_until and time.monotonic() < self._down_until:
+            return self.fallback.hit(rule, key)
+        try:
+            debt = await self.script(
+                keys=[f"{self.prefix}{rule.name}:{key}"],
+                args=[int(rule.interval * 1e6), int(rule.tolerance * 1e6)],
+            )
+        except Exception as e:
+            # Skip Redis for a while, so an outage does not add a timeout to every request
+            self._down_until = time.monotonic() + self.retry_seconds
+            logger.warning("Rate limit backend unavailable, limiting per worker for %ss: %s", self.retry_seconds, e)
+            return self.fallback.hit(rule, key)
+        self._down_until = 0.0
+        return int(debt) / 1e6
+
+
+def load_rules(rates: Dict[str, str]) -> Dict[str, Dict[str, RateLimitRule]]:
+    """
+    Rules from {"METHOD /path": "60/minute"}, indexed by path then method
+
+    Raises:
+        ValueError: If a route or rate is malformed
+    """
+    rules: Dict[str, Dict[str, RateLimitRule]] = {}
+    for route, rate in rates.items():
+        method, _, path = route.strip().partition(" ")
+        method, path = method.upper(), path.strip()
+        if not path.startswith("/"):
+            raise ValueError(f"Invalid rate-limited route {route!r} (expected e.g. 'POST /api/sql/execute')")
+        rules.setdefault(path, {})[method] = parse_rate(f"{method} {path}", rate)
+    return rules
+
+
+def build_limiters() -> Tuple[InProcessLimiter, Optional[RedisLimiter]]:
+    """The in-process buckets, and the shared backend when configured"""
+    local = InProcessLimiter(settings.RATE_LIMIT_MAX_KEYS)
+    shared = None
+    if settings.RATE_LIMIT_REDIS_URL:
+        shared = RedisLimiter(settings.RATE_LIMIT_REDIS_URL, fallback=local)
+    return local, shared
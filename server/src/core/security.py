@@ -1,10 +1,12 @@
+import logging
 from jose import jwt
-import requests
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Dict
 from src.config import settings
 
+logger = logging.getLogger("sqltown.security")
+
 # Use settings from configuration
 COGNITO_REGION = settings.AWS_REGION
 COGNITO_USERPOOL_ID = settings.COGNITO_USER_POOL_ID
@@ -21,10 +23,11 @@ _jwks_cache = None
 def get_jwks():
     global _jwks_cache
     if _jwks_cache is None:
+        import requests
         try:
             _jwks_cache = requests.get(JWKS_URL).json()
         except Exception as e:
-            print(f"Warning: Failed to fetch JWKS: {e}")
+            logger.warning("Failed to fetch JWKS: %s", e)
             _jwks_cache = {"keys": []}
     return _jwks_cache
 
@@ -0,0 +1,187 @@
+"""
+Worker warm-up
+
+Runs once per worker from the lifespan hook so the first real requests do
+not pay for cold caches: opens pooled DB connections, prefetches JWKS, loads
+the serialized question catalog and prebuilds fixtures for the most popular
+questions. /api/ready reports ready once warm-up finishes or times out.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+
+from src.config import settings
+
+logger = logging.getLogger("sqltown.warmup")
+
+
+class WarmupState:
+    """
+    Progress of the warm-up phase for this worker
+    """
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def timed_out(self) -> bool:
+        return (
+            self.started_at is not None
+            and not self.finished
+            and time.monotonic() - self.started_at >= settings.WARMUP_TIMEOUT_SECONDS
+        )
+
+    def is_ready(self) -> bool:
+        if not settings.WARMUP_ENABLED:
+            return True
+        return self.finished or self.timed_out
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "ready": self.is_ready(),
+            "finished": self.finished,
+            "timed_out": self.timed_out,
+            "elapsed_ms": round(elapsed * 1000, 1) if elapsed is not None else None,
+            "steps": self.steps,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _open_db_pool() -> Dict[str, Any]:
+    """Check out connections concurrently so the pool holds them when traffic arrives"""
+    from src.db.database import engine, read_router
+
+    engines = [engine] + [replica.engine for replica in read_router.replicas]
+    target = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+    opened = 0
+    for warm_engine in engines:
+        connections = []
+        try:
+            for _ in range(target):
+                connections.append(warm_engine.connect())
+        finally:
+            opened += len(connections)
+            for connection in connections:
+                connection.close()
+    return {"connections": opened}
+
+
+def _prefetch_jwks() -> Dict[str, Any]:
+    if not settings.COGNITO_JWKS_URL:
+        return {"skipped": "COGNITO_JWKS_URL not set"}
+
+    from src.auth.jwt_verifier import get_jwt_verifier
+
+    jwks = get_jwt_verifier()._get_jwks()
+    return {"keys": len(jwks.get("keys", []))}
+
+
+def _load_question_catalog() -> Dict[str, Any]:
+    from src.db.database import read_router
+    from src.services.question_catalog import question_catalog
+
+    db = read_router.open_session()
+    try:
+        return {"questions": question_catalog.load(db)}
+    finally:
+        db.close()
+
+
+def _prebuild_popular_fixtures() -> Dict[str, Any]:
+    from src.db.database import read_router
+    from src.models.dataset import Dataset
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+    from src.models.user_progress import UserProgress
+    from src.services.engines import get_backend
+    from src.services.fixture_cache import SUPPORTS_IMAGES, fixture_cache
+
+    if not SUPPORTS_IMAGES:
+        return {"skipped": "sqlite3 serialize() unavailable"}
+
+    db = read_router.open_session()
+    try:
+        popular = (
+            db.query(UserProgress.question_id)
+            .group_by(UserProgress.question_id)
+            .order_by(func.count(UserProgress.id).desc())
+            .limit(settings.WARMUP_POPULAR_QUESTIONS)
+            .subquery()
+        )
+        fixtures = (
+            db.query(func.coalesce(Dataset.setup_sql, TestCase.setup_sql, ""), TestCase.delta_sql, Question.dialect)
+            .join(Question, TestCase.question_id == Question.id)
+            .outerjoin(Dataset, TestCase.dataset_id == Dataset.id)
+            .filter(TestCase.question_id.in_(popular.select()))
+            .distinct()
+            .all()
+        )
+    finally:
+        db.close()
+
+    built = failed = 0
+    for setup_sql, delta_sql, dialect in fixtures:
+        try:
+            # Into the shared store when attached, otherwise this worker's LRU
+            if fixture_cache.shared_path(setup_sql, delta_sql) is None:
+                fixture_cache.get_image(setup_sql, delta_sql)
+            if dialect and dialect != "sqlite":
+                get_backend(dialect).prepare(setup_sql, delta_sql)
+            built += 1
+        except Exception:
+            failed += 1
+    return {"fixtures": built, "failed": failed}
+
+
+WARMUP_STEPS: List[tuple] = [
+    ("db_pool", _open_db_pool),
+    ("jwks", _prefetch_jwks),
+    ("question_catalog", _load_question_catalog),
+    ("fixtures", _prebuild_popular_fixtures),
+]
+
+
+def _run_step(name: str, step: Callable[[], Dict[str, Any]]) -> None:
+    start = time.perf_counter()
+    try:
+        result = {"status": "ok", **step()}
+    except Exception as e:
+        # A failed step leaves that cache cold; it must not keep the worker out of rotation
+        logger.warning("Warm-up step %s failed: %s", name, e)
+        result = {"status": "error", "error": str(e)}
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    warmup_state.steps[name] = result
+
+
+def run_warmup() -> None:
+    """Run every warm-up step in order (blocking)"""
+    for name, step in WARMUP_STEPS:
+        _run_step(name, step)
+    warmup_state.finished_at = time.monotonic()
+    logger.info("Warm-up finished: %s", warmup_state.report())
+
+
+def start_warmup() -> Optional[asyncio.Future]:
+    """
+    Start warm-up in a worker thread without blocking startup
+
+    Returns the running future, or None when warm-up is disabled.
+    """
+    if not settings.WARMUP_ENABLED:
+        return None
+    warmup_state.started_at = time.monotonic()
+    return asyncio.get_running_loop().run_in_executor(None, run_warmup)
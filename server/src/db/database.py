@@ -1,20 +1,44 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config import settings
+from src.db.instrumentation import InstrumentedQueuePool, instrument_engine
+from src.db.replicas import READ_YOUR_WRITES_COOKIE, ReplicaRouter, mark_write, wrote_recently
 
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    echo=settings.DB_ECHO
 )
+instrument_engine(engine, name="primary")
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_primary_write(session, flush_context):
+    mark_write()
+
+
+# Read replicas (empty DATABASE_READ_URLS routes every read to the primary)
+read_router = ReplicaRouter(
+    settings.DATABASE_READ_URLS,
+    SessionLocal,
+    strategy=settings.DB_READ_STRATEGY,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    echo=settings.DB_ECHO
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -25,3 +49,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get a read-only DB session (replica when available)
+def get_read_db(request: Request):
+    prefer_primary = (
+        settings.DB_READ_YOUR_WRITES_SECONDS > 0
+        and wrote_recently(request.cookies.get(READ_YOUR_WRITES_COOKIE))
+    )
+    db = read_router.open_session(prefer_primary=prefer_primary)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,257 @@
+"""
+SQLAlchemy instrumentation
+
+Records per-request query counts, DB time and pool checkout wait, logs slow
+queries with redacted parameters and keeps pool gauges for the admin API.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from src.config import settings
+
+logger = logging.getLogger("sqltown.db")
+slow_query_logger = logging.getLogger("sqltown.db.slow")
+
+# Maximum number of queries an endpoint may issue per request.
+# Keys are "<METHOD> <route path>"; exceeding a budget logs a warning so N+1
+# regressions show up in the logs before they show up in latency.
+QUERY_BUDGETS: Dict[str, int] = {
+    "GET /api/questions/": 2,
+    "GET /api/questions/{question_id}": 2,
+    "POST /api/sql/execute": 1,
+    "POST /api/progress/submit": 3,
+    "GET /api/auth/me": 3,
+}
+
+_MAX_LOGGED_STATEMENT = 2000
+
+
+@dataclass
+class QueryStats:
+    """
+    Database activity attributed to a single request
+    """
+    queries: int = 0
+    db_time: float = 0.0  # seconds spent executing statements
+    checkouts: int = 0
+    checkout_wait: float = 0.0  # seconds spent waiting for a pooled connection
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "checkouts": self.checkouts,
+            "checkout_wait_ms": round(self.checkout_wait * 1000, 3),
+        }
+
+    def add(self, other: "QueryStats") -> None:
+        self.queries += other.queries
+        self.db_time += other.db_time
+        self.checkouts += other.checkouts
+        self.checkout_wait += other.checkout_wait
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised by query_budget() when a block issues more queries than allowed
+    """
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("sqltown_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Return the stats of the request being served, if any"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Attribute all queries issued inside the block to a fresh QueryStats
+
+    The stats object is stored in a context variable, so work dispatched to
+    the threadpool by FastAPI is counted against the same request. Nested
+    blocks add their counts to the enclosing one on exit, so a query_budget()
+    around a test client call sees the queries of the request inside it.
+    """
+    parent = _current_stats.get()
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        if parent is not None:
+            parent.add(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fail if the block issues more than max_queries statements
+
+    Usage:
+        with query_budget(1):
+            client.get("/api/questions/")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > max_queries:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries, got {stats.queries}"
+        )
+
+
+def check_query_budget(method: str, path: str, stats: QueryStats) -> None:
+    """Log a warning when a request exceeds its endpoint's query budget"""
+    budget = QUERY_BUDGETS.get(f"{method} {path}")
+    if budget is not None and stats.queries > budget:
+        logger.warning(
+            "Query budget exceeded for %s %s: %d queries (budget %d)",
+            method, path, stats.queries, budget
+        )
+
+
+def _redact_parameters(parameters: Any) -> Any:
+    """Replace bound values with their type names"""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [_redact_parameters(p) for p in parameters[:5]]
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return parameters
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long callers wait for a connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._telemetry_lock = threading.Lock()
+        self.waiters = 0
+        self.total_checkouts = 0
+        self.total_checkout_wait = 0.0
+        self.invalidations = 0
+
+    def _at_limit(self) -> bool:
+        """True if a checkout now has to wait for a connection to be returned"""
+        return (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self.checkedin() == 0
+        )
+
+    def _do_get(self):
+        # Only checkouts that block count as waiters, not every checkout
+        blocked = self._at_limit()
+        if blocked:
+            with self._telemetry_lock:
+                self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._telemetry_lock:
+                if blocked:
+                    self.waiters -= 1
+                self.total_checkouts += 1
+                self.total_checkout_wait += waited
+            stats = _current_stats.get()
+            if stats is not None:
+                stats.checkouts += 1
+                stats.checkout_wait += waited
+
+    def telemetry(self) -> Dict[str, Any]:
+        """Snapshot of the pool gauges"""
+        checkouts = self.total_checkouts
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "waiters": self.waiters,
+            "invalidations": self.invalidations,
+            "total_checkouts": checkouts,
+            "avg_checkout_wait_ms": round(self.total_checkout_wait / checkouts * 1000, 3) if checkouts else 0.0,
+        }
+
+
+_instrumented_engines: Dict[str, Engine] = {}
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> Engine:
+    """
+    Attach query timing and pool listeners to an engine
+
+    Args:
+        engine: Engine created with poolclass=InstrumentedQueuePool
+        name: Label used in pool telemetry
+
+    Returns:
+        The same engine, for chaining
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sqltown_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["sqltown_query_start"].pop()
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+        if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+            params = parameters if settings.DB_SLOW_QUERY_LOG_PARAMS else _redact_parameters(parameters)
+            slow_query_logger.warning(
+                "Slow query on %s (%.1f ms): %s | params=%s",
+                name, elapsed * 1000, statement[:_MAX_LOGGED_STATEMENT], params
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("sqltown_query_start"):
+            conn.info["sqltown_query_start"].pop()
+
+    def _count_invalidation(dbapi_connection, connection_record, exception):
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            with pool._telemetry_lock:
+                pool.invalidations += 1
+
+    event.listen(engine, "invalidate", _count_invalidation)
+    event.listen(engine, "soft_invalidate", _count_invalidation)
+
+    _instrumented_engines[name] = engine
+    return engine
+
+
+def pool_telemetry() -> Dict[str, Dict[str, Any]]:
+    """Pool gauges for every instrumented engine, keyed by engine name"""
+    snapshot = {}
+    for name, engine in _instrumented_engines.items():
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            snapshot[name] = pool.telemetry()
+        else:
+            snapshot[name] = {"status": pool.status()}
+    return snapshot
@@ -0,0 +1,21 @@
+"""
+Programmatic access to the Alembic migrations in server/migrations
+"""
+import os
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(os.path.join(SERVER_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(SERVER_DIR, "migrations"))
+    return config
+
+
+def upgrade_to_head() -> None:
+    """Apply all pending migrations (equivalent to `alembic upgrade head`)"""
+    from alembic import command
+
+    command.upgrade(_alembic_config(), "head")
@@ -0,0 +1,177 @@
+"""
+Read-replica routing
+
+Picks a replica for read-only sessions (round robin or least connections),
+skips replicas that fail their health check for a cool-down period and tracks
+whether the current request wrote to the primary.
+"""
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.db.instrumentation import InstrumentedQueuePool, instrument_engine
+
+logger = logging.getLogger("sqltown.db.replicas")
+
+READ_YOUR_WRITES_COOKIE = "sqltown_rw"
+
+STRATEGIES = ("round_robin", "least_connections")
+
+
+class ReadOnlySessionError(RuntimeError):
+    """
+    Raised when code tries to flush changes through a replica session
+    """
+
+
+class Replica:
+    """
+    A single read replica and its health state
+    """
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def in_use(self) -> int:
+        pool = self.engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class ReplicaRouter:
+    """
+    Routes read sessions to replicas, falling back to the primary
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        primary_session_factory: Callable[[], Session],
+        strategy: str = "round_robin",
+        retry_seconds: int = 30,
+        **engine_kwargs
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown read strategy '{strategy}', expected one of {STRATEGIES}")
+
+        self.primary_session_factory = primary_session_factory
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self.replicas = [
+            Replica(
+                f"replica-{index}",
+                instrument_engine(
+                    create_engine(url, poolclass=InstrumentedQueuePool, pool_pre_ping=True, **engine_kwargs),
+                    name=f"replica-{index}"
+                )
+            )
+            for index, url in enumerate(urls)
+        ]
+
+    def _candidates(self) -> List[Replica]:
+        """Healthy replicas in the order they should be tried"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if len(healthy) < 2:
+            return healthy
+        if self.strategy == "least_connections":
+            return sorted(healthy, key=Replica.in_use)
+        start = next(self._counter) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+        logger.warning("Replica %s marked unhealthy for %ds", replica.name, self.retry_seconds)
+
+    def open_session(self, prefer_primary: bool = False) -> Session:
+        """
+        Open a read-only session
+
+        Args:
+            prefer_primary: Skip replicas (read-your-writes)
+
+        Returns:
+            A session bound to a healthy replica, or to the primary when no
+            replica is configured, healthy or allowed
+        """
+        if not prefer_primary:
+            for replica in self._candidates():
+                session = replica.session_factory()
+                try:
+                    # Check out (and pre-ping) the connection now so a dead
+                    # replica is detected before the endpoint runs
+                    session.connection()
+                except DBAPIError:
+                    session.close()
+                    self.mark_unhealthy(replica)
+                    continue
+                session.info["read_only"] = True
+                session.info["replica"] = replica.name
+                return session
+
+        return self.primary_session_factory()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "checked_out": replica.in_use(),
+            }
+            for replica in self.replicas
+        ]
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise ReadOnlySessionError("Attempted to write through a read-replica session")
+
+
+_request_wrote: ContextVar[Optional[list]] = ContextVar("sqltown_request_wrote", default=None)
+
+
+@contextmanager
+def track_writes() -> Iterator[list]:
+    """
+    Track primary writes made while serving the current request
+
+    Yields a flag holder that becomes truthy once a primary session flushes
+    changes.
+    """
+    holder: list = []
+    token = _request_wrote.set(holder)
+    try:
+        yield holder
+    finally:
+        _request_wrote.reset(token)
+
+
+def mark_write() -> None:
+    holder = _request_wrote.get()
+    if holder is not None and not holder:
+        holder.append(True)
+
+
+def wrote_recently(cookie_value: Optional[str]) -> bool:
+    """Whether a read-your-writes cookie is still inside its window"""
+    if not cookie_value:
+        return False
+    try:
+        return float(cookie_value) > time.time()
+    except ValueError:
+        return False
@@ -0,0 +1,3 @@
+"""
+Remote grading executors (see src/executor/service.py)
+"""
@@ -0,0 +1,54 @@
+"""
+Wire format between API nodes and grading executors
+
+    POST /v1/grade      GradeRequest -> GradeResponse
+                        409 {"detail": {"missing": [<setup_key>, ...]}} when the
+                        executor does not hold a setup script sent by key only;
+                        the caller resends with those scripts included
+                        503 when the executor is at capacity (try another one)
+    GET  /v1/health     HealthResponse
+
+Setup scripts can be megabytes, so a case names its script by fixture key
+(the SHA-256 from fixture_cache.fixture_key) and includes the script only
+when the executor is not known to hold it already. Grading is deterministic
+and has no side effects outside the executor's fixture caches, so any request
+may be retried on another executor.
+"""
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+PROTOCOL_VERSION = 1
+AUTH_HEADER = "X-Executor-Key"
+
+
+class CaseSpec(BaseModel):
+    setup_key: str
+    setup_sql: Optional[str] = None
+    delta_sql: Optional[str] = None
+    expected_output: Any = None
+    expected_state: Optional[Dict[str, Optional[str]]] = None
+    dialect: str = "sqlite"
+
+
+class GradeRequest(BaseModel):
+    sql: str
+    cases: List[CaseSpec]
+
+
+class GradeResponse(BaseModel):
+    body: Dict[str, Any]
+    verdict: str
+    seconds: float
+
+
+class HealthResponse(BaseModel):
+    status: str
+    protocol: int = PROTOCOL_VERSION
+    slots: int
+    inflight: int
+    waiting: int
+    max_pending: int
+    # Setup scripts held, i.e. fixtures this executor grades without a resend
+    fixtures: List[str]
+    fixture_cache: Dict[str, Any]
@@ -0,0 +1,229 @@
+"""
+Grading executor
+
+A small FastAPI app that runs the SQL engine and nothing else: no database,
+no auth provider, no S3. API nodes send it a submission with the question's
+test cases (src/executor/protocol.py) and get back the same body and verdict
+grade_submission() returns in process, so grading CPU can be scaled
+separately from the API.
+
+Each executor grades up to EXECUTOR_SLOTS submissions at once (threads: the
+engines release the GIL while a query runs) and lets up to
+EXECUTOR_MAX_PENDING more wait; beyond that it answers 503 so the caller
+tries another executor. Run several processes per host to use every core:
+
+    python executor_main.py --processes 4 --port 9101
+
+Setup scripts received by key are kept in an LRU of EXECUTOR_SCRIPT_CACHE_SIZE
+entries alongside the usual fixture cache; their keys are advertised on
+/v1/health so API nodes can route a question to an executor that already has
+its fixtures warm.
+
+Without EXECUTOR_API_KEY an executor only serves clients on the loopback
+interface, and executor_main.py refuses to bind anywhere else. Setup and
+delta scripts arriving over the network run under the same sandbox
+authorizer as uploaded dumps (no ATTACH, no configuration pragmas).
+"""
+import hmac
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+
+from src.config import settings
+from src.executor.protocol import AUTH_HEADER, GradeRequest, GradeResponse, HealthResponse
+from src.services.fixture_cache import fixture_cache, fixture_key
+from src.services.sql_engine import GradingCase, grade_submission
+
+# Fixture keys listed on /v1/health; the rest still hit, they just aren't advertised
+MAX_ADVERTISED_FIXTURES = 1024
+
+
+class ScriptStore:
+    """
+    LRU of setup scripts by fixture key
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._scripts: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            script = self._scripts.get(key)
+            if script is not None:
+                self._scripts.move_to_end(key)
+            return script
+
+    def put(self, key: str, script: str) -> None:
+        with self._lock:
+            self._scripts[key] = script
+            self._scripts.move_to_end(key)
+            while len(self._scripts) > self.max_entries:
+                self._scripts.popitem(last=False)
+
+    def keys(self, limit: int) -> List[str]:
+        """Most recently used first"""
+        with self._lock:
+            return list(reversed(self._scripts))[:limit]
+
+
+class Executor:
+    """
+    Bounded grading capacity of one executor process
+    """
+
+    def __init__(self, slots: int, max_pending: int, scripts: ScriptStore):
+        self.slots = max(slots, 1)
+        self.max_pending = max_pending
+        self.scripts = scripts
+        self._slots = threading.BoundedSemaphore(self.slots)
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.waiting = 0
+        self.graded = 0
+        self.rejected = 0
+
+    def resolve(self, request: GradeRequest) -> List[GradingCase]:
+        """
+        Grading cases for a request, storing any scripts it carries
+
+        Raises:
+            HTTPException: 409 listing the setup keys this executor does not hold,
+                400 when a script does not match its key
+        """
+        cases = []
+        missing = []
+        for spec in request.cases:
+            setup_sql = spec.setup_sql
+            if setup_sql is not None:
+                if fixture_key(setup_sql) != spec.setup_key:
+                    raise HTTPException(status_code=400, detail=f"setup_sql does not match key {spec.setup_key}")
+                self.scripts.put(spec.setup_key, setup_sql)
+            else:
+                setup_sql = self.scripts.get(spec.setup_key)
+                if setup_sql is None:
+                    missing.append(spec.setup_key)
+                    continue
+            cases.append(GradingCase(setup_sql, spec.delta_sql, spec.expected_output, spec.expected_state, spec.dialect))
+        if missing:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"missing": missing})
+        return cases
+
+    def grade(self, request: GradeRequest) -> GradeResponse:
+        """
+        Raises:
+            HTTPException: 503 when slots and the wait list are full
+        """
+        cases = self.resolve(request)
+        with self._lock:
+            if self.inflight + self.waiting >= self.slots + self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Executor at capacity",
+                    headers={"Retry-After": "1"}
+                )
+            self.waiting += 1
+
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.inflight += 1
+        start = time.perf_counter()
+        try:
+            body, verdict = grade_submission(cases, request.sql)
+        finally:
+            with self._lock:
+                self.inflight -= 1
+                self.graded += 1
+            self._slots.release()
+        return GradeResponse(body=body, verdict=verdict, seconds=time.perf_counter() - start)
+
+    def health(self) -> HealthResponse:
+        return HealthResponse(
+            status="ok",
+            slots=self.slots,
+            inflight=self.inflight,
+            waiting=self.waiting,
+            max_pending=self.max_pending,
+            fixtures=self.scripts.keys(MAX_ADVERTISED_FIXTURES),
+            fixture_cache={
+                key: value for key, value in fixture_cache.stats().items()
+                if key in ("entries", "hits", "misses", "bundle_hits", "shared_hits")
+            },
+        )
+
+
+executor = Executor(
+    slots=settings.EXECUTOR_SLOTS,
+    max_pending=settings.EXECUTOR_MAX_PENDING,
+    scripts=ScriptStore(settings.EXECUTOR_SCRIPT_CACHE_SIZE),
+)
+
+
+def is_loopback(host: Optional[str]) -> bool:
+    """Whether an address or host name is on the loopback interface"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def require_executor_key(
+    request: Request,
+    x_executor_key: Optional[str] = Header(None, alias=AUTH_HEADER)
+) -> None:
+    """
+    Requires the X-Executor-Key header to match EXECUTOR_API_KEY
+
+    Without a key configured, only loopback clients are served.
+    """
+    if not settings.EXECUTOR_API_KEY:
+        if not is_loopback(request.client.host if request.client else None):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="EXECUTOR_API_KEY is not set; only local clients are served"
+            )
+        return
+    if not (x_executor_key and hmac.compare_digest(x_executor_key, settings.EXECUTOR_API_KEY)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid executor key")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Executors on one host share built fixtures like API workers do
+    if fixture_cache.shared is not None:
+        fixture_cache.shared.attach()
+    yield
+    if fixture_cache.shared is not None:
+        fixture_cache.shared.detach()
+
+
+app = FastAPI(
+    title=f"{settings.APP_NAME} executor",
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
+    dependencies=[Depends(require_executor_key)],
+    lifespan=lifespan
+)
+
+
+@app.post("/v1/grade", response_model=GradeResponse)
+def grade(request: GradeRequest):
+    """Grade one submission against the given test cases"""
+    return executor.grade(request)
+
+
+@app.get("/v1/health", response_model=HealthResponse)
+def health():
+    """Capacity, load and the fixtures this executor holds"""
+    return executor.health()
@@ -1,3 +1,4 @@
 from .s3_service import S3Service
+from .dataset_index import DatasetIndex
 
-__all__ = ["S3Service"]
+__all__ = ["S3Service", "DatasetIndex"]
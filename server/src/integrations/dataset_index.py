@@ -0,0 +1,272 @@
+"""
+In-process index of uploaded SQL datasets
+
+Serves /api/list-databases from memory. A cold worker loads the manifest
+object with a single GET, or walks every list_objects_v2 page if there is no
+manifest yet. After the TTL, the index is rebuilt from S3 in the background
+while the stale copy keeps serving. Uploads update the index and merge their
+entry into the manifest with a conditional put, so concurrent uploads on
+other workers are not overwritten.
+
+The sorted key list and the entry map are replaced, never mutated, so a
+query that took them under the lock keeps a consistent snapshot. Entries
+added while a listing or manifest read is in flight are kept aside and
+merged into the index that replaces the current one, so an upload is not
+dropped by a refresh that started before it.
+"""
+import base64
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from src.config import settings
+from src.integrations.s3_service import S3Service, s3_service
+
+logger = logging.getLogger("sqltown.datasets")
+
+MANIFEST_VERSION = 1
+
+# Read-merge-write rounds before an upload gives up updating the manifest
+MANIFEST_WRITE_ATTEMPTS = 5
+
+_WRITE_CONFLICTS = ("PreconditionFailed", "ConditionalRequestConflict", "412")
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        key = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not key.startswith("datasets/"):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+class DatasetIndex:
+    """
+    Sorted, in-memory listing of dataset objects with a TTL
+    """
+
+    def __init__(self, s3: S3Service, ttl_seconds: int = 300, manifest_key: str = "manifests/datasets.json"):
+        self.s3 = s3
+        self.ttl_seconds = ttl_seconds
+        self.manifest_key = manifest_key
+        self._keys: List[str] = []
+        self._entries: Dict[str, Dict] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        # Entries added since the running load started, or None if none is running
+        self._added: Optional[Dict[str, Dict]] = None
+
+    # ------------------------------------------------------------------ loading
+
+    def _start_loading(self) -> None:
+        with self._lock:
+            self._added = {}
+
+    def _replace(self, entries: List[Dict]) -> None:
+        by_key = {entry["key"]: entry for entry in entries}
+        with self._lock:
+            by_key.update(self._added or {})
+            self._added = None
+            self._entries = by_key
+            self._keys = sorted(by_key)
+            self._loaded_at = time.monotonic()
+
+    def _write_manifest(self) -> None:
+        with self._lock:
+            entries = [self._entries[key] for key in self._keys]
+        try:
+            self.s3.put_json(self.manifest_key, {"version": MANIFEST_VERSION, "datasets": entries})
+        except ClientError as e:
+            # The manifest only speeds up cold starts; the listing itself is still correct
+            logger.warning("Failed to write dataset manifest: %s", e)
+
+    def rebuild(self) -> int:
+        """
+        Walk every listing page, replace the index and rewrite the manifest
+
+        Returns:
+            Number of datasets indexed
+
+        Raises:
+            ClientError: If listing fails (the previous index is kept)
+        """
+        self._start_loading()
+        self._replace(list(self.s3.iter_database_files()))
+        self._write_manifest()
+        return len(self._keys)
+
+    def _load(self) -> None:
+        """Cold load: one GET of the manifest, falling back to a full scan"""
+        manifest = None
+        self._start_loading()
+        try:
+            manifest = self.s3.get_json(self.manifest_key)
+        except (ClientError, ValueError) as e:
+            logger.warning("Ignoring unreadable dataset manifest: %s", e)
+
+        if manifest and manifest.get("version") == MANIFEST_VERSION:
+            self._replace(manifest.get("datasets", []))
+        else:
+            self.rebuild()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self.rebuild()
+            except Exception as e:
+                logger.warning("Dataset index refresh failed, serving stale listing: %s", e)
+                with self._lock:
+                    # Retry after another TTL instead of on every request
+                    self._loaded_at = time.monotonic()
+                    self._added = None
+            finally:
+                with self._lock:
+                    self._refreshing = False
+        # Entries added since the running load started, or None if none is running
+        self._added: Optional[Dict[str, Dict]] = None
+
+        threading.Thread(target=refresh, name="dataset-index-refresh", daemon=True).start()
+
+    def ensure_loaded(self) -> None:
+        """Load the index if this worker has none; schedule a refresh if it is stale"""
+        if self._loaded_at is None:
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._load()
+            return
+        if time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            self._refresh_in_background()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    # ------------------------------------------------------------------ updates
+
+    def add(self, entry: Dict) -> None:
+        """Insert or replace one dataset (e.g. after an upload) and persist the manifest"""
+        with self._lock:
+            if self._added is not None:
+                # A load in flight may have listed before this upload
+                self._added[entry["key"]] = entry
+            if self._loaded_at is None:
+                # Nothing cached yet; the load in flight (or the next) will include it
+                return
+            if entry["key"] not in self._entries:
+                keys = list(self._keys)
+                bisect.insort(keys, entry["key"])
+                self._keys = keys
+            self._entries = {**self._entries, entry["key"]: entry}
+        self._merge_into_manifest(entry)
+
+    def _merge_into_manifest(self, entry: Dict) -> None:
+        """
+        Add one entry to the manifest in S3 without losing other workers' entries
+
+        Re-reads the manifest and writes it back only if its ETag is unchanged,
+        retrying on a conflict.
+        """
+        for _ in range(MANIFEST_WRITE_ATTEMPTS):
+            try:
+                manifest, etag = self.s3.get_json_versioned(self.manifest_key)
+                if manifest and manifest.get("version") == MANIFEST_VERSION:
+                    merged = {item["key"]: item for item in manifest.get("datasets", [])}
+                else:
+                    # No usable manifest: start from this worker's index
+                    with self._lock:
+                        merged = dict(self._entries)
+                merged[entry["key"]] = entry
+                self.s3.put_json(
+                    self.manifest_key,
+                    {"version": MANIFEST_VERSION, "datasets": [merged[key] for key in sorted(merged)]},
+                    if_match=etag,
+                    if_none_match=etag is None
+                )
+                return
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in _WRITE_CONFLICTS:
+                    continue
+                logger.warning("Failed to update dataset manifest: %s", e)
+                return
+            except ValueError as e:
+                logger.warning("Failed to update dataset manifest: %s", e)
+                return
+        # The manifest only speeds up cold starts; the next rebuild rewrites it
+        logger.warning("Gave up updating dataset manifest after %d conflicting writes", MANIFEST_WRITE_ATTEMPTS)
+
+    # ------------------------------------------------------------------ queries
+
+    def query(
+        self,
+        prefix: Optional[str] = None,
+        name: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[str], int]:
+        """
+        Page through the index in key order
+
+        Args:
+            prefix: Only keys starting with datasets/<prefix>
+            name: Case-insensitive substring of the file name
+            cursor: Opaque cursor returned by a previous page
+            limit: Page size (None returns everything after the cursor)
+
+        Returns:
+            (entries, next_cursor, total matching entries)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        self.ensure_loaded()
+
+        with self._lock:
+            keys = self._keys
+            entries = self._entries
+
+        start = 0
+        if prefix:
+            full_prefix = "datasets/" + prefix
+            start = bisect.bisect_left(keys, full_prefix)
+            end = bisect.bisect_left(keys, full_prefix + "\uffff")
+            keys = keys[start:end]
+            start = 0
+
+        needle = name.lower() if name else None
+        if needle:
+            keys = [key for key in keys if needle in entries[key]["filename"].lower()]
+
+        total = len(keys)
+        if cursor:
+            start = bisect.bisect_right(keys, decode_cursor(cursor))
+
+        page_keys = keys[start:start + limit] if limit else keys[start:]
+        next_cursor = None
+        if limit and start + limit < len(keys):
+            next_cursor = encode_cursor(page_keys[-1])
+
+        return [entries[key] for key in page_keys], next_cursor, total
+
+
+dataset_index = DatasetIndex(
+    s3_service,
+    ttl_seconds=settings.DATASET_INDEX_TTL_SECONDS,
+    manifest_key=settings.DATASET_MANIFEST_KEY
+)
@@ -1,11 +1,23 @@
-import boto3
-from botocore.config import Config
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from botocore.exceptions import ClientError
-from typing import Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 from time import time
+from datetime import datetime, timezone
 
 from src.config import settings
 
+logger = logging.getLogger("sqltown.s3")
+
+T = TypeVar("T")
+
 
 class S3Service:
     """
@@ -14,21 +26,97 @@ class S3Service:
     
     def __init__(self):
         """
-        Initialize S3 client with AWS credentials from settings
+        Initialize S3 settings; the boto3 client is created on first use
         """
-        self.client = boto3.client(
-            's3',
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            config=Config(
-                signature_version='s3v4',
-                s3={'use_accelerate_endpoint': False}
-            )
-        )
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.bucket_name = settings.AWS_S3_BUCKET
         self.region = settings.AWS_REGION
     
+    @property
+    def client(self):
+        """
+        boto3 S3 client, constructed lazily
+
+        Importing boto3 and loading the S3 service model is one of the most
+        expensive steps of server startup, so it is deferred until the first
+        S3 operation instead of happening at import time.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+
+                    self._client = boto3.client(
+                        's3',
+                        endpoint_url=settings.S3_ENDPOINT_URL,
+                        region_name=settings.AWS_REGION,
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        config=Config(
+                            signature_version='s3v4',
+                            s3={'use_accelerate_endpoint': False},
+                            # Shared by the executor threads and multipart part uploads
+                            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+                            read_timeout=settings.S3_READ_TIMEOUT,
+                            retries={
+                                'max_attempts': settings.S3_MAX_ATTEMPTS,
+                                'mode': settings.S3_RETRY_MODE
+                            }
+                        )
+                    )
+        return self._client
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Bounded thread pool that runs blocking S3 calls for async endpoints
+        
+        Kept separate from the default threadpool so a slow S3 cannot starve
+        database-backed endpoints of worker threads.
+        """
+        if self._executor is None:
+            with self._client_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.S3_EXECUTOR_WORKERS,
+                        thread_name_prefix="s3"
+                    )
+        return self._executor
+    
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Await a blocking S3 operation without blocking the event loop
+        
+        Args:
+            func: S3Service method (or any function doing S3 I/O)
+            *args, **kwargs: Arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        # Carry context variables (request-scoped state) into the worker thread
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+    
+    def shutdown(self) -> None:
+        """Stop the executor, waiting for in-flight operations"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def object_url(self, key: str) -> str:
+        """
+        Public URL of an object (path-style when a custom endpoint is configured)
+        """
+        if settings.S3_ENDPOINT_URL:
+            return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket_name}/{key}"
+        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}"
+    
     def generate_presigned_upload_url(
         self, 
         file_name: str, 
@@ -63,7 +151,7 @@ class S3Service:
         )
         
         # Construct the final file URL
-        file_url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}"
+        file_url = self.object_url(key)
         
         return presigned_url, file_url
     
@@ -130,46 +218,233 @@ class S3Service:
             )
             
             # Return public URL
-            file_url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}"
+            file_url = self.object_url(key)
             return file_url
         except ClientError as e:
             raise e
     
-    def list_database_files(self) -> list:
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        content_type: str = 'application/sql',
+        key: Optional[str] = None
+    ) -> Dict:
         """
-        List all SQL database files from S3
+        Stream a file to S3 in fixed-size parts
+        
+        Reads S3_MULTIPART_CHUNK_SIZE bytes at a time and uploads up to
+        S3_MULTIPART_CONCURRENCY parts in parallel, so memory use is bounded
+        by chunk size x concurrency whatever the file size. Each part carries
+        a SHA-256 checksum that S3 verifies. If anything fails, the multipart
+        upload is aborted so no orphaned parts are left in the bucket. Files
+        smaller than one part are sent with a single put_object.
         
+        Args:
+            stream: Binary file object positioned at the start of the data
+            file_name: Name of the file
+            content_type: MIME type of the file
+            key: Object key (default: a timestamped key under datasets/)
+            
         Returns:
-            List of database file objects with metadata
+            Listing entry (key, filename, url, size, last_modified) of the
+            uploaded file
+            
+        Raises:
+            ClientError: If AWS S3 operation fails
         """
+        key = key or f"datasets/{int(time() * 1000)}-{file_name}"
+        chunk_size = max(settings.S3_MULTIPART_CHUNK_SIZE, 5 * 1024 * 1024)
+        
+        chunk = stream.read(chunk_size)
+        if len(chunk) < chunk_size:
+            self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=chunk,
+                ContentType=content_type,
+                ChecksumAlgorithm='SHA256'
+            )
+            return self.database_file_entry(key, len(chunk), datetime.now(timezone.utc))
+        
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            ContentType=content_type,
+            ChecksumAlgorithm='SHA256'
+        )['UploadId']
+        
         try:
-            response = self.client.list_objects_v2(
+            parts, size = self._upload_parts(stream, key, upload_id, chunk, chunk_size)
+            self.client.complete_multipart_upload(
                 Bucket=self.bucket_name,
-                Prefix="datasets"
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
             )
+        except BaseException:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            except ClientError as abort_error:
+                logger.warning("Failed to abort multipart upload %s: %s", upload_id, abort_error)
+            raise
+        
+        return self.database_file_entry(key, size, datetime.now(timezone.utc))
+    
+    def _upload_parts(
+        self,
+        stream: BinaryIO,
+        key: str,
+        upload_id: str,
+        first_chunk: bytes,
+        chunk_size: int
+    ) -> Tuple[List[Dict], int]:
+        """Upload parts with bounded parallelism; returns the part list and total size"""
+        concurrency = max(settings.S3_MULTIPART_CONCURRENCY, 1)
+        parts: List[Dict] = []
+        size = 0
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-part") as executor:
+            in_flight: set = set()
+            part_number = 1
+            chunk = first_chunk
+            try:
+                while chunk:
+                    # Never hold more than `concurrency` chunks in memory
+                    if len(in_flight) >= concurrency:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        parts.extend(future.result() for future in done)
+                    in_flight.add(executor.submit(self._upload_part, key, upload_id, part_number, chunk))
+                    size += len(chunk)
+                    part_number += 1
+                    chunk = stream.read(chunk_size)
+                
+                done, _ = wait(in_flight)
+                parts.extend(future.result() for future in done)
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+        
+        return sorted(parts, key=lambda part: part['PartNumber']), size
+    
+    def _upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> Dict:
+        checksum = base64.b64encode(hashlib.sha256(data).digest()).decode('ascii')
+        response = self.client.upload_part(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+            ChecksumAlgorithm='SHA256',
+            ChecksumSHA256=checksum
+        )
+        return {
+            'PartNumber': part_number,
+            'ETag': response['ETag'],
+            'ChecksumSHA256': response.get('ChecksumSHA256', checksum),
+        }
+    
+    def database_file_entry(self, key: str, size: int, last_modified) -> Dict:
+        """
+        Listing entry for a dataset object
+        """
+        return {
+            'key': key,
+            'filename': key.split('/')[-1],
+            'url': self.object_url(key),
+            'size': size,
+            'last_modified': last_modified.isoformat()
+        }
+    
+    def iter_database_files(self) -> Iterator[Dict]:
+        """
+        Walk every page of the datasets/ prefix
+        
+        Yields:
+            Database file entries in key order
             
-            files = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    # Get file name from key
-                    file_name = obj['Key'].split('/')[-1]
-                    
-                    # Generate presigned URL for downloading
-                    file_url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{obj['Key']}"
-                    
-                    files.append({
-                        'key': obj['Key'],
-                        'filename': file_name,
-                        'url': file_url,
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat()
-                    })
-            
-            return files
+        Raises:
+            ClientError: If AWS S3 operation fails
+        """
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix="datasets/"):
+            for obj in page.get('Contents', []):
+                yield self.database_file_entry(obj['Key'], obj['Size'], obj['LastModified'])
+    
+    def list_database_files(self) -> list:
+        """
+        List all SQL database files from S3
+        
+        Returns:
+            List of database file objects with metadata
+        """
+        try:
+            return list(self.iter_database_files())
         except ClientError as e:
-            print(f"Error listing S3 files: {e}")
+            logger.warning("Error listing S3 files: %s", e)
             return []
     
+    def get_json(self, key: str) -> Optional[Any]:
+        """
+        Read a JSON object from S3
+        
+        Returns:
+            Decoded JSON, or None if the object does not exist
+        """
+        return self.get_json_versioned(key)[0]
+    
+    def get_json_versioned(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Read a JSON object from S3 along with its ETag
+        
+        Returns:
+            (decoded JSON, ETag), or (None, None) if the object does not exist
+        """
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None, None
+            raise
+        return json.loads(response['Body'].read()), response.get('ETag')
+    
+    def put_json(self, key: str, data: Any, if_match: Optional[str] = None, if_none_match: bool = False) -> None:
+        """
+        Write a JSON object to S3
+        
+        Args:
+            key: Object key
+            data: JSON-serializable value
+            if_match: Only overwrite the object if it still has this ETag
+            if_none_match: Only write if the object does not exist yet
+        
+        Raises:
+            ClientError: PreconditionFailed (or ConditionalRequestConflict)
+                when a condition does not hold
+        """
+        conditions = {}
+        if if_match:
+            conditions['IfMatch'] = if_match
+        elif if_none_match:
+            conditions['IfNoneMatch'] = '*'
+        self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=json.dumps(data, separators=(',', ':')).encode('utf-8'),
+            ContentType='application/json',
+            **conditions
+        )
+    
+    def download_file(self, key: str, path: str) -> None:
+        """
+        Download an object to a local file (ranged, parallel GETs for large objects)
+        
+        Raises:
+            ClientError: If AWS S3 operation fails
+        """
+        self.client.download_file(self.bucket_name, key, path)
+    
     def generate_presigned_download_url(self, key: str, expiration: int = 3600) -> str:
         """
         Generate a presigned URL for downloading a file from S3
@@ -195,5 +470,5 @@ class S3Service:
             raise e
 
 
-# Singleton instance
+# Singleton instance (cheap: no client is created until first use)
 s3_service = S3Service()
@@ -1,3 +1,21 @@
 from .cors import setup_cors
+from .metrics import setup_metrics
+from .profiling import profile_endpoints, setup_profiling
+from .query_stats import setup_query_stats
+from .rate_limit import setup_rate_limit
+from .read_your_writes import setup_read_your_writes
+from .startup import setup_startup_profiler
+from .tracing import setup_tracing, trace_endpoints
 
-__all__ = ["setup_cors"]
+__all__ = [
+    "setup_cors",
+    "setup_metrics",
+    "setup_profiling",
+    "profile_endpoints",
+    "setup_query_stats",
+    "setup_rate_limit",
+    "setup_read_your_writes",
+    "setup_startup_profiler",
+    "setup_tracing",
+    "trace_endpoints",
+]
@@ -0,0 +1,57 @@
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.core.metrics import HTTP_REQUESTS_IN_PROGRESS, record_request
+
+
+class MetricsMiddleware:
+    """
+    Record request latency per route and status, and requests in progress
+
+    Requests that match no route are recorded under route "unmatched", so
+    scanners cannot create unbounded label values.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            record_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - start,
+            )
+
+
+def setup_metrics(app: FastAPI) -> None:
+    """
+    Register the request metrics middleware
+
+    Args:
+        app: FastAPI application instance
+    """
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,194 @@
+import asyncio
+import functools
+import hmac
+import time
+import uuid
+from threading import Lock
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.utils.profiling import (
+    PROFILE_MODES,
+    ProfileStore,
+    RequestProfile,
+    activate,
+    current_profile,
+    deactivate,
+    profile_store,
+    verify_profile_token,
+)
+from src.utils.tracing import current_request_id
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand
+
+    A request is profiled when it carries a valid token in the X-Profile
+    header or __profile query parameter: either a token signed for its
+    method and path (POST /api/admin/profiles/token), or "1" together with
+    the X-Admin-Key header. The mode comes from X-Profile-Mode /
+    __profile_mode. One request per worker is profiled at a time; the
+    response says what happened in X-Profile-Status and carries X-Profile-ID.
+    """
+
+    def __init__(self, app: ASGIApp, secret: str, store: ProfileStore, interval: float, top_n: int):
+        self.app = app
+        self.secret = secret
+        self.store = store
+        self.interval = interval
+        self.top_n = top_n
+        self._busy = Lock()
+
+    def _requested(self, scope: Scope):
+        headers = Headers(scope=scope)
+        token = headers.get("x-profile")
+        mode = headers.get("x-profile-mode")
+        if token is None and b"__profile" in scope.get("query_string", b""):
+            query = parse_qs(scope["query_string"].decode("latin-1"))
+            token = (query.get("__profile") or [None])[0]
+            mode = mode or (query.get("__profile_mode") or [None])[0]
+        if token is None:
+            return None, None, None
+        admin_key = headers.get("x-admin-key", "")
+        authorized = verify_profile_token(self.secret, token, scope["method"], scope["path"]) or (
+            token == "1" and bool(admin_key) and hmac.compare_digest(admin_key, self.secret)
+        )
+        return token, authorized, mode or "sample"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token, authorized, mode = self._requested(scope)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not authorized:
+            status = "denied"
+        elif mode not in PROFILE_MODES:
+            status = "invalid-mode"
+        elif not self._busy.acquire(blocking=False):
+            status = "busy"
+        else:
+            status = None
+        if status is not None:
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile-Status": status}))
+            return
+
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+
+    def _with_headers(self, send: Send, extra: dict) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in extra.items():
+                    headers.append(name, value)
+            await send(message)
+        return send_with_headers
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, mode: str) -> None:
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        profile = RequestProfile(profile_id, mode, self.interval, self.top_n)
+        status_code = 500
+
+        async def send_profiled(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile.start()
+        token = activate(profile)
+        # In cprofile mode, the event loop thread is profiled too
+        loop_profiler = profile.enter_thread()
+        if loop_profiler is not None:
+            loop_profiler.enable()
+        try:
+            await self.app(scope, receive, self._with_headers(
+                send_profiled, {"X-Profile-Status": "recorded", "X-Profile-ID": profile_id}
+            ))
+        finally:
+            if loop_profiler is not None:
+                loop_profiler.disable()
+            deactivate(token)
+            result = await run_in_threadpool(profile.finish)
+            result["summary"].update({
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "request_id": current_request_id(),
+                "created_at": time.time(),
+            })
+            await run_in_threadpool(self.store.save, profile_id, result["summary"], result["files"])
+
+
+def _profiled_endpoint(call):
+    @functools.wraps(call)
+    def endpoint(*args, **kwargs):
+        profile = current_profile()
+        if profile is None:
+            return call(*args, **kwargs)
+        profiler = profile.enter_thread()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            profile.leave_thread()
+    endpoint._sqltown_profiled = True
+    return endpoint
+
+
+def profile_endpoints(app: FastAPI) -> None:
+    """
+    Include the threadpool thread running a sync endpoint in its request's profile
+
+    Async endpoints run on the event loop thread, which is always included.
+    Call after all routers are included.
+    """
+    if not (settings.PROFILING_ENABLED and settings.ADMIN_API_KEY):
+        return
+    for route in app.routes:
+        call = getattr(getattr(route, "dependant", None), "call", None)
+        if (
+            isinstance(route, APIRoute)
+            and call is not None
+            and not asyncio.iscoroutinefunction(call)
+            and not getattr(call, "_sqltown_profiled", False)
+        ):
+            route.dependant.call = _profiled_endpoint(call)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    """
+    Register the on-demand profiling middleware
+
+    Nothing is registered unless PROFILING_ENABLED is set and ADMIN_API_KEY
+    (which signs profile tokens) is configured.
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not (settings.PROFILING_ENABLED and settings.ADMIN_API_KEY):
+        return
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret=settings.ADMIN_API_KEY,
+        store=profile_store,
+        interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+        top_n=settings.PROFILE_TOP_N,
+    )
@@ -0,0 +1,50 @@
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.db.instrumentation import check_query_budget, track_queries
+
+
+class QueryStatsMiddleware:
+    """
+    Collect per-request database statistics
+
+    Opens a QueryStats scope around every HTTP request, checks the endpoint's
+    query budget once the response is sent and optionally reports the numbers
+    in X-DB-* response headers.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.expose_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Queries", str(stats.queries))
+                    headers.append("X-DB-Time-Ms", f"{stats.db_time * 1000:.1f}")
+                    headers.append("X-DB-Checkout-Wait-Ms", f"{stats.checkout_wait * 1000:.1f}")
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        route = scope.get("route")
+        if route is not None:
+            check_query_budget(scope["method"], route.path, stats)
+
+
+def setup_query_stats(app: FastAPI) -> None:
+    """
+    Register the per-request database statistics middleware
+
+    Args:
+        app: FastAPI application instance
+    """
+    app.add_middleware(QueryStatsMiddleware, expose_headers=settings.DB_QUERY_STATS_HEADERS)
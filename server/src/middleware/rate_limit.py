@@ -0,0 +1,120 @@
+import json
+import logging
+import math
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth.jwt_verifier import get_jwt_verifier
+from src.config import settings
+from src.core.metrics import RATE_LIMITED
+from src.core.rate_limit import InProcessLimiter, RateLimitRule, RedisLimiter, build_limiters, load_rules
+
+logger = logging.getLogger("sqltown.rate_limit")
+
+
+class RateLimitMiddleware:
+    """
+    Enforce per-route token buckets keyed by JWT subject or client IP
+
+    Limited routes answer with RateLimit-Limit, RateLimit-Remaining,
+    RateLimit-Reset and RateLimit-Policy headers; requests over the limit get
+    429 with Retry-After and never reach the endpoint. Other routes pass
+    straight through after one dict lookup on the path.
+
+    Requests with a bearer token that verifies without I/O are limited per
+    user, all others per client address (run uvicorn with --proxy-headers
+    behind a load balancer so that is the real client).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Dict[str, Dict[str, RateLimitRule]],
+        local: InProcessLimiter,
+        shared: Optional[RedisLimiter] = None
+    ):
+        self.app = app
+        self.rules = rules
+        self.local = local
+        self.shared = shared
+        self.verifier = get_jwt_verifier()
+
+    def _key(self, scope: Scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    subject = self.verifier.verified_subject(token.strip())
+                    if subject:
+                        return subject
+                break
+        # Subjects are UUIDs, so they cannot collide with an address
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        methods = self.rules.get(scope["path"])
+        rule = methods.get(scope["method"]) if methods is not None else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._key(scope)
+        if self.shared is not None:
+            debt = await self.shared.hit(rule, key)
+        else:
+            debt = self.local.hit(rule, key)
+
+        if debt > rule.tolerance:
+            RATE_LIMITED.labels(rule.name).inc()
+            retry_after = max(math.ceil(debt - rule.tolerance), 1)
+            body = json.dumps({"detail": f"Rate limit exceeded; retry in {retry_after} seconds"}).encode()
+            headers = MutableHeaders(raw=[])
+            headers["content-type"] = "application/json"
+            headers["content-length"] = str(len(body))
+            headers["retry-after"] = str(retry_after)
+            self._limit_headers(headers, rule, 0, debt - rule.interval)
+            await send({"type": "http.response.start", "status": 429, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        remaining = rule.remaining(debt)
+
+        async def send_with_limits(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._limit_headers(MutableHeaders(scope=message), rule, remaining, debt)
+            await send(message)
+
+        await self.app(scope, receive, send_with_limits)
+
+    @staticmethod
+    def _limit_headers(headers: MutableHeaders, rule: RateLimitRule, remaining: int, debt: float) -> None:
+        headers["ratelimit-limit"] = str(rule.limit)
+        headers["ratelimit-remaining"] = str(remaining)
+        # Seconds until the bucket is full again
+        headers["ratelimit-reset"] = str(max(math.ceil(debt), 0))
+        headers["ratelimit-policy"] = rule.policy
+
+
+def setup_rate_limit(app: FastAPI) -> None:
+    """
+    Register the rate limiting middleware for the routes in RATE_LIMITS
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not settings.RATE_LIMIT_ENABLED or not settings.RATE_LIMITS:
+        return
+    local, shared = build_limiters()
+    app.add_middleware(RateLimitMiddleware, rules=load_rules(settings.RATE_LIMITS), local=local, shared=shared)
+    logger.info(
+        "Rate limiting %s (%s)",
+        ", ".join(sorted(settings.RATE_LIMITS)),
+        "shared via Redis" if shared is not None else "per worker"
+    )
@@ -0,0 +1,53 @@
+import time
+
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.db.replicas import READ_YOUR_WRITES_COOKIE, track_writes
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin a client's reads to the primary for a short window after it writes
+
+    When a request flushes changes through a primary session, the response
+    sets a cookie holding the window's expiry. get_read_db() sees the cookie
+    on follow-up requests and skips the replicas, so users never read data
+    older than their own writes while replicas catch up.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: int):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_writes() as wrote:
+            async def send_with_cookie(message: Message) -> None:
+                if message["type"] == "http.response.start" and wrote:
+                    expires_at = time.time() + self.window_seconds
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "set-cookie",
+                        f"{READ_YOUR_WRITES_COOKIE}={expires_at:.0f}; Max-Age={self.window_seconds}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_cookie)
+
+
+def setup_read_your_writes(app: FastAPI) -> None:
+    """
+    Register the read-your-writes middleware when replicas and a window are configured
+
+    Args:
+        app: FastAPI application instance
+    """
+    if settings.DATABASE_READ_URLS and settings.DB_READ_YOUR_WRITES_SECONDS > 0:
+        app.add_middleware(ReadYourWritesMiddleware, window_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
@@ -0,0 +1,34 @@
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.utils.startup import startup_profiler
+
+
+class FirstRequestMiddleware:
+    """
+    Record time-to-first-request, then pass requests straight through
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._seen = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._seen or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._seen = True
+            startup_profiler.mark_first_request()
+
+
+def setup_startup_profiler(app: FastAPI) -> None:
+    """
+    Register the time-to-first-request middleware
+
+    Args:
+        app: FastAPI application instance
+    """
+    app.add_middleware(FirstRequestMiddleware)
@@ -0,0 +1,180 @@
+import asyncio
+import functools
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.db.instrumentation import current_query_stats
+from src.utils.tracing import RequestTrace, mark_endpoint_finished, start_trace
+
+logger = logging.getLogger("sqltown.requests")
+
+# Inbound request IDs are echoed into headers and logs, so only accept safe ones
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+
+def _phase_breakdown(trace: RequestTrace) -> Dict[str, float]:
+    """Recorded phases plus DB time and serialization, in milliseconds"""
+    now = time.perf_counter()
+    phases = {name: seconds * 1000 for name, seconds in trace.phases.items()}
+    stats = current_query_stats()
+    if stats is not None and stats.queries:
+        phases["db"] = stats.db_time * 1000
+        phases["db_wait"] = stats.checkout_wait * 1000
+    if trace.endpoint_finished is not None:
+        phases["serialize"] = (now - trace.endpoint_finished) * 1000
+    phases["total"] = (now - trace.started) * 1000
+    return phases
+
+
+def server_timing(phases: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in phases.items())
+
+
+class TracingMiddleware:
+    """
+    Assign a request ID and report where each request spent its time
+
+    The response carries X-Request-ID and, optionally, a Server-Timing header
+    with the phase breakdown. Slow and failed requests are logged as one JSON
+    line each; other requests are logged at `sample_rate`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing_header: bool = True,
+        slow_request_ms: float = 500,
+        sample_rate: float = 0.0
+    ):
+        self.app = app
+        self.server_timing_header = server_timing_header
+        self.slow_request_ms = slow_request_ms
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        status = 500
+        phases: Optional[Dict[str, float]] = None
+        queries = 0
+
+        with start_trace(request_id) as trace:
+            async def send_with_trace(message: Message) -> None:
+                nonlocal status, phases, queries
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    phases = _phase_breakdown(trace)
+                    stats = current_query_stats()
+                    queries = stats.queries if stats is not None else 0
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Request-ID", request_id)
+                    if self.server_timing_header:
+                        headers.append("Server-Timing", server_timing(phases))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                duration_ms = trace.elapsed() * 1000
+                self._log(scope, request_id, status, duration_ms, phases or {}, queries)
+
+    def _log(
+        self,
+        scope: Scope,
+        request_id: str,
+        status: int,
+        duration_ms: float,
+        phases: Dict[str, float],
+        queries: int
+    ) -> None:
+        if status >= 500:
+            reason, level = "error", logging.WARNING
+        elif duration_ms >= self.slow_request_ms:
+            reason, level = "slow", logging.WARNING
+        elif self.sample_rate and random.random() < self.sample_rate:
+            reason, level = "sampled", logging.INFO
+        else:
+            return
+
+        route = scope.get("route")
+        logger.log(level, "%s %s %d in %.1f ms", scope["method"], scope["path"], status, duration_ms, extra={
+            "request_id": request_id,
+            "fields": {
+                "event": "request",
+                "reason": reason,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route.path if route is not None else None,
+                "status": status,
+                "duration_ms": round(duration_ms, 2),
+                "phases_ms": {name: round(ms, 2) for name, ms in phases.items()},
+                "db_queries": queries,
+            },
+        })
+
+
+def _traced_endpoint(call):
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                mark_endpoint_finished()
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                mark_endpoint_finished()
+    endpoint._sqltown_traced = True
+    return endpoint
+
+
+def trace_endpoints(app: FastAPI) -> None:
+    """
+    Mark when each endpoint function returns, so serialization is timed
+
+    Call after all routers are included.
+    """
+    if not settings.TRACING_ENABLED:
+        return
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_sqltown_traced", False):
+            route.dependant.call = _traced_endpoint(route.dependant.call)
+
+
+def setup_tracing(app: FastAPI) -> None:
+    """
+    Register the request tracing middleware
+
+    Register it last so it wraps every other middleware.
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not settings.TRACING_ENABLED:
+        return
+    app.add_middleware(
+        TracingMiddleware,
+        server_timing_header=settings.TRACE_SERVER_TIMING_HEADER,
+        slow_request_ms=settings.TRACE_SLOW_REQUEST_MS,
+        sample_rate=settings.TRACE_SAMPLE_RATE,
+    )
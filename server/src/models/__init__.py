@@ -2,8 +2,10 @@
 Database models (SQLAlchemy models)
 """
 
-__all__ = ['Question', 'TestCase', 'User', 'UserProgress']
+__all__ = ['Contest', 'ContestQuestion', 'ContestSubmission', 'Dataset', 'Question', 'TestCase', 'User', 'UserProgress']
 
+from .contest import Contest, ContestQuestion, ContestSubmission
+from .dataset import Dataset
 from .question import Question
 from .test_case import TestCase
 from .user import User
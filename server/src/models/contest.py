@@ -0,0 +1,54 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from src.db.database import Base
+
+
+class Contest(Base):
+    __tablename__ = "contests"
+
+    id = Column(Integer, primary_key=True)
+    slug = Column(String(255), unique=True, nullable=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text)
+
+    # Submissions are accepted in [starts_at, ends_at)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    questions = relationship(
+        "ContestQuestion",
+        order_by="ContestQuestion.position",
+        cascade="all, delete-orphan"
+    )
+
+
+class ContestQuestion(Base):
+    __tablename__ = "contest_questions"
+
+    contest_id = Column(Integer, ForeignKey("contests.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+
+
+class ContestSubmission(Base):
+    __tablename__ = "contest_submissions"
+    __table_args__ = (
+        # First-submission checks and per-user standings
+        Index("ix_contest_submissions_contest_user_question", "contest_id", "user_id", "question_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    contest_id = Column(Integer, ForeignKey("contests.id", ondelete="CASCADE"), nullable=False)
+    # JWT subject; contestants need not have synced a users row
+    user_id = Column(String(255), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+
+    verdict = Column(String(16), nullable=False)  # pass | fail | error | timeout
+    queue_seconds = Column(Float)
+    grading_seconds = Column(Float)
+
+    submitted_at = Column(DateTime(timezone=True), nullable=False)
+    graded_at = Column(DateTime(timezone=True), server_default=func.now())
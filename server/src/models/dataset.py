@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from src.db.database import Base
+
+
+class Dataset(Base):
+    __tablename__ = "datasets"
+    __table_args__ = (UniqueConstraint("name", "version", name="uq_datasets_name_version"),)
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    description = Column(Text)
+
+    # Script (or synthetic-data directive) that builds the dataset
+    setup_sql = Column(Text, nullable=False)
+    # fixture_key(setup_sql); identical scripts are stored once
+    content_hash = Column(String(64), nullable=False, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ARRAY
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, ARRAY, JSON
 from sqlalchemy.orm import relationship
 from src.db.database import Base
 
+# Postgres arrays, stored as JSON on SQLite (local primary/replica stand-ins)
+StringArray = ARRAY(String).with_variant(JSON(), "sqlite")
+
+
 class Question(Base):
     __tablename__ = "questions"
 
@@ -12,17 +15,23 @@ class Question(Base):
     description = Column(Text, nullable=False)
     difficulty = Column(String, nullable=False)
 
-    topics = Column(ARRAY(String))
-    companies = Column(ARRAY(String))
+    topics = Column(StringArray)
+    companies = Column(StringArray)
 
     # NEW FIELDS
     schema = Column(JSON)        # store table structure
     examples = Column(JSON)      # expected output
-    hints = Column(ARRAY(String))
+    hints = Column(StringArray)
     solution = Column(Text)
 
+    # Execution backend submissions run on (src/services/engines)
+    dialect = Column(String(16), nullable=False, default="sqlite", server_default="sqlite")
+
     is_active = Column(Boolean, default=True)
 
+    # SHA-256 of the question's seed JSON; lets the seeder skip unchanged rows
+    content_hash = Column(String(64))
+
     # ✅ ADD THIS
     test_cases = relationship(
         "TestCase",
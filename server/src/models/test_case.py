@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey
+from typing import Optional, Tuple
+
+from sqlalchemy import Column, Integer, Text, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from src.db.database import Base
@@ -8,7 +10,30 @@ class TestCase(Base):
 
     id = Column(Integer, primary_key=True)
     question_id = Column(Integer, ForeignKey("questions.id"))
+    # Shared dataset the test case runs against; setup_sql is only used by
+    # test cases written before datasets existed
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), index=True)
     setup_sql = Column(Text)
-    expected_output = Column(JSONB)
+    # Small script applied on top of the dataset for this test case only
+    delta_sql = Column(Text)
+    expected_output = Column(JSONB().with_variant(JSON(), "sqlite"))
+    # Set for data-modifying questions, which are graded on the final state
+    # of these tables: table name -> rows_fingerprint(), or null if the
+    # table must not exist
+    expected_state = Column(JSONB().with_variant(JSON(), "sqlite"))
+
+    question = relationship("Question", back_populates="test_cases")
+    dataset = relationship("Dataset")
+
+    @property
+    def fixture(self) -> Tuple[str, Optional[str]]:
+        """(base setup script, delta script) that build this test case's database"""
+        if self.dataset is not None:
+            return self.dataset.setup_sql, self.delta_sql
+        return self.setup_sql or "", self.delta_sql
 
-    question = relationship("Question", back_populates="test_cases")
\ No newline at end of file
+    @property
+    def full_setup_sql(self) -> str:
+        """Dataset and delta as a single script"""
+        setup_sql, delta_sql = self.fixture
+        return f"{setup_sql}\n{delta_sql}" if delta_sql else setup_sql
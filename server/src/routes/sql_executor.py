@@ -1,9 +1,22 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from src.db.database import get_db
+import json
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+from src.auth.dependencies import require_admin
+from src.config import settings
+from src.db.database import get_read_db
 from src.models.question import Question
 from src.models.test_case import TestCase
-from src.services.sql_engine import execute_sql_safely
+from src.core.admission import admit_grading
+from src.core.metrics import record_grading
+from src.services.bulk_grading import BulkInputError, bulk_grader, detect_format, load_cases, parse_items
+from src.services.executor_pool import executor_pool
+from src.services.sql_engine import GradingCase
+from src.services.submission_capture import submission_capture
 
 router = APIRouter(prefix="/api/sql", tags=["SQL Engine"])
 
@@ -11,35 +24,105 @@ router = APIRouter(prefix="/api/sql", tags=["SQL Engine"])
 @router.post("/execute")
 def execute_sql(
     payload: dict,
-    db: Session = Depends(get_db)
+    # Before the session, so a rejected submission never opens one
+    estimated_cost: Optional[float] = Depends(admit_grading),
+    db: Session = Depends(get_read_db)
 ):
-    question_id = payload["question_id"]
-    user_sql = payload["sql"]
+    try:
+        question_id = int(payload["question_id"])
+        user_sql = payload["sql"]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="question_id (an integer) and sql are required")
+    start = time.perf_counter()
 
-    test_cases = db.query(TestCase).filter(
+    # The question's dialect rides along on the same query (one per submission)
+    test_cases = db.query(TestCase, Question.dialect).join(
+        Question, Question.id == TestCase.question_id
+    ).options(joinedload(TestCase.dataset)).filter(
         TestCase.question_id == question_id
     ).all()
+    # Before anything is graded or recorded: unknown IDs must not mint metric series
+    if not test_cases:
+        raise HTTPException(status_code=404, detail="Question not found")
 
-    results = []
+    cases = [
+        GradingCase(*test_case.fixture, test_case.expected_output, test_case.expected_state, dialect)
+        for test_case, dialect in test_cases
+    ]
+    body, verdict = executor_pool.grade(cases, user_sql)
 
-    for index, test_case in enumerate(test_cases):
-        execution = execute_sql_safely(
-            test_case.setup_sql,
-            user_sql,
-            test_case.expected_output
-        )
+    seconds = time.perf_counter() - start
+    dialect = cases[0].dialect
+    record_grading(question_id, dialect, verdict, seconds)
+    submission_capture.record(question_id, dialect, user_sql, verdict, seconds, body.get("error"))
+
+    return body
+
+
+def _limit_body(request: Request, limit: int) -> Request:
+    """
+    The request, with its body cut off by a 413 once more than limit bytes arrive
+
+    Covers chunked uploads and bodies longer than their Content-Length,
+    whether the body is then read whole or parsed as a form.
+    """
+    received = 0
 
-        if "error" in execution:
-            return execution
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise HTTPException(status_code=413, detail=f"Uploads are limited to {limit} bytes")
+        return message
 
-        results.append({
-            "test_case": index + 1,
-            "passed": execution["passed"]
-        })
+    return Request(request.scope, receive)
+
+
+@router.post("/bulk", dependencies=[Depends(require_admin)])
+async def bulk_grade(request: Request):
+    """
+    Grade many (student_ref, question_id, sql) items at once (admin only)
+
+    The batch is the request body, as JSON (`[...]` or `{"items": [...]}`),
+    JSONL (`application/x-ndjson`) or CSV (`text/csv`, with a
+    student_ref,question_id,sql header), or a multipart upload of such a file
+    in the `file` field. Results stream back as NDJSON in completion order:
+    one line per item with its `index` in the batch, then a `summary` line.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if content_length > settings.BULK_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {settings.BULK_MAX_UPLOAD_BYTES} bytes")
+    request = _limit_body(request, settings.BULK_MAX_UPLOAD_BYTES)
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected the batch in a file field named 'file'")
+        fmt = detect_format(upload.content_type, upload.filename)
+        data = await upload.read()
+    else:
+        fmt = detect_format(content_type)
+        data = await request.body()
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send JSON, JSONL (application/x-ndjson) or CSV (text/csv)")
+
+    try:
+        items, errors = await run_in_threadpool(
+            parse_items, data, fmt, settings.BULK_MAX_ITEMS, settings.BULK_MAX_SQL_CHARS
+        )
+    except BulkInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cases = await run_in_threadpool(load_cases, sorted({item.question_id for item in items}))
 
-    all_passed = all(r["passed"] for r in results)
+    async def lines():
+        async for result in bulk_grader.grade(items, cases, errors):
+            yield json.dumps(result, default=str) + "\n"
 
-    return {
-        "passed": all_passed,
-        "details": results
-    }
\ No newline at end of file
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,8 +1,16 @@
 from .upload import UploadURLRequest, UploadURLResponse
-from .health import HealthResponse
+from .health import HealthResponse, ReadinessResponse
+from .profiling import ProfileTokenRequest, ProfileTokenResponse
+from .contest import ContestCreateRequest, ContestResponse, ContestSubmitRequest
 
 __all__ = [
     "UploadURLRequest",
     "UploadURLResponse",
     "HealthResponse",
+    "ReadinessResponse",
+    "ProfileTokenRequest",
+    "ProfileTokenResponse",
+    "ContestCreateRequest",
+    "ContestResponse",
+    "ContestSubmitRequest",
 ]
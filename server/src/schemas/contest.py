@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class ContestCreateRequest(BaseModel):
+    """
+    Request schema for defining a contest
+    """
+    slug: str = Field(..., min_length=1, max_length=255, pattern=r"^[a-z0-9][a-z0-9-]*$")
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    starts_at: datetime = Field(..., description="Submissions open (ISO 8601; UTC when no offset is given)")
+    ends_at: datetime = Field(..., description="Submissions close")
+    question_ids: List[int] = Field(..., min_length=1, description="Contest questions, in display order")
+
+    @model_validator(mode="after")
+    def check_window(self):
+        if self.ends_at <= self.starts_at:
+            raise ValueError("ends_at must be after starts_at")
+        if len(set(self.question_ids)) != len(self.question_ids):
+            raise ValueError("question_ids must not repeat")
+        return self
+
+
+class ContestResponse(BaseModel):
+    """
+    Contest schema; question_ids stay empty until the contest starts
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    slug: str
+    title: str
+    description: Optional[str] = None
+    starts_at: datetime
+    ends_at: datetime
+    status: str = Field(..., description="upcoming | running | ended")
+    question_ids: List[int] = []
+
+
+class ContestSubmitRequest(BaseModel):
+    """
+    Request schema for a contest submission
+    """
+    question_id: int
+    sql: str = Field(..., min_length=1)
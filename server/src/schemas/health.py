@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 from pydantic import BaseModel
 
 
@@ -7,3 +9,12 @@ class HealthResponse(BaseModel):
     """
     status: str
     message: str
+
+
+class ReadinessResponse(BaseModel):
+    """
+    Readiness check response schema
+    """
+    status: str
+    warmup: Dict[str, Any]
+    admission: Dict[str, Any]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+
+class ProfileTokenRequest(BaseModel):
+    """
+    Request schema for a signed on-demand profiling token
+    """
+    method: str = Field("POST", description="HTTP method of the request to profile")
+    path: str = Field(..., description="Exact request path, e.g. /api/sql/execute", min_length=1)
+    ttl_seconds: int = Field(300, description="How long the token stays valid", ge=1, le=86400)
+
+
+class ProfileTokenResponse(BaseModel):
+    """
+    Signed token to send in the X-Profile header (or __profile query parameter)
+    """
+    token: str
+    expires_at: int
@@ -4,8 +4,11 @@ from typing import List, Optional, Any
 class TestCaseResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    setup_sql: str
+    # Dataset plus per-case delta, so clients can rebuild the database
+    setup_sql: str = Field(validation_alias="full_setup_sql")
+    dataset_id: Optional[int] = None
     expected_output: Any
+    expected_state: Optional[Any] = None
 
 class QuestionResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -20,5 +23,6 @@ class QuestionResponse(BaseModel):
     examples: Optional[Any] = None
     hints: Optional[List[str]] = []
     solution: Optional[str] = None
+    dialect: str = "sqlite"
     test_cases: List[TestCaseResponse] = []
 
@@ -0,0 +1,330 @@
+"""
+Bulk grading
+
+Grades a whole class's answers in one request: a batch of
+(student_ref, question_id, sql) items, as JSON, JSONL or CSV. Instead of one
+HTTP call and one test case query per answer:
+
+- the test cases of every question in the batch are loaded with one query;
+- items are grouped by question and split into chunks that are graded in a
+  pool of BULK_PROCESSES worker processes, so grading uses the spare cores
+  and the event loop stays free. The pool is capped one below the core
+  count, leaving a core for interactive grading on the same host;
+- every worker keeps built fixtures in its own fixture cache (or the shared
+  store with SHARED_FIXTURE_DIR), so a question's fixture is built once per
+  process, not once per answer;
+- results are streamed back as NDJSON, one line per item as its chunk
+  completes, then a summary line.
+
+Each question's items are split into at most BULK_CHUNK_SIZE per chunk and
+into at least as many chunks as there are processes, so even a single-question
+batch spreads over every core.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from src.config import settings
+from src.core.metrics import record_grading
+
+logger = logging.getLogger("sqltown.bulk")
+
+FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+    "text/csv": "csv",
+}
+SUFFIXES = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+
+class BulkInputError(ValueError):
+    """The upload as a whole cannot be read"""
+
+
+class BulkItem(NamedTuple):
+    index: int
+    student_ref: str
+    question_id: int
+    sql: str
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    """json, jsonl or csv from a file name or content type"""
+    if filename:
+        fmt = SUFFIXES.get(os.path.splitext(filename)[1].lower())
+        if fmt:
+            return fmt
+    return FORMATS.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _records(data: bytes, fmt: str) -> List[Any]:
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BulkInputError("Upload must be UTF-8")
+
+    if fmt == "json":
+        try:
+            document = json.loads(text)
+        except ValueError as e:
+            raise BulkInputError(f"Invalid JSON: {e}")
+        if isinstance(document, dict):
+            document = document.get("items")
+        if not isinstance(document, list):
+            raise BulkInputError('Expected a list of items or {"items": [...]}')
+        return document
+
+    if fmt == "jsonl":
+        records = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                records.append(f"line {number}: invalid JSON ({e})")
+        return records
+
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    missing = {"student_ref", "question_id", "sql"} - set(reader.fieldnames or [])
+    if missing:
+        raise BulkInputError(f"CSV header is missing {', '.join(sorted(missing))}")
+    return list(reader)
+
+
+def parse_items(data: bytes, fmt: str, max_items: int, max_sql_chars: int) -> Tuple[List[BulkItem], List[Dict[str, Any]]]:
+    """
+    Items of an upload, and an error line for every record that is not one
+
+    Raises:
+        BulkInputError: The upload is unreadable or has more than max_items records
+    """
+    records = _records(data, fmt)
+    if len(records) > max_items:
+        raise BulkInputError(f"At most {max_items} items per request, got {len(records)}")
+
+    items = []
+    errors = []
+    for index, record in enumerate(records):
+        if isinstance(record, str):
+            errors.append({"index": index, "error": record})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"index": index, "error": "Item must be an object"})
+            continue
+        student_ref = record.get("student_ref")
+        sql = record.get("sql")
+        try:
+            question_id = int(record.get("question_id"))
+        except (TypeError, ValueError):
+            errors.append({"index": index, "student_ref": student_ref, "error": "question_id must be an integer"})
+            continue
+        if not isinstance(sql, str) or not sql.strip():
+            errors.append({"index": index, "student_ref": student_ref, "question_id": question_id, "error": "sql is required"})
+            continue
+        if len(sql) > max_sql_chars:
+            errors.append({
+                "index": index, "student_ref": student_ref, "question_id": question_id,
+                "error": f"sql is longer than {max_sql_chars} characters",
+            })
+            continue
+        items.append(BulkItem(index, "" if student_ref is None else str(student_ref), question_id, sql))
+    return items, errors
+
+
+def load_cases(question_ids: List[int]) -> Dict[int, list]:
+    """question_id -> [GradingCase] for every question with test cases (one query)"""
+    from sqlalchemy.orm import joinedload
+
+    from src.db.database import read_router
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+    from src.services.sql_engine import GradingCase
+
+    db = read_router.open_session()
+    try:
+        rows = db.query(TestCase, Question.dialect).join(
+            Question, Question.id == TestCase.question_id
+        ).options(joinedload(TestCase.dataset)).filter(
+            TestCase.question_id.in_(question_ids)
+        ).order_by(TestCase.id).all()
+    finally:
+        db.close()
+
+    cases: Dict[int, list] = {}
+    for test_case, dialect in rows:
+        cases.setdefault(test_case.question_id, []).append(
+            GradingCase(*test_case.fixture, test_case.expected_output, test_case.expected_state, dialect)
+        )
+    return cases
+
+
+def _init_worker() -> None:
+    from src.services.fixture_cache import fixture_cache
+
+    if fixture_cache.shared is not None:
+        fixture_cache.shared.attach()
+
+
+def grade_chunk(cases: list, submissions: List[Tuple[int, str]]) -> List[Tuple[int, Dict[str, Any], str, float]]:
+    """(index, body, verdict, seconds) per submission; runs in a worker process"""
+    from src.services.sql_engine import grade_submission
+
+    results = []
+    for index, sql in submissions:
+        start = time.perf_counter()
+        try:
+            body, verdict = grade_submission(cases, sql)
+        except Exception as e:
+            body, verdict = {"error": str(e)}, "error"
+        results.append((index, body, verdict, time.perf_counter() - start))
+    return results
+
+
+class BulkGrader:
+    """
+    Process pool for bulk grading (one per API worker, started on first use)
+    """
+
+    def __init__(self, processes: int, chunk_size: int):
+        self.processes = max(processes, 1)
+        self.chunk_size = max(chunk_size, 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs threads (threadpool, health checks) is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def chunks(self, items: List[BulkItem]) -> List[List[BulkItem]]:
+        """Items split by question, then into chunks of at most chunk_size"""
+        by_question: Dict[int, List[BulkItem]] = {}
+        for item in items:
+            by_question.setdefault(item.question_id, []).append(item)
+
+        chunks = []
+        for group in by_question.values():
+            size = min(self.chunk_size, math.ceil(len(group) / self.processes))
+            chunks.extend(group[start:start + size] for start in range(0, len(group), size))
+        return chunks
+
+    async def grade(
+        self,
+        items: List[BulkItem],
+        cases: Dict[int, list],
+        errors: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Result per item as it completes (input errors first), then a summary
+
+        Pending chunks are cancelled when the consumer stops early.
+        """
+        started = time.perf_counter()
+        verdicts: Counter = Counter()
+        for error in errors:
+            verdicts["invalid"] += 1
+            yield error
+
+        loop = asyncio.get_running_loop()
+        pool = self.pool()
+        pending: Dict[asyncio.Future, List[BulkItem]] = {}
+        for chunk in self.chunks(items):
+            question_cases = cases.get(chunk[0].question_id)
+            if not question_cases:
+                for item in chunk:
+                    verdicts["invalid"] += 1
+                    yield {
+                        "index": item.index,
+                        "student_ref": item.student_ref,
+                        "question_id": item.question_id,
+                        "error": "Question not found",
+                    }
+                continue
+            future = loop.run_in_executor(
+                pool, grade_chunk, question_cases, [(item.index, item.sql) for item in chunk]
+            )
+            pending[future] = chunk
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    by_index = {item.index: item for item in chunk}
+                    question_cases = cases[chunk[0].question_id]
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool:
+                        # A worker died (e.g. out of memory); start a fresh pool next time
+                        self._reset()
+                        results = [(item.index, {"error": "Grading worker crashed"}, "error", 0.0) for item in chunk]
+                    except Exception as e:
+                        logger.exception("Bulk grading chunk failed")
+                        results = [(item.index, {"error": str(e)}, "error", 0.0) for item in chunk]
+
+                    for index, body, verdict, seconds in results:
+                        item = by_index[index]
+                        verdicts[verdict] += 1
+                        record_grading(item.question_id, question_cases[0].dialect, verdict, seconds)
+                        yield {
+                            "index": index,
+                            "student_ref": item.student_ref,
+                            "question_id": item.question_id,
+                            "verdict": verdict,
+                            "duration_ms": round(seconds * 1000, 3),
+                            **body,
+                        }
+        finally:
+            for future in pending:
+                future.cancel()
+
+        elapsed = time.perf_counter() - started
+        total = len(items) + len(errors)
+        yield {
+            "summary": {
+                "items": total,
+                "verdicts": dict(verdicts),
+                "seconds": round(elapsed, 3),
+                "items_per_second": round(total / elapsed, 1) if elapsed else None,
+                "processes": self.processes,
+            }
+        }
+
+    def _reset(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+def pool_size(configured: int) -> int:
+    """Processes for BULK_PROCESSES (0: all cores), leaving one core free"""
+    cores = os.cpu_count() or 1
+    return max(min(configured or cores, cores - 1), 1)
+
+
+bulk_grader = BulkGrader(
+    processes=pool_size(settings.BULK_PROCESSES),
+    chunk_size=settings.BULK_CHUNK_SIZE,
+)
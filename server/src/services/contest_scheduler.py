@@ -0,0 +1,499 @@
+"""
+Fair-share grading for contests
+
+In a contest, a handful of users resubmitting in a loop, or one question with
+expensive fixtures, would otherwise fill the threadpool while everyone else
+waits. Contest submissions go through this scheduler instead of straight to
+grading:
+
+- Deficit round robin across users. Each user with queued submissions is
+  credited CONTEST_DRR_QUANTUM_SECONDS per round and a submission is graded
+  once the user's credit covers its estimated cost (the question's moving
+  average grading time, shared with admission control). A user submitting
+  expensive questions gets proportionally fewer turns, not more time.
+- At most CONTEST_MAX_INFLIGHT_PER_USER submissions per user are graded at
+  once, and at most CONTEST_MAX_QUEUED_PER_USER wait (429 beyond that).
+- Two tiers: a user's first submission to a question is served before any
+  resubmission, so trying again never delays someone's first attempt.
+  Resubmissions that have waited CONTEST_RESUBMIT_PROMOTE_SECONDS join the
+  first tier, so a steady stream of first attempts cannot starve them.
+- CONTEST_GRADING_SLOTS submissions are graded at a time, in the threadpool.
+
+Whenever a submission finishes, and every CONTEST_POSITION_UPDATE_SECONDS
+while any are queued, the estimated position of each queued submission is
+recomputed (jobs expected to be dispatched before it under the current queue
+contents) and pushed to its listener when it changed.
+
+The scheduler lives on the event loop of one worker, so no locking is
+needed; with several workers each one schedules its own share of the
+traffic.
+"""
+import asyncio
+import bisect
+import logging
+import math
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.core.admission import admission_controller
+from src.core.metrics import CONTEST_QUEUE_WAIT, CONTEST_QUEUED, record_grading
+
+logger = logging.getLogger("sqltown.contests")
+
+FIRST = "first"
+RESUBMIT = "resubmit"
+TIERS = (FIRST, RESUBMIT)
+
+# Estimates below this would let one user drain a whole round's credit at once
+MIN_COST_SECONDS = 0.001
+
+
+class ContestJob:
+    """
+    One queued or running contest submission
+    """
+
+    __slots__ = (
+        "id", "contest_id", "user_id", "question_id", "sql", "tier", "cost",
+        "submitted_at", "enqueued", "started", "state", "position", "future", "updates",
+    )
+
+    def __init__(self, contest_id: int, user_id: str, question_id: int, sql: str, tier: str, cost: float):
+        self.id = uuid.uuid4().hex
+        self.contest_id = contest_id
+        self.user_id = user_id
+        self.question_id = question_id
+        self.sql = sql
+        self.tier = tier
+        self.cost = cost
+        self.submitted_at = datetime.now(timezone.utc)
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.state = "queued"  # queued | running | done | cancelled
+        self.position: Optional[int] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Progress events for a streaming client; None when nobody listens
+        self.updates: Optional[asyncio.Queue] = None
+
+    @property
+    def key(self) -> Tuple[int, str, int]:
+        return (self.contest_id, self.user_id, self.question_id)
+
+    def push(self, event: str, **data: Any) -> None:
+        if self.updates is not None:
+            self.updates.put_nowait((event, {"submission_id": self.id, **data}))
+
+
+class _Flow:
+    """A user's queued submissions in one tier, with their round robin credit"""
+
+    __slots__ = ("jobs", "deficit", "turn")
+
+    def __init__(self):
+        self.jobs: Deque[ContestJob] = deque()
+        self.deficit = 0.0
+        # True while the user holds the current turn (credit already granted)
+        self.turn = False
+
+
+def grade_contest_job(job: ContestJob, queue_seconds: float) -> Dict[str, Any]:
+    """
+    Grade a submission and record it (runs in the threadpool)
+
+    Returns:
+        The same body /api/sql/execute returns, plus the verdict
+    """
+    from sqlalchemy.orm import joinedload
+
+    from src.db.database import SessionLocal
+    from src.models.contest import ContestSubmission
+    from src.models.question import Question
+    from src.models.test_case import TestCase
+    from src.services.executor_pool import executor_pool
+    from src.services.sql_engine import GradingCase
+    from src.services.submission_capture import submission_capture
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        test_cases = db.query(TestCase, Question.dialect).join(
+            Question, Question.id == TestCase.question_id
+        ).options(joinedload(TestCase.dataset)).filter(
+            TestCase.question_id == job.question_id
+        ).all()
+        cases = [
+            GradingCase(*test_case.fixture, test_case.expected_output, test_case.expected_state, dialect)
+            for test_case, dialect in test_cases
+        ]
+        body, verdict = executor_pool.grade(cases, job.sql)
+        seconds = time.perf_counter() - start
+
+        db.add(ContestSubmission(
+            contest_id=job.contest_id,
+            user_id=job.user_id,
+            question_id=job.question_id,
+            verdict=verdict,
+            queue_seconds=round(queue_seconds, 6),
+            grading_seconds=round(seconds, 6),
+            submitted_at=job.submitted_at,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    dialect = cases[0].dialect if cases else "sqlite"
+    record_grading(job.question_id if cases else None, dialect, verdict, seconds)
+    submission_capture.record(job.question_id, dialect, job.sql, verdict, seconds, body.get("error"))
+    return {**body, "verdict": verdict, "grading_seconds": round(seconds, 6)}
+
+
+class ContestScheduler:
+    """
+    Per-user deficit round robin in front of contest grading (one per worker)
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        quantum: float,
+        max_inflight_per_user: int,
+        max_queued_per_user: int,
+        promote_after: float,
+        update_interval: float = 0.5
+    ):
+        """
+        Raises:
+            ValueError: If the quantum is not a positive number of seconds
+        """
+        if not 0 < quantum < math.inf:
+            raise ValueError(f"DRR quantum must be a positive number of seconds, got {quantum!r}")
+        self.slots = max(slots, 1)
+        self.quantum = quantum
+        self.max_inflight_per_user = max(max_inflight_per_user, 1)
+        self.max_queued_per_user = max_queued_per_user
+        self.promote_after = promote_after
+        self.update_interval = update_interval
+        self.grade = grade_contest_job
+
+        self._flows: Dict[str, Dict[str, _Flow]] = {tier: {} for tier in TIERS}
+        # Users with queued submissions per tier, in round robin order
+        self._rings: Dict[str, Deque[str]] = {tier: deque() for tier in TIERS}
+        self._queued: Counter = Counter()  # user -> queued submissions
+        self._inflight: Counter = Counter()  # user -> submissions being graded
+        self._pending: Counter = Counter()  # (contest, user, question) -> queued or running
+        self._jobs: Dict[str, ContestJob] = {}
+        self._running = 0
+        self._tasks: set = set()
+        self._notifier: Optional[asyncio.Task] = None
+        self.graded = 0
+        self.rejected = 0
+
+    # -- submission ---------------------------------------------------------
+
+    def is_pending(self, contest_id: int, user_id: str, question_id: int) -> bool:
+        """True while the user has a submission to this question queued or running"""
+        return self._pending[(contest_id, user_id, question_id)] > 0
+
+    def submit(
+        self,
+        contest_id: int,
+        user_id: str,
+        question_id: int,
+        sql: str,
+        first: bool,
+        listen: bool = False
+    ) -> ContestJob:
+        """
+        Queue a submission
+
+        Args:
+            first: The user has no graded submission to this question yet
+                (a pending one makes this a resubmission regardless)
+            listen: Collect progress events in the job's `updates` queue
+
+        Raises:
+            HTTPException: 429 when the user already has
+                CONTEST_MAX_QUEUED_PER_USER submissions waiting
+        """
+        if self._queued[user_id] >= self.max_queued_per_user:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"You already have {self._queued[user_id]} submissions waiting to be graded",
+                headers={"Retry-After": str(max(math.ceil(self.estimated_wait(user_id)), 1))}
+            )
+
+        tier = FIRST if first and not self.is_pending(contest_id, user_id, question_id) else RESUBMIT
+        cost = max(admission_controller.estimate(question_id), MIN_COST_SECONDS)
+        job = ContestJob(contest_id, user_id, question_id, sql, tier, cost)
+        if listen:
+            job.updates = asyncio.Queue()
+        self._enqueue(job, tier)
+        self._queued[user_id] += 1
+        self._pending[job.key] += 1
+        self._jobs[job.id] = job
+
+        self._dispatch()
+        if job.state == "queued":
+            self.refresh_positions()
+            self._ensure_notifier()
+        return job
+
+    def cancel(self, job: ContestJob) -> bool:
+        """Withdraw a submission that has not started grading"""
+        if job.state != "queued":
+            return False
+        flows = self._flows[job.tier]
+        flow = flows[job.user_id]
+        flow.jobs.remove(job)
+        if not flow.jobs:
+            self._drop_flow(job.tier, job.user_id)
+        CONTEST_QUEUED.labels(job.tier).dec()
+        self._queued[job.user_id] -= 1
+        self._forget(job)
+        job.state = "cancelled"
+        job.future.cancel()
+        return True
+
+    def _enqueue(self, job: ContestJob, tier: str) -> None:
+        job.tier = tier
+        flows = self._flows[tier]
+        flow = flows.get(job.user_id)
+        if flow is None:
+            flow = flows[job.user_id] = _Flow()
+            self._rings[tier].append(job.user_id)
+        flow.jobs.append(job)
+        CONTEST_QUEUED.labels(tier).inc()
+
+    def _drop_flow(self, tier: str, user_id: str) -> None:
+        # An emptied flow loses its leftover credit, as in plain DRR
+        del self._flows[tier][user_id]
+        self._rings[tier].remove(user_id)
+
+    def _forget(self, job: ContestJob) -> None:
+        self._pending[job.key] -= 1
+        if self._pending[job.key] <= 0:
+            del self._pending[job.key]
+        if self._queued[job.user_id] <= 0:
+            self._queued.pop(job.user_id, None)
+        self._jobs.pop(job.id, None)
+
+    # -- scheduling ---------------------------------------------------------
+
+    def _promote(self) -> None:
+        """Move resubmissions that have waited long enough into the first tier"""
+        if not self._flows[RESUBMIT]:
+            return
+        cutoff = time.monotonic() - self.promote_after
+        for user_id, flow in list(self._flows[RESUBMIT].items()):
+            while flow.jobs and flow.jobs[0].enqueued <= cutoff:
+                job = flow.jobs.popleft()
+                CONTEST_QUEUED.labels(RESUBMIT).dec()
+                self._enqueue(job, FIRST)
+            if not flow.jobs:
+                self._drop_flow(RESUBMIT, user_id)
+
+    def _eligible(self, user_id: str) -> bool:
+        return self._inflight[user_id] < self.max_inflight_per_user
+
+    def _pick(self, tier: str) -> Optional[ContestJob]:
+        """Next submission of a tier in deficit round robin order, if any user may run one"""
+        ring = self._rings[tier]
+        flows = self._flows[tier]
+        while ring:
+            for _ in range(len(ring)):
+                user_id = ring[0]
+                flow = flows[user_id]
+                if not self._eligible(user_id):
+                    flow.turn = False
+                    ring.rotate(-1)
+                    continue
+                if not flow.turn:
+                    flow.deficit += self.quantum
+                    flow.turn = True
+                job = flow.jobs[0]
+                if flow.deficit >= job.cost:
+                    # The user keeps the turn while the credit lasts
+                    flow.deficit -= job.cost
+                    flow.jobs.popleft()
+                    if not flow.jobs:
+                        self._drop_flow(tier, user_id)
+                    return job
+                flow.turn = False
+                ring.rotate(-1)
+
+            # Nobody could afford their next submission this round: grant the
+            # rounds it takes the closest one to get there all at once
+            waiting = [flows[user_id] for user_id in ring if self._eligible(user_id)]
+            if not waiting:
+                return None
+            rounds = min(math.ceil((flow.jobs[0].cost - flow.deficit) / self.quantum) for flow in waiting)
+            for flow in waiting:
+                flow.deficit += max(rounds - 1, 0) * self.quantum
+        return None
+
+    def _dispatch(self) -> None:
+        """Start grading queued submissions while slots are free"""
+        self._promote()
+        while self._running < self.slots:
+            job = self._pick(FIRST) or self._pick(RESUBMIT)
+            if job is None:
+                return
+            self._start(job)
+
+    def _start(self, job: ContestJob) -> None:
+        CONTEST_QUEUED.labels(job.tier).dec()
+        self._queued[job.user_id] -= 1
+        self._inflight[job.user_id] += 1
+        self._running += 1
+        job.state = "running"
+        job.started = time.monotonic()
+        job.position = 0
+        CONTEST_QUEUE_WAIT.labels(job.tier).observe(job.started - job.enqueued)
+        job.push("running", queued_seconds=round(job.started - job.enqueued, 3))
+
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: ContestJob) -> None:
+        start = time.perf_counter()
+        try:
+            result = await run_in_threadpool(self.grade, job, job.started - job.enqueued)
+        except Exception as e:
+            logger.exception("Grading contest submission %s failed", job.id)
+            job.push("error", detail="Grading failed")
+            if not job.future.done() and job.updates is None:
+                job.future.set_exception(e)
+        else:
+            admission_controller.observe(job.question_id, time.perf_counter() - start)
+            self.graded += 1
+            job.push("result", tier=job.tier, **result)
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            job.state = "done"
+            self._running -= 1
+            self._inflight[job.user_id] -= 1
+            if self._inflight[job.user_id] <= 0:
+                del self._inflight[job.user_id]
+            self._forget(job)
+            self._dispatch()
+            if self._queued:
+                self.refresh_positions()
+
+    # -- queue positions ----------------------------------------------------
+
+    def _estimate_tier(self, tier: str, jobs_before: int, work_before: float) -> None:
+        """
+        Position and expected wait of every queued submission in a tier
+
+        Round robin serves users in proportion to their credit, so a submission
+        whose user has `c` seconds of work queued up to and including it goes
+        after everyone else's submissions up to about `c` cumulative seconds.
+        """
+        prefixes: List[Tuple[List[float], Deque[ContestJob]]] = []
+        for user_id in self._rings[tier]:
+            jobs = self._flows[tier][user_id].jobs
+            total = 0.0
+            cumulative = []
+            for job in jobs:
+                total += job.cost
+                cumulative.append(total)
+            prefixes.append((cumulative, jobs))
+
+        for index, (cumulative, jobs) in enumerate(prefixes):
+            for position_in_flow, job in enumerate(jobs):
+                own = cumulative[position_in_flow]
+                ahead = position_in_flow
+                work = own - job.cost
+                for other, (other_cumulative, _) in enumerate(prefixes):
+                    if other == index:
+                        continue
+                    # On a tie, users earlier in the ring go first
+                    if other < index:
+                        served = bisect.bisect_right(other_cumulative, own)
+                    else:
+                        served = bisect.bisect_left(other_cumulative, own)
+                    ahead += served
+                    work += other_cumulative[served - 1] if served else 0.0
+                position = jobs_before + ahead + 1
+                wait = (work_before + work) / self.slots
+                if position != job.position:
+                    job.position = position
+                    job.push("queued", position=position, estimated_wait_seconds=round(wait, 2), tier=tier)
+
+    def refresh_positions(self) -> None:
+        """Recompute queue positions and push the ones that changed"""
+        self._promote()
+        # Work still in flight delays everyone equally
+        running = [job for job in self._jobs.values() if job.state == "running"]
+        work_running = sum(
+            max(job.cost - (time.monotonic() - job.started), 0.0) for job in running
+        )
+        first = self._flows[FIRST].values()
+        self._estimate_tier(FIRST, 0, work_running)
+        self._estimate_tier(
+            RESUBMIT,
+            sum(len(flow.jobs) for flow in first),
+            work_running + sum(job.cost for flow in first for job in flow.jobs),
+        )
+
+    def estimated_wait(self, user_id: str) -> float:
+        """Seconds until the user's queued submissions should all have started"""
+        waits = [
+            job.position for job in self._jobs.values()
+            if job.user_id == user_id and job.state == "queued" and job.position
+        ]
+        per_job = sum(job.cost for job in self._jobs.values()) / max(len(self._jobs), 1)
+        return max(waits, default=1) * per_job / self.slots
+
+    def _ensure_notifier(self) -> None:
+        if self._notifier is None or self._notifier.done():
+            self._notifier = asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self) -> None:
+        # Runs while anything is queued; started again by the next submission
+        while any(self._rings[tier] for tier in TIERS):
+            await asyncio.sleep(self.update_interval)
+            self._dispatch()
+            self.refresh_positions()
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "running": self._running,
+            "queued": {tier: sum(len(flow.jobs) for flow in self._flows[tier].values()) for tier in TIERS},
+            "users_queued": len(self._queued),
+            "users_running": len(self._inflight),
+            "graded": self.graded,
+            "rejected": self.rejected,
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel queued submissions and wait for the ones being graded"""
+        for job in list(self._jobs.values()):
+            self.cancel(job)
+        if self._notifier is not None:
+            self._notifier.cancel()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=10)
+
+
+contest_scheduler = ContestScheduler(
+    slots=settings.CONTEST_GRADING_SLOTS,
+    quantum=settings.CONTEST_DRR_QUANTUM_SECONDS,
+    max_inflight_per_user=settings.CONTEST_MAX_INFLIGHT_PER_USER,
+    max_queued_per_user=settings.CONTEST_MAX_QUEUED_PER_USER,
+    promote_after=settings.CONTEST_RESUBMIT_PROMOTE_SECONDS,
+    update_interval=settings.CONTEST_POSITION_UPDATE_SECONDS,
+)
@@ -0,0 +1,367 @@
+"""
+Compiled datasets
+
+Uploaded .sql dumps are content-addressed by their SHA-256. A dump that has
+not been seen before is executed once in a sandboxed scratch SQLite database;
+if it runs cleanly the result is vacuumed into a compact image and stored
+next to the raw dump together with its schema and row counts:
+
+    datasets/<sha256[:12]>-<name>.sql   raw dump (shown by /api/list-databases)
+    compiled/<sha256>.sqlite            ready-to-query SQLite image
+    compiled/<sha256>.json              metadata, written last
+
+Uploading a dump that is already known skips all of that. Consumers open the
+image read-only with immutable=1 instead of replaying the script.
+
+ingest_dataset_async() splits the work between two bounded executors:
+hashing and compiling run on this module's compile executor
+(DATASET_COMPILE_WORKERS threads), and only the S3 calls go to the S3
+service's executor, so a slow compile never holds an S3 thread.
+"""
+import asyncio
+import contextvars
+import functools
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from src.config import settings
+from src.integrations.s3_service import S3Service, s3_service
+from src.utils.sql_statements import split_statements
+from src.utils.sqlite_images import open_readonly_image
+from src.utils.sqlite_sandbox import sandbox_authorizer
+
+METADATA_VERSION = 1
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+T = TypeVar("T")
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# The sandbox runs the whole dump in its own transaction, so the dump's
+# transaction statements are skipped
+TRANSACTION_CONTROL_RE = re.compile(
+    r"^(?:\s|--[^\n]*(?:\n|$)|/\*.*?\*/)*(?:BEGIN|COMMIT|END)\b", re.IGNORECASE | re.DOTALL
+)
+
+
+class DatasetValidationError(Exception):
+    """
+    Raised when an uploaded dump cannot be compiled into a database
+    """
+
+
+def image_key(sha256: str) -> str:
+    return f"compiled/{sha256}.sqlite"
+
+
+def metadata_key(sha256: str) -> str:
+    return f"compiled/{sha256}.json"
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable stream; the stream is rewound afterwards"""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def iter_statements(stream: BinaryIO, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Split a dump into single statements, reading it line by line
+
+    Raises:
+        DatasetValidationError: If the dump is not valid text
+    """
+    try:
+        yield from split_statements(raw_line.decode(encoding) for raw_line in stream)
+    except UnicodeDecodeError as e:
+        raise DatasetValidationError(f"Dump is not valid {encoding} text: {e}")
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def describe_database(conn: sqlite3.Connection) -> Dict[str, List[Dict]]:
+    """Tables (with columns and row counts) and views of a database"""
+    tables = []
+    views = []
+    objects = conn.execute(
+        "SELECT type, name FROM sqlite_master "
+        "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    for object_type, name in objects:
+        if object_type == "view":
+            views.append({"name": name})
+            continue
+        columns = [
+            {"name": column[1], "type": column[2], "not_null": bool(column[3]), "primary_key": bool(column[5])}
+            for column in conn.execute(f"PRAGMA table_info({_quote_identifier(name)})")
+        ]
+        row_count = conn.execute(f"SELECT COUNT(*) FROM {_quote_identifier(name)}").fetchone()[0]
+        tables.append({"name": name, "columns": columns, "row_count": row_count})
+    return {"tables": tables, "views": views}
+
+
+def compile_dump(stream: BinaryIO, workdir: str) -> Tuple[str, Dict[str, List[Dict]]]:
+    """
+    Execute a dump in a sandboxed scratch database and vacuum it into an image
+
+    The sandbox cannot attach other files, load extensions or change
+    connection pragmas, is capped at DATASET_MAX_IMAGE_BYTES and is
+    interrupted after DATASET_COMPILE_TIMEOUT_SECONDS.
+
+    Args:
+        stream: Binary dump positioned at the start
+        workdir: Scratch directory for the database files
+
+    Returns:
+        (path of the compiled image, schema description)
+
+    Raises:
+        DatasetValidationError: If the dump fails to execute or creates no tables
+    """
+    scratch_path = os.path.join(workdir, "scratch.sqlite")
+    image_path = os.path.join(workdir, "image.sqlite")
+    deadline = time.monotonic() + settings.DATASET_COMPILE_TIMEOUT_SECONDS
+
+    conn = sqlite3.connect(scratch_path, isolation_level=None)
+    try:
+        # Scratch database: durability is irrelevant, speed is not
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.execute(f"PRAGMA max_page_count={max(settings.DATASET_MAX_IMAGE_BYTES // page_size, 1)}")
+
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        conn.set_authorizer(sandbox_authorizer)
+        conn.execute("BEGIN")
+        try:
+            for statement in iter_statements(stream):
+                if not TRANSACTION_CONTROL_RE.match(statement):
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if time.monotonic() > deadline:
+                raise DatasetValidationError(
+                    f"Dump did not finish within {settings.DATASET_COMPILE_TIMEOUT_SECONDS}s"
+                )
+            raise DatasetValidationError(f"Dump failed to execute: {e}")
+        finally:
+            conn.set_authorizer(None)
+            conn.set_progress_handler(None, 0)
+
+        schema = describe_database(conn)
+        if not schema["tables"]:
+            raise DatasetValidationError("Dump does not create any tables")
+
+        conn.execute("VACUUM INTO ?", (image_path,))
+    finally:
+        conn.close()
+
+    return image_path, schema
+
+
+_compile_executor: Optional[ThreadPoolExecutor] = None
+_compile_executor_lock = threading.Lock()
+
+
+def compile_executor() -> ThreadPoolExecutor:
+    """
+    Bounded thread pool for hashing and compiling uploads
+
+    Separate from the S3 executor, so compiles (CPU) and S3 calls (I/O)
+    cannot hold each other's threads.
+    """
+    global _compile_executor
+    if _compile_executor is None:
+        with _compile_executor_lock:
+            if _compile_executor is None:
+                _compile_executor = ThreadPoolExecutor(
+                    max_workers=settings.DATASET_COMPILE_WORKERS,
+                    thread_name_prefix="compile"
+                )
+    return _compile_executor
+
+
+async def run_compile(func: Callable[..., T], *args, **kwargs) -> T:
+    """Await func on the compile executor"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(compile_executor(), call)
+
+
+def shutdown_compile_executor() -> None:
+    """Stop the compile executor, waiting for in-flight compiles"""
+    global _compile_executor
+    if _compile_executor is not None:
+        _compile_executor.shutdown(wait=True)
+        _compile_executor = None
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as stream:
+        return hash_stream(stream)
+
+
+def store_dataset(
+    stream: BinaryIO,
+    filename: str,
+    sha256: str,
+    image_path: str,
+    image_sha256: str,
+    schema: Dict,
+    s3: S3Service = s3_service
+) -> Tuple[Dict, Dict]:
+    """
+    Upload a compiled dump and write its metadata (S3 I/O only)
+
+    Returns:
+        (dataset metadata, listing entry of the raw dump)
+
+    Raises:
+        ClientError: If AWS S3 operation fails
+    """
+    stream.seek(0)
+    raw_entry = s3.upload_stream(stream, filename, 'application/sql', key=f"datasets/{sha256[:12]}-{filename}")
+
+    with open(image_path, "rb") as image:
+        image_entry = s3.upload_stream(image, f"{sha256}.sqlite", 'application/vnd.sqlite3', key=image_key(sha256))
+
+    metadata = {
+        "version": METADATA_VERSION,
+        "sha256": sha256,
+        "filename": filename,
+        "raw_key": raw_entry["key"],
+        "raw_size": raw_entry["size"],
+        "url": raw_entry["url"],
+        "image_key": image_entry["key"],
+        "image_size": image_entry["size"],
+        "image_sha256": image_sha256,
+        "sqlite_version": sqlite3.sqlite_version,
+        "compiled_at": datetime.now(timezone.utc).isoformat(),
+        **schema,
+    }
+    # Written last: its presence marks a complete ingestion for deduplication
+    s3.put_json(metadata_key(sha256), metadata)
+    return metadata, raw_entry
+
+
+def ingest_dataset(
+    stream: BinaryIO,
+    filename: str,
+    s3: S3Service = s3_service
+) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Hash, validate, compile and store an uploaded dump
+
+    Args:
+        stream: Seekable binary stream of the dump
+        filename: Sanitized file name
+        s3: S3 service to store objects with
+
+    Returns:
+        (dataset metadata, listing entry of the new raw dump or None if the
+        same content had already been ingested)
+
+    Raises:
+        DatasetValidationError: If the dump cannot be compiled
+        ClientError: If AWS S3 operation fails
+    """
+    sha256 = hash_stream(stream)
+
+    existing = s3.get_json(metadata_key(sha256))
+    if existing is not None:
+        return existing, None
+
+    with tempfile.TemporaryDirectory(prefix="sqltown-compile-") as workdir:
+        image_path, schema = compile_dump(stream, workdir)
+        return store_dataset(stream, filename, sha256, image_path, hash_file(image_path), schema, s3)
+
+
+async def ingest_dataset_async(
+    stream: BinaryIO,
+    filename: str,
+    s3: S3Service = s3_service
+) -> Tuple[Dict, Optional[Dict]]:
+    """
+    ingest_dataset() for async endpoints
+
+    Hashing and compiling run on the compile executor and the S3 calls on
+    the S3 service's executor.
+    """
+    sha256 = await run_compile(hash_stream, stream)
+
+    existing = await s3.run(s3.get_json, metadata_key(sha256))
+    if existing is not None:
+        return existing, None
+
+    with tempfile.TemporaryDirectory(prefix="sqltown-compile-") as workdir:
+        image_path, schema = await run_compile(compile_dump, stream, workdir)
+        image_sha256 = await run_compile(hash_file, image_path)
+        return await s3.run(store_dataset, stream, filename, sha256, image_path, image_sha256, schema, s3)
+
+
+def get_metadata(sha256: str, s3: S3Service = s3_service) -> Optional[Dict]:
+    """Metadata of an ingested dataset, or None if unknown"""
+    if not SHA256_RE.match(sha256):
+        return None
+    return s3.get_json(metadata_key(sha256))
+
+
+def _cache_dir() -> str:
+    return settings.DATASET_CACHE_DIR or os.path.join(tempfile.gettempdir(), "sqltown-datasets")
+
+
+def local_image_path(sha256: str, s3: S3Service = s3_service) -> str:
+    """
+    Path of a local copy of a compiled image, downloading it on first use
+
+    Images are immutable (content-addressed), so a cached copy never needs
+    revalidating.
+
+    Raises:
+        ValueError: If sha256 is malformed or the download is corrupt
+        ClientError: If AWS S3 operation fails
+    """
+    if not SHA256_RE.match(sha256):
+        raise ValueError("Invalid dataset hash")
+
+    path = os.path.join(_cache_dir(), f"{sha256}.sqlite")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(_cache_dir(), exist_ok=True)
+    metadata = s3.get_json(metadata_key(sha256))
+    if metadata is None:
+        raise ValueError(f"Unknown dataset {sha256}")
+
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        s3.download_file(image_key(sha256), partial)
+        with open(partial, "rb") as image:
+            if hash_stream(image) != metadata["image_sha256"]:
+                raise ValueError(f"Downloaded image for dataset {sha256} is corrupt")
+        # Atomic, so concurrent readers only ever see a complete image
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
+
+
+def open_dataset(sha256: str, s3: S3Service = s3_service) -> sqlite3.Connection:
+    """Read-only connection to an ingested dataset (memory-mapped, immutable)"""
+    return open_readonly_image(local_image_path(sha256, s3))
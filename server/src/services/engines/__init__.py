@@ -0,0 +1,59 @@
+"""
+SQL execution backends, selected per question by its dialect
+"""
+from typing import Dict
+
+from src.config import settings
+from src.services.engines.base import (
+    BackendUnavailableError,
+    ExecutionBackend,
+    ExecutionLimits,
+    ExecutionSession,
+    QueryLimitError,
+    QueryTimeoutError,
+    canonical_value,
+)
+from src.services.engines.duckdb_backend import DuckDBBackend
+from src.services.engines.sqlite_backend import SQLiteBackend
+
+__all__ = [
+    "BackendUnavailableError",
+    "ExecutionBackend",
+    "ExecutionLimits",
+    "ExecutionSession",
+    "QueryLimitError",
+    "QueryTimeoutError",
+    "canonical_value",
+    "DuckDBBackend",
+    "SQLiteBackend",
+    "DEFAULT_DIALECT",
+    "backends",
+    "get_backend",
+]
+
+DEFAULT_DIALECT = "sqlite"
+
+_limits = ExecutionLimits(timeout_seconds=settings.SQL_TIMEOUT_SECONDS, max_rows=settings.SQL_MAX_RESULT_ROWS)
+
+backends: Dict[str, ExecutionBackend] = {
+    "sqlite": SQLiteBackend(_limits),
+    "duckdb": DuckDBBackend(
+        _limits,
+        directory=settings.DUCKDB_FIXTURE_DIR,
+        threads=settings.DUCKDB_THREADS,
+        memory_limit=settings.DUCKDB_MEMORY_LIMIT,
+    ),
+}
+
+
+def get_backend(dialect: str = DEFAULT_DIALECT) -> ExecutionBackend:
+    """
+    Backend for a question's dialect
+
+    Raises:
+        ValueError: If no backend implements the dialect
+    """
+    backend = backends.get(dialect or DEFAULT_DIALECT)
+    if backend is None:
+        raise ValueError(f"Unsupported SQL dialect: {dialect}")
+    return backend
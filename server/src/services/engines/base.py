@@ -0,0 +1,128 @@
+"""
+Execution backend interface
+
+A backend turns a fixture (setup script plus optional delta) into something
+a submission can run against, and runs it there within limits. Every backend
+returns rows in the same canonical form (plain Python scalars, dates as ISO
+strings), so results from any engine compare against the same
+expected_output.
+"""
+import datetime
+import decimal
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class BackendUnavailableError(RuntimeError):
+    """
+    Raised when a backend's engine is not installed
+    """
+
+
+class QueryLimitError(Exception):
+    """
+    Raised when a query exceeds its time or result-size limit
+    """
+
+
+class QueryTimeoutError(QueryLimitError):
+    """
+    Raised when a query runs past its time limit
+    """
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    timeout_seconds: float = 10.0
+    max_rows: int = 100000
+
+
+def canonical_value(value: Any) -> Any:
+    """A result value as the plain scalar every backend compares with"""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [canonical_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): canonical_value(item) for key, item in value.items()}
+    return str(value)
+
+
+class ExecutionSession(ABC):
+    """
+    A fixture opened on one backend, valid inside ExecutionBackend.session()
+    """
+
+    def __init__(self, limits: ExecutionLimits):
+        self.limits = limits
+
+    @abstractmethod
+    def run(self, sql: str) -> None:
+        """
+        Execute a statement and read its result, ready for fetch()
+
+        The time limit covers reading the rows as well: engines compute rows
+        as they are fetched, so a limit on the execute alone is no limit.
+
+        Raises:
+            QueryTimeoutError: If the statement runs past the time limit
+            QueryLimitError: If it returns more than limits.max_rows rows
+        """
+
+    @abstractmethod
+    def fetch(self) -> Tuple[List[str], List[tuple]]:
+        """Column names and rows of the last statement, in canonical form"""
+
+    @abstractmethod
+    def explain(self, sql: str) -> str:
+        """The engine's query plan for a statement, as text"""
+
+    def _check_rows(self, rows: List[tuple]) -> List[tuple]:
+        if len(rows) > self.limits.max_rows:
+            raise QueryLimitError(f"Result has more than {self.limits.max_rows} rows")
+        return rows
+
+
+class ExecutionBackend(ABC):
+    """
+    A SQL engine submissions can be graded on
+    """
+
+    name: str = ""
+
+    def __init__(self, limits: Optional[ExecutionLimits] = None):
+        self.limits = limits or ExecutionLimits()
+
+    @abstractmethod
+    @contextmanager
+    def session(self, setup_sql: str, delta_sql: Optional[str] = None) -> Iterator[ExecutionSession]:
+        """
+        Open a read-only session on a fixture
+
+        The fixture is built on first use and cached by the backend, so a
+        session normally costs no setup.
+
+        Raises:
+            BackendUnavailableError: If the engine is not installed
+        """
+
+    def prepare(self, setup_sql: str, delta_sql: Optional[str] = None) -> None:
+        """Build a fixture ahead of its first session"""
+        with self.session(setup_sql, delta_sql):
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name}
@@ -0,0 +1,261 @@
+"""
+DuckDB execution backend
+
+A columnar, vectorized engine for aggregation- and window-heavy questions
+over large datasets. DuckDB is an optional dependency, imported on first
+use.
+
+Fixtures stay SQLite scripts (or synthetic-data directives): the SQLite
+fixture is built as usual and its tables are copied once, through CSV, into
+a DuckDB file under DUCKDB_FIXTURE_DIR named by the fixture's content hash. Every worker
+opens that file read-only with external access disabled, so submissions
+cannot read or write files, load extensions or change the data.
+"""
+import csv
+import fcntl
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.services.engines.base import (
+    BackendUnavailableError,
+    ExecutionBackend,
+    ExecutionLimits,
+    ExecutionSession,
+    QueryTimeoutError,
+    canonical_value,
+)
+from src.core.metrics import record_cache
+from src.services.fixture_cache import fixture_cache, fixture_key
+
+DATE_TYPES = {"DATE": "DATE", "DATETIME": "TIMESTAMP", "TIMESTAMP": "TIMESTAMP"}
+
+# Rows copied from SQLite per fetchmany() during a fixture build
+TRANSFER_BATCH_SIZE = 10000
+# Stands for NULL in the transfer CSV; a string column holding exactly this
+# value would load as NULL
+NULL_MARKER = "\\N@sqltown"
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise BackendUnavailableError("The duckdb engine is not installed (pip install duckdb)")
+    return duckdb
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_type(declared: str, storage_classes: List[str]) -> str:
+    """
+    DuckDB type for a SQLite column
+
+    Decided by the values actually stored (SQLite columns can hold any
+    type), falling back to the declared type's affinity for empty tables.
+    """
+    declared = (declared or "").upper()
+    stored = set(storage_classes) - {"null"}
+    if not stored:
+        if "INT" in declared:
+            stored = {"integer"}
+        elif any(marker in declared for marker in ("REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")):
+            stored = {"real"}
+        else:
+            stored = {"text"}
+    if stored == {"integer"}:
+        return "BIGINT"
+    if stored <= {"integer", "real"}:
+        return "DOUBLE"
+    if stored == {"text"} and declared.split("(")[0].strip() in DATE_TYPES:
+        return DATE_TYPES[declared.split("(")[0].strip()]
+    return "VARCHAR"
+
+
+class DuckDBSession(ExecutionSession):
+    def __init__(self, cursor, limits: ExecutionLimits):
+        super().__init__(limits)
+        self.cursor = cursor
+        self.result: Tuple[List[str], List[tuple]] = ([], [])
+
+    def run(self, sql: str) -> None:
+        duckdb = _import_duckdb()
+        # Results may stream, so the rows are read before the timer is cancelled
+        timer = threading.Timer(self.limits.timeout_seconds, self.cursor.interrupt)
+        timer.start()
+        try:
+            self.cursor.execute(sql)
+            if self.cursor.description is None:
+                self.result = [], []
+                return
+            columns = [desc[0] for desc in self.cursor.description]
+            rows = self._check_rows(self.cursor.fetchmany(self.limits.max_rows + 1))
+        except duckdb.InterruptException:
+            raise QueryTimeoutError(f"Query exceeded {self.limits.timeout_seconds:g}s time limit")
+        finally:
+            timer.cancel()
+        self.result = columns, [tuple(canonical_value(value) for value in row) for row in rows]
+
+    def fetch(self) -> Tuple[List[str], List[tuple]]:
+        return self.result
+
+    def explain(self, sql: str) -> str:
+        return "\n".join(row[-1] for row in self.cursor.execute(f"EXPLAIN {sql}").fetchall())
+
+
+class DuckDBBackend(ExecutionBackend):
+    """
+    Columnar engine for analytical questions (dialect "duckdb")
+    """
+
+    name = "duckdb"
+
+    def __init__(
+        self,
+        limits: Optional[ExecutionLimits] = None,
+        directory: str = "build/duckdb-fixtures",
+        threads: int = 2,
+        memory_limit: str = "1GB",
+        max_open: int = 64
+    ):
+        super().__init__(limits)
+        self.directory = directory
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.max_open = max_open
+        self._connections: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.duckdb")
+
+    def build(self, setup_sql: str, delta_sql: Optional[str], path: str) -> None:
+        """Copy every table of the SQLite fixture into a new DuckDB file at `path`"""
+        duckdb = _import_duckdb()
+        source = fixture_cache.open(setup_sql, writable=False, delta_sql=delta_sql)
+        target = duckdb.connect(path)
+        try:
+            tables = [
+                row[0] for row in source.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+                )
+            ]
+            for table in tables:
+                info = source.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+                names = [column[1] for column in info]
+                if not names:
+                    continue
+                storage = source.execute(
+                    "SELECT " + ", ".join(f"group_concat(DISTINCT typeof({_quote(name)}))" for name in names)
+                    + f" FROM {_quote(table)}"
+                ).fetchone()
+                types = {
+                    name: column_type(column[2], (classes or "").split(","))
+                    for name, column, classes in zip(names, info, storage)
+                }
+
+                has_blobs = any("blob" in (classes or "") for classes in storage)
+
+                # Strings are always quoted and NULL gets its own marker, so
+                # NULL and '' survive the round trip
+                fd, rows_path = tempfile.mkstemp(prefix=".rows-", suffix=".csv", dir=self.directory)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+                        cursor = source.execute(f"SELECT * FROM {_quote(table)}")
+                        while True:
+                            rows = cursor.fetchmany(TRANSFER_BATCH_SIZE)
+                            if not rows:
+                                break
+                            if has_blobs:
+                                rows = [map(canonical_value, row) for row in rows]
+                            writer.writerows([NULL_MARKER if value is None else value for value in row] for row in rows)
+                    columns = "{" + ", ".join(f"'{name.replace(chr(39), chr(39) * 2)}': '{types[name]}'" for name in names) + "}"
+                    target.execute(
+                        f"CREATE TABLE {_quote(table)} AS SELECT * FROM read_csv(?, header = false, columns = {columns}, "
+                        f"quote = '\"', escape = '\"', nullstr = '{NULL_MARKER}', allow_quoted_nulls = true, strict_mode = true)",
+                        [rows_path],
+                    )
+                finally:
+                    os.remove(rows_path)
+            target.execute("CHECKPOINT")
+        finally:
+            target.close()
+            source.close()
+
+    def _materialize(self, key: str, setup_sql: str, delta_sql: Optional[str]) -> str:
+        """The fixture's DuckDB file, built by exactly one process on first use"""
+        path = self._path(key)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{path}.lock", "a") as key_lock:
+            fcntl.flock(key_lock, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(path):
+                    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+                    try:
+                        self.build(setup_sql, delta_sql, partial)
+                        os.replace(partial, path)
+                        self.builds += 1
+                    finally:
+                        for leftover in (partial, f"{partial}.wal"):
+                            if os.path.exists(leftover):
+                                os.remove(leftover)
+            finally:
+                fcntl.flock(key_lock, fcntl.LOCK_UN)
+        return path
+
+    def _connection(self, setup_sql: str, delta_sql: Optional[str]):
+        key = fixture_key(setup_sql, delta_sql)
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is not None:
+                self._connections.move_to_end(key)
+        record_cache("duckdb_fixture", conn is not None)
+        if conn is not None:
+            return conn
+
+        duckdb = _import_duckdb()
+        path = self._materialize(key, setup_sql, delta_sql)
+        conn = duckdb.connect(path, read_only=True, config={
+            "enable_external_access": False,
+            "autoinstall_known_extensions": False,
+            "autoload_known_extensions": False,
+            "threads": self.threads,
+            "memory_limit": self.memory_limit,
+        })
+        with self._lock:
+            conn = self._connections.setdefault(key, conn)
+            self._connections.move_to_end(key)
+            while len(self._connections) > self.max_open:
+                # Dropped, not closed: sessions may still hold cursors on it
+                self._connections.popitem(last=False)
+        return conn
+
+    @contextmanager
+    def session(self, setup_sql: str, delta_sql: Optional[str] = None) -> Iterator[DuckDBSession]:
+        cursor = self._connection(setup_sql, delta_sql).cursor()
+        try:
+            yield DuckDBSession(cursor, self.limits)
+        finally:
+            cursor.close()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            version = _import_duckdb().__version__
+        except BackendUnavailableError:
+            version = None
+        with self._lock:
+            return {
+                "name": self.name,
+                "version": version,
+                "open_fixtures": len(self._connections),
+                "builds": self.builds,
+            }
@@ -0,0 +1,88 @@
+"""
+SQLite execution backend
+
+Sessions open the fixture through the fixture cache: straight from the
+shared, memory-mapped file when available, otherwise a private in-memory
+copy. Scratch sessions run on a writable copy whose changes are rolled back.
+Time limits use SQLite's progress handler, which aborts the running
+statement from inside the VM loop.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.services.engines.base import ExecutionBackend, ExecutionSession, QueryTimeoutError, canonical_value
+from src.services.fixture_cache import fixture_cache
+
+# VM instructions between deadline checks
+PROGRESS_INTERVAL = 10000
+
+
+class SQLiteSession(ExecutionSession):
+    def __init__(self, conn: sqlite3.Connection, limits, deadline: Optional[float] = None):
+        super().__init__(limits)
+        self.conn = conn
+        self.cursor = conn.cursor()
+        # Shared by every statement when set; otherwise each one gets the full limit
+        self.deadline = deadline
+        self.result: Tuple[List[str], List[tuple]] = ([], [])
+
+    def run(self, sql: str) -> None:
+        # Rows are read here too: SQLite computes them as they are fetched,
+        # so the deadline has to cover the fetch as well as the execute
+        deadline = self.deadline or time.monotonic() + self.limits.timeout_seconds
+        self.conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+        try:
+            self.cursor.execute(sql)
+            if self.cursor.description is None:
+                self.result = [], []
+                return
+            columns = [desc[0] for desc in self.cursor.description]
+            rows = self._check_rows(self.cursor.fetchmany(self.limits.max_rows + 1))
+        except sqlite3.OperationalError as e:
+            if str(e) == "interrupted":
+                raise QueryTimeoutError(f"Query exceeded {self.limits.timeout_seconds:g}s time limit")
+            raise
+        finally:
+            self.conn.set_progress_handler(None, 0)
+        # SQLite only returns None/int/float/str/bytes; bytes need converting
+        if any(isinstance(value, bytes) for row in rows for value in row):
+            rows = [tuple(canonical_value(value) for value in row) for row in rows]
+        self.result = columns, rows
+
+    def fetch(self) -> Tuple[List[str], List[tuple]]:
+        return self.result
+
+    def explain(self, sql: str) -> str:
+        plan = self.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        return "\n".join(row[-1] for row in plan)
+
+
+class SQLiteBackend(ExecutionBackend):
+    """
+    Row-at-a-time engine; the default for every question
+    """
+
+    name = "sqlite"
+
+    @contextmanager
+    def session(self, setup_sql: str, delta_sql: Optional[str] = None) -> Iterator[SQLiteSession]:
+        conn = fixture_cache.open(setup_sql, writable=False, delta_sql=delta_sql)
+        try:
+            yield SQLiteSession(conn, self.limits)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def scratch(self, setup_sql: str, delta_sql: Optional[str] = None) -> Iterator[SQLiteSession]:
+        """
+        Writable session on a fixture, rolled back on exit
+
+        All statements run in the session share one time limit.
+        """
+        with fixture_cache.scratch(setup_sql, delta_sql) as conn:
+            yield SQLiteSession(conn, self.limits, deadline=time.monotonic() + self.limits.timeout_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "version": sqlite3.sqlite_version}
@@ -0,0 +1,345 @@
+"""
+Dispatch grading to remote executors
+
+With EXECUTOR_URLS set, submissions are graded by executor processes
+(src/executor/service.py) instead of in the API process, so grading CPU and
+API I/O scale separately. Each API worker keeps a view of every executor:
+
+- Health: a background thread polls GET /v1/health every
+  EXECUTOR_HEALTH_INTERVAL_SECONDS for each executor's slots, load and the
+  fixtures it holds. An executor that fails a check or a request is skipped
+  until it passes a check again.
+- Routing: among healthy executors, the least loaded one that already holds
+  the question's fixtures, as long as it has a free slot; otherwise the least
+  loaded one overall. Load is the executor's last reported in-flight and
+  waiting submissions plus what this worker has sent it since.
+- Retries: grading is idempotent, so after a connection error or an error
+  status the submission is sent to another executor, up to EXECUTOR_RETRIES
+  more times. Error statuses other than 503 (at capacity) also mark the
+  executor down, including a rejected key. When no executor can take it, it
+  is graded in process (EXECUTOR_FALLBACK_LOCAL) or rejected with 503.
+- Timeouts: a submission still running after EXECUTOR_TIMEOUT_SECONDS is
+  graded as a timeout. The executor stays up and the submission is not
+  resent: a query that slow would tie up every executor in turn.
+
+Executors are sent a setup script only when they are not known to hold it
+(see src/executor/protocol.py).
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.core.metrics import EXECUTOR_REQUESTS
+from src.executor.protocol import AUTH_HEADER
+from src.services.fixture_cache import fixture_key
+from src.services.sql_engine import GradingCase, grade_submission
+
+logger = logging.getLogger("sqltown.executors")
+
+HEALTH_TIMEOUT_SECONDS = 1.0
+
+
+class ExecutorUnavailable(Exception):
+    """An executor could not grade a submission; another one may"""
+
+
+class ExecutorTimeout(Exception):
+    """An executor took a submission but did not answer in time"""
+
+
+class ExecutorNode:
+    """
+    This worker's view of one executor
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.slots = 1
+        self.reported_load = 0
+        self.sent = 0  # submissions this worker has in flight on it
+        self.fixtures: set = set()
+        self.failures = 0
+        self.error: Optional[str] = None
+
+    @property
+    def load(self) -> int:
+        return self.reported_load + self.sent
+
+    def has_fixtures(self, keys: List[str]) -> bool:
+        return all(key in self.fixtures for key in keys)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "slots": self.slots,
+            "load": self.load,
+            "fixtures": len(self.fixtures),
+            "failures": self.failures,
+            "error": self.error,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+
+class ExecutorPool:
+    """
+    Health-checked executors with fixture-affine, least-loaded routing
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        api_key: str = "",
+        timeout: float = 30.0,
+        retries: int = 2,
+        health_interval: float = 2.0,
+        fallback_local: bool = True
+    ):
+        self.nodes = [ExecutorNode(url) for url in urls]
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.health_interval = health_interval
+        self.fallback_local = fallback_local
+        self._lock = threading.Lock()
+        self._session = None
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.nodes)
+
+    def _http(self):
+        if self._session is None:
+            # Imported lazily: nothing to load while grading stays in process
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.nodes), pool_maxsize=64)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if self.api_key:
+                session.headers[AUTH_HEADER] = self.api_key
+            self._session = session
+        return self._session
+
+    # -- health -------------------------------------------------------------
+
+    def check(self, node: ExecutorNode) -> None:
+        """Refresh an executor's health, load and fixtures"""
+        try:
+            response = self._http().get(f"{node.url}/v1/health", timeout=HEALTH_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            health = response.json()
+        except Exception as e:
+            self._mark_down(node, f"health check failed: {e}")
+        else:
+            with self._lock:
+                if not node.healthy:
+                    logger.info("Executor %s is up (%d slots)", node.url, health["slots"])
+                node.healthy = True
+                node.slots = max(health["slots"], 1)
+                node.reported_load = health["inflight"] + health["waiting"]
+                node.fixtures = set(health["fixtures"])
+                node.error = None
+        node.checked_at = time.monotonic()
+
+    def check_all(self) -> None:
+        for node in self.nodes:
+            self.check(node)
+
+    def _mark_down(self, node: ExecutorNode, error: str) -> None:
+        with self._lock:
+            if node.healthy:
+                logger.warning("Executor %s is down: %s", node.url, error)
+            node.healthy = False
+            node.failures += 1
+            node.error = error
+
+    def _run_checks(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check_all()
+
+    def start(self) -> None:
+        """Check every executor once, then keep checking in the background"""
+        if not self.enabled or self._checker is not None:
+            return
+        self._stop.clear()
+        self._checker = threading.Thread(target=self._run_checks, name="executor-health", daemon=True)
+        self._checker.start()
+        threading.Thread(target=self.check_all, name="executor-health-initial", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._checker = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    # -- routing ------------------------------------------------------------
+
+    def choose(self, keys: List[str], exclude: set) -> Optional[ExecutorNode]:
+        """
+        Executor for a submission needing these fixtures, or None
+
+        Prefers executors that hold the fixtures and have a free slot; ties go
+        to a stable per-fixture order so one question keeps landing on the same
+        executor rather than warming all of them.
+        """
+        with self._lock:
+            candidates = [node for node in self.nodes if node.healthy and node.url not in exclude]
+            if not candidates:
+                return None
+            affinity = keys[0] if keys else ""
+
+            def rank(node: ExecutorNode) -> Tuple[float, int]:
+                tiebreak = int.from_bytes(hashlib.blake2b(f"{node.url}|{affinity}".encode(), digest_size=4).digest(), "big")
+                return node.load / node.slots, tiebreak
+
+            warm = [node for node in candidates if node.has_fixtures(keys) and node.load < node.slots]
+            node = min(warm or candidates, key=rank)
+            node.sent += 1
+            return node
+
+    def _done(self, node: ExecutorNode) -> None:
+        with self._lock:
+            node.sent -= 1
+
+    # -- grading ------------------------------------------------------------
+
+    def _payload(self, cases: List[GradingCase], keys: List[str], user_sql: str, send: set) -> Dict[str, Any]:
+        return {
+            "sql": user_sql,
+            "cases": [
+                {
+                    "setup_key": key,
+                    "setup_sql": case.setup_sql if key in send else None,
+                    "delta_sql": case.delta_sql,
+                    "expected_output": case.expected_output,
+                    "expected_state": case.expected_state,
+                    "dialect": case.dialect,
+                }
+                for case, key in zip(cases, keys)
+            ],
+        }
+
+    def _grade_on(self, node: ExecutorNode, cases: List[GradingCase], keys: List[str], user_sql: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Raises:
+            ExecutorUnavailable: The executor failed or is at capacity
+            ExecutorTimeout: The executor did not answer within the timeout
+        """
+        import requests
+
+        send = {key for key in keys if key not in node.fixtures}
+        # At most one resend, with the scripts the executor reported missing
+        for _ in range(2):
+            try:
+                response = self._http().post(
+                    f"{node.url}/v1/grade",
+                    json=self._payload(cases, keys, user_sql, send),
+                    timeout=self.timeout
+                )
+            except requests.ReadTimeout:
+                # The executor took the submission and is still grading it
+                raise ExecutorTimeout(f"{node.url}: no answer after {self.timeout:g}s")
+            except requests.RequestException as e:
+                self._mark_down(node, str(e))
+                raise ExecutorUnavailable(f"{node.url}: {e}")
+
+            if response.status_code == 409:
+                send = set(response.json()["detail"]["missing"])
+                with self._lock:
+                    node.fixtures.difference_update(send)
+                continue
+            if response.status_code == 503:
+                raise ExecutorUnavailable(f"{node.url}: at capacity")
+            if response.status_code >= 400:
+                # 5xx, or a deployment error such as a wrong key (403) or a
+                # protocol mismatch (400, 422): skip the executor until it
+                # passes a health check, and let another one or the API grade
+                self._mark_down(node, f"HTTP {response.status_code}: {response.text[:200]}")
+                raise ExecutorUnavailable(f"{node.url}: HTTP {response.status_code}")
+
+            result = response.json()
+            with self._lock:
+                node.fixtures.update(keys)
+            return result["body"], result["verdict"]
+        raise ExecutorUnavailable(f"{node.url}: fixtures missing after resend")
+
+    def grade(self, cases: List[GradingCase], user_sql: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Grade a submission on an executor, or in process when none are configured
+
+        Returns:
+            (response body, verdict), as grade_submission() does; the
+            verdict is timeout when the executor does not answer within
+            EXECUTOR_TIMEOUT_SECONDS
+
+        Raises:
+            HTTPException: 503 when no executor could grade it and
+                EXECUTOR_FALLBACK_LOCAL is off
+        """
+        if not self.enabled or not cases:
+            return grade_submission(cases, user_sql)
+
+        keys = [fixture_key(case.setup_sql) for case in cases]
+        tried: set = set()
+        for _ in range(self.retries + 1):
+            node = self.choose(keys, tried)
+            if node is None:
+                break
+            tried.add(node.url)
+            try:
+                body, verdict = self._grade_on(node, cases, keys, user_sql)
+            except ExecutorUnavailable as e:
+                logger.info("Retrying submission on another executor: %s", e)
+                EXECUTOR_REQUESTS.labels("retried").inc()
+                continue
+            except ExecutorTimeout as e:
+                logger.info("Submission timed out: %s", e)
+                EXECUTOR_REQUESTS.labels("timeout").inc()
+                return {
+                    "error": f"Grading exceeded {self.timeout:g}s time limit",
+                    "timeout": True
+                }, "timeout"
+            finally:
+                self._done(node)
+            EXECUTOR_REQUESTS.labels("remote").inc()
+            return body, verdict
+
+        if self.fallback_local:
+            EXECUTOR_REQUESTS.labels("local").inc()
+            return grade_submission(cases, user_sql)
+        EXECUTOR_REQUESTS.labels("failed").inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No grading executor is available; retry shortly",
+            headers={"Retry-After": "2"}
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "fallback_local": self.fallback_local,
+            "executors": [node.report() for node in self.nodes],
+        }
+
+
+executor_pool = ExecutorPool(
+    settings.EXECUTOR_URLS,
+    api_key=settings.EXECUTOR_API_KEY,
+    timeout=settings.EXECUTOR_TIMEOUT_SECONDS,
+    retries=settings.EXECUTOR_RETRIES,
+    health_interval=settings.EXECUTOR_HEALTH_INTERVAL_SECONDS,
+    fallback_local=settings.EXECUTOR_FALLBACK_LOCAL,
+)
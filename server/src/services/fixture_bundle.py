@@ -0,0 +1,293 @@
+"""
+Compiled fixture bundle
+
+A single file holding every test-case fixture as a serialized SQLite image,
+built ahead of time (seed/build_fixture_bundle.py) so workers never have to
+run setup_sql. Layout:
+
+    header   magic, format version, index offset, index length
+    images   one serialized database per distinct dataset (and per
+             dataset + delta script pair), page aligned
+    index    JSON: fixture key -> (offset, length) and, per test case, its
+             fixture key
+
+Workers map the file read-only with mmap, so image pages are shared through
+the OS page cache by every process on the host and only touched fixtures are
+ever read. Rebuilds reuse the images of unchanged fixtures from the previous
+bundle and replace the file atomically.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"SQLTFXB\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQQ")  # magic, version, index offset, index length
+ALIGNMENT = 4096
+
+
+class FixtureBundleError(Exception):
+    """
+    Raised when a bundle file is missing, truncated or of another format
+    """
+
+
+def canonical_row(row: Dict) -> Dict:
+    # 2 and 2.0 compare equal in compare_results, so they must hash equal too
+    return {
+        column: int(value) if isinstance(value, float) and value.is_integer() else value
+        for column, value in row.items()
+    }
+
+
+def result_hash(rows: List[Dict]) -> str:
+    """
+    Canonical hash of a result set
+
+    Insensitive to row order, column order and 2 vs 2.0, like
+    compare_results(), so result sets from different engines can be compared
+    by hash.
+    """
+    encoded = sorted(
+        json.dumps(canonical_row(row), sort_keys=True, separators=(",", ":"), default=str)
+        for row in rows
+    )
+    return hashlib.sha256(json.dumps(encoded, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class FixtureBundle:
+    """
+    Read-only, memory-mapped view of a bundle file
+    """
+
+    def __init__(self, path: str):
+        """
+        Raises:
+            FixtureBundleError: If the file is not a readable bundle
+        """
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise FixtureBundleError(f"Cannot open fixture bundle {path}: {e}")
+        # Identifies the file even after it is atomically replaced
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+
+        try:
+            magic, version, index_offset, index_length = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise FixtureBundleError(f"{path} is not a version {FORMAT_VERSION} fixture bundle")
+            index = json.loads(self._mmap[index_offset:index_offset + index_length])
+        except (struct.error, ValueError) as e:
+            self._mmap.close()
+            raise FixtureBundleError(f"Corrupt fixture bundle {path}: {e}")
+        except FixtureBundleError:
+            self._mmap.close()
+            raise
+
+        self.fixtures: Dict[str, Tuple[int, int]] = {
+            key: (offset, length) for key, (offset, length) in index["fixtures"].items()
+        }
+        self.test_cases: Dict[int, Dict[str, str]] = {
+            int(test_case_id): entry for test_case_id, entry in index["test_cases"].items()
+        }
+        self.built_at: str = index.get("built_at", "")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.fixtures
+
+    def __len__(self) -> int:
+        return len(self.fixtures)
+
+    def get_image(self, key: str) -> Optional[memoryview]:
+        """Zero-copy view of a fixture image, or None if the bundle lacks it"""
+        location = self.fixtures.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A fixture view is still in use; the mapping goes away with it
+            pass
+
+
+def write_bundle(
+    path: str,
+    images: Iterable[Tuple[str, Callable[[], bytes]]],
+    test_cases: Dict[int, Dict[str, str]]
+) -> Dict[str, int]:
+    """
+    Write a bundle to `path`, replacing any existing file atomically
+
+    Args:
+        path: Destination file
+        images: (fixture key, function returning its serialized image) pairs
+        test_cases: test case id -> {"fixture": key}
+
+    Returns:
+        Number of fixtures and total file size
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".fixtures-", dir=directory)
+    fixtures: Dict[str, List[int]] = {}
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\0" * HEADER.size)
+            for key, load_image in images:
+                # Page-aligned so each image maps onto whole pages
+                f.write(b"\0" * (-f.tell() % ALIGNMENT))
+                image = load_image()
+                fixtures[key] = [f.tell(), len(image)]
+                f.write(image)
+
+            index = json.dumps({
+                "fixtures": fixtures,
+                "test_cases": {str(test_case_id): entry for test_case_id, entry in test_cases.items()},
+                "built_at": datetime.now(timezone.utc).isoformat(),
+            }, separators=(",", ":")).encode("utf-8")
+            index_offset = f.tell()
+            f.write(index)
+            size = f.tell()
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, index_offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private; workers may run as another user
+        os.chmod(tmp_path, 0o644)
+        # Workers still mapping the old file keep reading it until they reopen
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"fixtures": len(fixtures), "bytes": size}
+
+
+def open_bundle(path: str) -> Optional[FixtureBundle]:
+    """Open a bundle, or return None if there is none at `path`"""
+    if not path or not os.path.exists(path):
+        return None
+    return FixtureBundle(path)
+
+
+def _build_image_or_none(setup_sql: str) -> Optional[bytes]:
+    from src.services.fixture_cache import build_image
+
+    try:
+        return build_image(setup_sql)
+    except Exception:
+        return None
+
+
+def build_from_database(db, path: str, workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Compile every test case's fixture into a bundle at `path`
+
+    Incremental: fixtures already present in the existing bundle are copied
+    from it, only new setup scripts are executed (in a process pool), and
+    fixtures no test case uses any more are dropped. Each dataset is built
+    once; test cases with a delta script get a layered fixture made from the
+    dataset's image.
+
+    Args:
+        db: Database session
+        path: Bundle file to (re)write
+        workers: Processes used to build new fixtures (default: CPU count)
+
+    Returns:
+        Counts of fixtures written, reused, built, failed and removed, and
+        the bundle size in bytes
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from sqlalchemy import func
+
+    from src.models.dataset import Dataset
+    from src.models.test_case import TestCase
+    from src.services.fixture_cache import apply_delta, fixture_key
+
+    setup_scripts: Dict[str, str] = {}
+    layered: Dict[str, Tuple[str, str]] = {}
+    test_cases: Dict[int, Dict[str, str]] = {}
+    for test_case_id, setup_sql, delta_sql in (
+        db.query(
+            TestCase.id,
+            func.coalesce(Dataset.setup_sql, TestCase.setup_sql, ""),
+            TestCase.delta_sql,
+        )
+        .outerjoin(Dataset, TestCase.dataset_id == Dataset.id)
+    ):
+        base_key = fixture_key(setup_sql)
+        setup_scripts.setdefault(base_key, setup_sql)
+        key = fixture_key(setup_sql, delta_sql)
+        if delta_sql:
+            layered.setdefault(key, (base_key, delta_sql))
+        test_cases[test_case_id] = {"fixture": key}
+
+    try:
+        previous = open_bundle(path)
+    except FixtureBundleError:
+        previous = None
+
+    wanted = list(setup_scripts) + list(layered)
+    reused = sorted(key for key in wanted if previous is not None and key in previous)
+    removed = len(previous) - len(reused) if previous is not None else 0
+
+    built: Dict[str, bytes] = {}
+    failed = 0
+    missing = sorted(key for key in setup_scripts if previous is None or key not in previous)
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, image in zip(missing, pool.map(_build_image_or_none, [setup_scripts[key] for key in missing])):
+                if image is None:
+                    # Left out of the bundle; executing it at runtime reports the error
+                    failed += 1
+                else:
+                    built[key] = image
+
+    for key in sorted(layered):
+        if previous is not None and key in previous:
+            continue
+        base_key, delta_sql = layered[key]
+        base = built.get(base_key)
+        if base is None and previous is not None:
+            base = previous.get_image(base_key)
+        try:
+            if base is None:
+                raise ValueError("dataset failed to build")
+            built[key] = apply_delta(base, delta_sql)
+        except Exception:
+            failed += 1
+
+    images = [(key, lambda key=key: previous.get_image(key)) for key in reused]
+    images += [(key, lambda key=key: built[key]) for key in built]
+    images.sort(key=lambda item: item[0])
+
+    try:
+        result = write_bundle(path, images, test_cases)
+    finally:
+        if previous is not None:
+            previous.close()
+
+    return {
+        "fixtures": result["fixtures"],
+        "reused": len(reused),
+        "built": len(built),
+        "failed": failed,
+        "removed": removed,
+        "bytes": result["bytes"],
+    }
@@ -0,0 +1,431 @@
+"""
+Fixture cache for the SQL engine
+
+Test-case databases are looked up by the SHA-256 of their setup_sql, first in
+the prebuilt fixture bundle (memory-mapped, shared by all workers) and then
+in a per-worker LRU of images built from the script on a miss. No SQL has to
+be parsed for a bundled fixture or one that has been seen before.
+
+Read-only submissions open the fixture straight from the shared store (one
+memory-mapped file per fixture for all workers on the host); submissions that
+write get a private copy via sqlite3 deserialize().
+
+A setup_sql may also be a synthetic-data directive (see synthetic_data),
+in which case the fixture is generated rather than scripted; the rest of the
+pipeline treats it like any other fixture.
+
+Test cases built from a shared dataset plus a small delta script get a
+layered fixture: the dataset is built once, and the delta is applied to a
+copy of its image rather than re-running the dataset script.
+
+Submissions that modify data run on a scratch connection: a private
+in-memory copy of the fixture kept open between submissions. Each use is
+wrapped in a savepoint that is rolled back afterwards, so the next
+submission (or test case) starts from the pristine fixture without copying
+or rebuilding it.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.config import settings
+from src.core.metrics import record_cache
+from src.services.fixture_bundle import FixtureBundle, FixtureBundleError
+from src.services.shared_fixtures import SharedFixtureStore
+from src.services.synthetic_data import generate, parse_directive
+from src.utils.sqlite_images import open_readonly_image
+from src.utils.sqlite_sandbox import sandboxed
+
+logger = logging.getLogger("sqltown.fixtures")
+
+# Connection.serialize()/deserialize() need Python 3.11+ built against a
+# SQLite with the deserialize API; otherwise every fixture is rebuilt.
+SUPPORTS_IMAGES = hasattr(sqlite3.Connection, "deserialize")
+
+
+def fixture_key(setup_sql: str, delta_sql: Optional[str] = None) -> str:
+    """Content hash identifying a fixture (a dataset, optionally with a delta applied)"""
+    key = hashlib.sha256(setup_sql.encode("utf-8")).hexdigest()
+    if delta_sql:
+        key = hashlib.sha256(f"{key}:{delta_sql}".encode("utf-8")).hexdigest()
+    return key
+
+
+def run_setup(conn: sqlite3.Connection, setup_sql: str) -> None:
+    """
+    Populate an empty database from a setup script or generator directive
+
+    Scripts run under the sandbox authorizer: setup scripts reach executors
+    over the network, so they must not ATTACH files or change pragmas.
+    """
+    directive = parse_directive(setup_sql)
+    if directive is not None:
+        generate(conn, directive["schema"], directive["spec"])
+    else:
+        with sandboxed(conn):
+            conn.executescript(setup_sql)
+
+
+def run_delta(conn: sqlite3.Connection, delta_sql: str) -> None:
+    """Apply a test case's delta script, under the same sandbox as run_setup()"""
+    with sandboxed(conn):
+        conn.executescript(delta_sql)
+
+
+def build_file(setup_sql: str, path: str, delta_sql: Optional[str] = None, base_path: Optional[str] = None) -> None:
+    """
+    Build a fixture into a new database file at `path`
+
+    Args:
+        setup_sql: Dataset script
+        path: File to create
+        delta_sql: Script applied after the dataset
+        base_path: Existing file of the dataset; copied instead of running setup_sql
+    """
+    if base_path is not None:
+        shutil.copyfile(base_path, path)
+    conn = sqlite3.connect(path)
+    try:
+        # Scratch build: the file is published atomically once complete
+        conn.execute("PRAGMA journal_mode=OFF")
+        if base_path is None:
+            run_setup(conn, setup_sql)
+        if delta_sql:
+            run_delta(conn, delta_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def build_image(setup_sql: str, delta_sql: Optional[str] = None) -> bytes:
+    """Run a setup script (and delta) in a scratch database and return its serialized image"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        run_setup(conn, setup_sql)
+        if delta_sql:
+            run_delta(conn, delta_sql)
+        return conn.serialize()
+    finally:
+        conn.close()
+
+
+def apply_delta(image: Union[bytes, memoryview], delta_sql: str) -> bytes:
+    """Image of a dataset with a delta script applied"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.deserialize(image)
+        run_delta(conn, delta_sql)
+        return conn.serialize()
+    finally:
+        conn.close()
+
+
+class FixtureCache:
+    """
+    LRU cache of serialized fixture databases
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+        bundle_path: str = "",
+        bundle_check_seconds: int = 30,
+        shared: Optional[SharedFixtureStore] = None,
+        max_scratch: int = 32
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_scratch = max_scratch
+        self.shared = shared
+        self.bundle_path = bundle_path
+        self.bundle_check_seconds = bundle_check_seconds
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0  # total len() of the cached images
+        self._uncacheable: set = set()  # keys of images over max_bytes, warned about once
+        self._scratch: "OrderedDict[str, List[sqlite3.Connection]]" = OrderedDict()
+        self._scratch_idle = 0
+        self._lock = threading.Lock()
+        self._bundle: Optional[FixtureBundle] = None
+        self._bundle_checked_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.bundle_hits = 0
+        self.shared_hits = 0
+        self.scratch_reuses = 0
+
+    def bundle(self) -> Optional[FixtureBundle]:
+        """
+        The fixture bundle, reopened when the file has been rebuilt
+
+        The file is stat()ed at most every bundle_check_seconds.
+        """
+        if not self.bundle_path:
+            return None
+        now = time.monotonic()
+        if self._bundle_checked_at is not None and now - self._bundle_checked_at < self.bundle_check_seconds:
+            return self._bundle
+
+        with self._lock:
+            self._bundle_checked_at = now
+            try:
+                stat = os.stat(self.bundle_path)
+                identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            except OSError:
+                identity = None
+
+            current = self._bundle.identity if self._bundle is not None else None
+            if identity != current:
+                # The old mapping is released once no fixture view references it
+                self._bundle = None
+                if identity is not None:
+                    try:
+                        self._bundle = FixtureBundle(self.bundle_path)
+                        logger.info("Loaded fixture bundle %s (%d fixtures)", self.bundle_path, len(self._bundle))
+                    except FixtureBundleError as e:
+                        logger.warning("Ignoring fixture bundle: %s", e)
+            return self._bundle
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache("fixture_memory", image is not None)
+        return image
+
+    def _store(self, key: str, image: bytes) -> None:
+        """Cache an image, evicting the least recently used past max_entries or max_bytes"""
+        if len(image) > self.max_bytes:
+            # Would evict everything else and then itself, so it is rebuilt
+            # on every use unless the shared store holds it
+            with self._lock:
+                first = key not in self._uncacheable
+                self._uncacheable.add(key)
+            if first:
+                logger.warning(
+                    "Fixture %s is %d bytes, over FIXTURE_CACHE_MAX_BYTES (%d): it is rebuilt for every "
+                    "submission unless SHARED_FIXTURE_DIR is usable",
+                    key[:12], len(image), self.max_bytes
+                )
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._images[key] = image
+            self._bytes += len(image)
+            while len(self._images) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_image(self, setup_sql: str, delta_sql: Optional[str] = None) -> Union[bytes, memoryview]:
+        """
+        Serialized database for a setup script, building it on a miss
+
+        Bundled fixtures are returned as a zero-copy view of the bundle. A
+        fixture with a delta is built from the dataset's cached image.
+
+        Raises:
+            sqlite3.Error: If the setup or delta script fails
+        """
+        key = fixture_key(setup_sql, delta_sql)
+        bundle = self.bundle()
+        if bundle is not None:
+            image = bundle.get_image(key)
+            record_cache("fixture_bundle", image is not None)
+            if image is not None:
+                with self._lock:
+                    self.bundle_hits += 1
+                return image
+
+        image = self._lookup(key)
+        if image is None:
+            # Built outside the lock; two threads racing on the same fixture
+            # produce identical images, so the duplicate work is harmless
+            if delta_sql:
+                image = apply_delta(self.get_image(setup_sql), delta_sql)
+            else:
+                image = build_image(setup_sql)
+            self._store(key, image)
+        return image
+
+    def shared_path(self, setup_sql: str, delta_sql: Optional[str] = None) -> Optional[str]:
+        """
+        File of a fixture in the shared store, writing it there on first use
+
+        Returns None if the store is not attached or is full.
+
+        Raises:
+            sqlite3.Error: If the setup or delta script fails
+        """
+        if self.shared is None or not self.shared.attached or not SUPPORTS_IMAGES:
+            return None
+
+        key = fixture_key(setup_sql, delta_sql)
+        path = self.shared.get(key)
+        record_cache("fixture_shared", path is not None)
+        if path is not None:
+            with self._lock:
+                self.shared_hits += 1
+            return path
+
+        bundle = self.bundle()
+        image = bundle.get_image(key) if bundle is not None else None
+        if image is not None:
+            def write(partial_path: str) -> None:
+                with open(partial_path, "wb") as f:
+                    f.write(image)
+        else:
+            # The dataset's shared file, so a delta is applied to a copy of it
+            base_path = self.shared_path(setup_sql) if delta_sql else None
+
+            # Built straight into the shared file; no private copy is kept
+            def write(partial_path: str) -> None:
+                build_file(setup_sql, partial_path, delta_sql=delta_sql, base_path=base_path)
+        return self.shared.materialize(key, write)
+
+    def open(self, setup_sql: str, writable: bool = True, delta_sql: Optional[str] = None) -> sqlite3.Connection:
+        """
+        Open a fixture
+
+        Args:
+            setup_sql: Script that builds the fixture's dataset
+            writable: False opens the shared, immutable file when available
+                (no copy); True always returns a private in-memory copy
+            delta_sql: Script applied on top of the dataset
+
+        Raises:
+            sqlite3.Error: If the setup or delta script fails
+        """
+        if not writable:
+            path = self.shared_path(setup_sql, delta_sql)
+            if path is not None:
+                return open_readonly_image(path)
+
+        conn = sqlite3.connect(":memory:")
+        try:
+            if SUPPORTS_IMAGES:
+                conn.deserialize(self.get_image(setup_sql, delta_sql))
+            else:
+                run_setup(conn, setup_sql)
+                if delta_sql:
+                    run_delta(conn, delta_sql)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _acquire_scratch(self, key: str) -> Optional[sqlite3.Connection]:
+        with self._lock:
+            idle = self._scratch.get(key)
+            if not idle:
+                return None
+            self._scratch_idle -= 1
+            self.scratch_reuses += 1
+            conn = idle.pop()
+            if not idle:
+                del self._scratch[key]
+            return conn
+
+    def _release_scratch(self, key: str, conn: sqlite3.Connection) -> None:
+        evicted = []
+        with self._lock:
+            self._scratch.setdefault(key, []).append(conn)
+            self._scratch.move_to_end(key)
+            self._scratch_idle += 1
+            while self._scratch_idle > self.max_scratch:
+                oldest_key, oldest = next(iter(self._scratch.items()))
+                evicted.append(oldest.pop(0))
+                self._scratch_idle -= 1
+                if not oldest:
+                    del self._scratch[oldest_key]
+        for stale in evicted:
+            stale.close()
+
+    @contextmanager
+    def scratch(self, setup_sql: str, delta_sql: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+        """
+        Writable fixture whose changes are discarded on exit
+
+        The connection is in autocommit mode inside an open savepoint; anything
+        executed on it is rolled back when the block exits, and the connection
+        is kept for the next caller. Statements that would end the savepoint
+        (COMMIT, RELEASE, ...) must be prevented by the caller, e.g. with an
+        authorizer; a connection left outside its savepoint is discarded.
+
+        Raises:
+            sqlite3.Error: If the setup or delta script fails
+        """
+        key = fixture_key(setup_sql, delta_sql)
+        conn = self._acquire_scratch(key)
+        record_cache("fixture_scratch", conn is not None)
+        if conn is None:
+            conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+            try:
+                if SUPPORTS_IMAGES:
+                    conn.deserialize(self.get_image(setup_sql, delta_sql))
+                else:
+                    run_setup(conn, setup_sql)
+                    if delta_sql:
+                        run_delta(conn, delta_sql)
+            except Exception:
+                conn.close()
+                raise
+
+        conn.execute("SAVEPOINT scratch")
+        try:
+            yield conn
+        finally:
+            conn.set_authorizer(None)
+            conn.set_progress_handler(None, 0)
+            try:
+                conn.execute("ROLLBACK TO scratch")
+                conn.execute("RELEASE scratch")
+                reusable = not conn.in_transaction
+            except sqlite3.Error:
+                reusable = False
+            if reusable:
+                self._release_scratch(key, conn)
+            else:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        bundle = self.bundle()
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "uncacheable": len(self._uncacheable),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bundle_fixtures": len(bundle) if bundle is not None else 0,
+                "bundle_built_at": bundle.built_at if bundle is not None else None,
+                "bundle_hits": self.bundle_hits,
+                "shared_hits": self.shared_hits,
+                "scratch_idle": self._scratch_idle,
+                "scratch_reuses": self.scratch_reuses,
+                "shared": self.shared.stats() if self.shared is not None else {"attached": False},
+            }
+
+
+fixture_cache = FixtureCache(
+    max_entries=settings.FIXTURE_CACHE_SIZE,
+    max_bytes=settings.FIXTURE_CACHE_MAX_BYTES,
+    bundle_path=settings.FIXTURE_BUNDLE_PATH,
+    bundle_check_seconds=settings.FIXTURE_BUNDLE_CHECK_SECONDS,
+    max_scratch=settings.FIXTURE_SCRATCH_CONNECTIONS,
+    shared=SharedFixtureStore(settings.SHARED_FIXTURE_DIR, settings.SHARED_FIXTURE_MAX_BYTES)
+    if settings.SHARED_FIXTURE_DIR else None
+)
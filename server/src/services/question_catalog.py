@@ -0,0 +1,105 @@
+"""
+In-process cache of the serialized active question catalog
+
+The catalog changes only when questions are seeded, so each worker loads it
+once, serializes it to JSON bytes and serves GET /api/questions and
+GET /api/questions/{id} from memory until the TTL expires.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.config import settings
+from src.core.metrics import record_cache
+from src.models.question import Question
+from src.models.test_case import TestCase
+from src.schemas.question import QuestionResponse
+
+# (list body, bodies by question id, monotonic load time)
+Snapshot = Tuple[bytes, Dict[int, bytes], float]
+
+
+class QuestionCatalog:
+    """
+    Serialized active questions, refreshed from the database after a TTL
+
+    The list body, the per-question bodies and the load time are published
+    together as one snapshot tuple, so a reader never pairs the list of one
+    load with the questions of another. invalidate() bumps a generation
+    counter; a load that started before it finishes serving its own request
+    but does not publish what it read.
+    """
+
+    def __init__(self, ttl_seconds: int = 60):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[Snapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _fresh(self, snapshot: Optional[Snapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot[2] < self.ttl_seconds
+
+    def _build(self, db: Session) -> Tuple[bytes, Dict[int, bytes]]:
+        questions = (
+            db.query(Question)
+            .options(selectinload(Question.test_cases).joinedload(TestCase.dataset))
+            .filter(Question.is_active == True)
+            .order_by(Question.id)
+            .all()
+        )
+        by_id = {
+            question.id: QuestionResponse.model_validate(question).model_dump_json(by_alias=True).encode()
+            for question in questions
+        }
+        return b"[" + b",".join(by_id.values()) + b"]", by_id
+
+    def _refresh(self, db: Session) -> Snapshot:
+        with self._lock:
+            generation = self._generation
+        list_body, by_id = self._build(db)
+        snapshot = (list_body, by_id, time.monotonic())
+        with self._lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def load(self, db: Session) -> int:
+        """
+        Reload and serialize every active question
+
+        Returns:
+            Number of questions in the catalog
+        """
+        return len(self._refresh(db)[1])
+
+    def _current(self, db: Session) -> Snapshot:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            record_cache("question_catalog", True)
+            return snapshot
+        with self._load_lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                record_cache("question_catalog", True)
+                return snapshot
+            record_cache("question_catalog", False)
+            return self._refresh(db)
+
+    def list_body(self, db: Session) -> bytes:
+        """JSON array of all active questions"""
+        return self._current(db)[0]
+
+    def question_body(self, db: Session, question_id: int) -> Optional[bytes]:
+        """JSON for one active question, or None if it does not exist"""
+        return self._current(db)[1].get(question_id)
+
+    def invalidate(self) -> None:
+        """Drop the catalog and discard any load already in flight"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+question_catalog = QuestionCatalog(ttl_seconds=settings.QUESTION_CATALOG_TTL_SECONDS)
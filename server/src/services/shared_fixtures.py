@@ -0,0 +1,224 @@
+"""
+Fixture images shared between worker processes
+
+With `uvicorn --workers N`, a per-process fixture cache holds every fixture N
+times. Instead, each fixture image is written once to a directory on tmpfs
+(/dev/shm by default) under its content hash. Every worker opens it
+read-only with immutable=1 and memory-maps it, so the pages exist once per
+host whatever the worker count. Submissions that need a writable database
+still get a private in-memory copy.
+
+Workers register themselves in the store (one file per PID). The last live
+worker to detach removes the whole directory; registrations of workers that
+died without detaching are pruned by PID liveness.
+
+The directory has a predictable path in a world-writable place, so it is
+created private (0700) and only used if it is a real directory owned by this
+user that nobody else can write to. Otherwise workers fall back to their own
+fixture caches.
+"""
+import atexit
+import logging
+import os
+import shutil
+import stat
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("sqltown.fixtures")
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedFixtureStore:
+    """
+    Content-addressed directory of fixture image files shared by all workers
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.attached = False
+        self._lock = threading.Lock()
+        self._usage: Optional[int] = None
+
+    # ------------------------------------------------------------ registration
+
+    @property
+    def _workers_dir(self) -> str:
+        return os.path.join(self.directory, "workers")
+
+    @contextmanager
+    def _registry_lock(self) -> Iterator[None]:
+        """Cross-process lock serializing attach/detach"""
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _live_workers(self) -> List[int]:
+        """PIDs of attached workers, removing registrations of dead ones"""
+        live = []
+        for name in os.listdir(self._workers_dir):
+            pid = int(name)
+            if _pid_alive(pid):
+                live.append(pid)
+            else:
+                os.remove(os.path.join(self._workers_dir, name))
+        return live
+
+    def _check_private(self) -> Optional[str]:
+        """Why the directory must not be used, or None if only this user controls it"""
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            return "not a directory"
+        if info.st_uid != os.geteuid():
+            return f"owned by uid {info.st_uid}"
+        if info.st_mode & 0o077:
+            return f"mode {stat.S_IMODE(info.st_mode):o} is not 700"
+        return None
+
+    def attach(self) -> bool:
+        """
+        Register this process as a user of the store
+
+        Returns:
+            False if shared memory is unavailable or the directory is not
+            private to this user (the caller then keeps fixtures in process
+            memory)
+        """
+        if self.attached:
+            return True
+        if fcntl is None:
+            return False
+        try:
+            try:
+                os.mkdir(self.directory, 0o700)
+            except FileExistsError:
+                pass
+            problem = self._check_private()
+            if problem is not None:
+                logger.warning("Not using shared fixture store %s: %s", self.directory, problem)
+                return False
+            os.makedirs(self._workers_dir, mode=0o700, exist_ok=True)
+            with self._registry_lock():
+                self._live_workers()
+                open(os.path.join(self._workers_dir, str(os.getpid())), "w").close()
+        except OSError as e:
+            logger.warning("Shared fixture store %s unavailable: %s", self.directory, e)
+            return False
+        self.attached = True
+        atexit.register(self.detach)
+        return True
+
+    def detach(self) -> None:
+        """Unregister this process; the last worker out removes the store"""
+        if not self.attached:
+            return
+        self.attached = False
+        try:
+            with self._registry_lock():
+                registration = os.path.join(self._workers_dir, str(os.getpid()))
+                if os.path.exists(registration):
+                    os.remove(registration)
+                if not self._live_workers():
+                    # Open mappings in other processes stay valid after unlink
+                    shutil.rmtree(self.directory, ignore_errors=True)
+        except OSError as e:
+            logger.warning("Failed to detach from shared fixture store: %s", e)
+
+    # ---------------------------------------------------------------- fixtures
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.sqlite")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a shared fixture, or None if no worker has stored it yet"""
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def usage(self, refresh: bool = False) -> int:
+        """Bytes used by fixture files (cached; other workers' writes show up on refresh)"""
+        if self._usage is None or refresh:
+            self._usage = sum(
+                entry.stat().st_size
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".sqlite")
+            )
+        return self._usage
+
+    def materialize(self, key: str, write: Callable[[str], None]) -> Optional[str]:
+        """
+        Create a fixture file once for all workers
+
+        Only one process runs `write` for a given key; the others wait for it
+        and then use its file.
+
+        Args:
+            key: Fixture content hash
+            write: Creates the fixture database at the path it is given
+
+        Returns:
+            Path of the shared file, or None if the store is full or unusable
+        """
+        path = self.path_for(key)
+        if os.path.exists(path):
+            return path
+
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(f"{path}.lock", "a") as key_lock:
+                fcntl.flock(key_lock, fcntl.LOCK_EX)
+                try:
+                    if os.path.exists(path):
+                        return path
+                    if self.usage(refresh=True) >= self.max_bytes:
+                        return None
+                    write(partial)
+                    os.chmod(partial, 0o444)
+                    # Atomic, so readers only ever see complete files
+                    os.replace(partial, path)
+                finally:
+                    # Lock files stay until the store is removed: unlinking one
+                    # while another process waits on it would break exclusion
+                    fcntl.flock(key_lock, fcntl.LOCK_UN)
+        except OSError as e:
+            logger.warning("Failed to share fixture %s: %s", key, e)
+            return None
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        with self._lock:
+            self._usage = None
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.attached:
+            return {"attached": False}
+        with self._lock:
+            fixtures = sum(1 for name in os.listdir(self.directory) if name.endswith(".sqlite"))
+            usage = self.usage()
+        return {
+            "attached": True,
+            "directory": self.directory,
+            "fixtures": fixtures,
+            "bytes": usage,
+            "max_bytes": self.max_bytes,
+            "workers": len(os.listdir(self._workers_dir)),
+        }
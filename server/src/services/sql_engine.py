@@ -1,6 +1,26 @@
+import hashlib
 import sqlite3
 import json
-from typing import List, Dict, Any
+from contextlib import ExitStack
+from typing import Iterable, List, Dict, Any, NamedTuple, Optional, Tuple
+
+from src.services.engines import DEFAULT_DIALECT, QueryTimeoutError, backends, get_backend
+from src.services.fixture_bundle import canonical_row
+from src.utils.sql_statements import split_statements
+from src.utils.tracing import trace_phase
+
+# Actions a state-graded submission may not perform: ending or nesting the
+# transaction would escape the rollback, the rest would reach outside the
+# in-memory fixture
+_STATE_DENIED_ACTIONS = {
+    sqlite3.SQLITE_TRANSACTION,
+    sqlite3.SQLITE_SAVEPOINT,
+    sqlite3.SQLITE_ATTACH,
+    sqlite3.SQLITE_DETACH,
+    sqlite3.SQLITE_PRAGMA,
+}
+
+_FINGERPRINT_MODULUS = 2 ** 256
 
 
 def normalize_result(rows: List[tuple], columns: List[str]) -> List[Dict[str, Any]]:
@@ -23,17 +43,20 @@ def compare_results(actual: List[Dict], expected: List[Dict]) -> bool:
     return sorted(actual, key=str) == sorted(expected, key=str)
 
 
-def execute_sql_safely(setup_sql: str, user_sql: str, expected_output: List[Dict]):
+def execute_sql_safely(
+    setup_sql: str,
+    user_sql: str,
+    expected_output: List[Dict],
+    delta_sql: Optional[str] = None,
+    dialect: str = DEFAULT_DIALECT
+):
     """
     Core SQL execution engine
-    """
-    conn = sqlite3.connect(":memory:")
-    cursor = conn.cursor()
 
+    Runs the query on the question's backend (SQLite unless its dialect says
+    otherwise); every backend returns rows in the same canonical form.
+    """
     try:
-        # 🔹 Run setup SQL (create tables + insert data)
-        cursor.executescript(setup_sql)
-
         # 🔹 Security check (block dangerous commands)
         forbidden = ["DROP", "DELETE", "UPDATE", "INSERT", "ALTER"]
         upper_sql = user_sql.upper()
@@ -43,26 +66,202 @@ def execute_sql_safely(setup_sql: str, user_sql: str, expected_output: List[Dict
                 "error": "Only SELECT queries are allowed."
             }
 
-        # 🔹 Execute user query
-        cursor.execute(user_sql)
+        with ExitStack() as stack:
+            # 🔹 Open the fixture read-only (built from setup_sql once, then shared by all workers)
+            with trace_phase("fixture"):
+                session = stack.enter_context(get_backend(dialect).session(setup_sql, delta_sql))
 
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-
-        actual_result = normalize_result(rows, columns)
+            # 🔹 Execute user query
+            with trace_phase("query"):
+                session.run(user_sql)
+                columns, rows = session.fetch()
 
         # 🔹 Compare
-        passed = compare_results(actual_result, expected_output)
+        with trace_phase("compare"):
+            actual_result = normalize_result(rows, columns)
+            passed = compare_results(actual_result, expected_output)
 
         return {
             "passed": passed,
             "result": actual_result
         }
 
+    except QueryTimeoutError as e:
+        return {
+            "error": str(e),
+            "timeout": True
+        }
+
     except Exception as e:
         return {
             "error": str(e)
         }
 
-    finally:
-        conn.close()
\ No newline at end of file
+
+def rows_fingerprint(rows: Iterable[Dict]) -> str:
+    """
+    Order-insensitive hash of a table's rows
+
+    A multiset hash: the sum of per-row hashes, so it streams over any number
+    of rows without sorting, and duplicate rows still count. Like
+    compare_results(), 2 and 2.0 are equal.
+    """
+    total = 0
+    count = 0
+    for row in rows:
+        encoded = json.dumps(canonical_row(row), sort_keys=True, separators=(",", ":"), default=str)
+        total = (total + int.from_bytes(hashlib.sha256(encoded.encode("utf-8")).digest(), "big")) % _FINGERPRINT_MODULUS
+        count += 1
+    return f"{count}:{total:064x}"
+
+
+def table_fingerprint(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    """rows_fingerprint() of a table's current contents, or None if it does not exist"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    if exists is None:
+        return None
+    cursor = conn.execute('SELECT * FROM "{}"'.format(table.replace('"', '""')))
+    columns = [desc[0] for desc in cursor.description]
+    return rows_fingerprint(dict(zip(columns, row)) for row in cursor)
+
+
+def _state_authorizer(action, arg1, arg2, db_name, trigger):
+    if action in _STATE_DENIED_ACTIONS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() == "load_extension":
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+def execute_dml_safely(
+    setup_sql: str,
+    user_sql: str,
+    expected_state: Dict[str, Optional[str]],
+    delta_sql: Optional[str] = None,
+    dialect: str = DEFAULT_DIALECT
+):
+    """
+    Run data-modifying SQL on a disposable copy of the fixture and grade the result
+
+    The statements run inside a savepoint on a scratch connection; the
+    tables named in expected_state are fingerprinted and compared, then
+    everything is rolled back, so neither the next test case nor the next
+    submission has to rebuild the fixture. All statements share the SQLite
+    backend's time limit, and each may return at most its row limit.
+
+    Args:
+        setup_sql: Script that builds the fixture's dataset
+        user_sql: One or more statements (INSERT/UPDATE/DELETE, DDL, SELECT)
+        expected_state: table name -> expected table_fingerprint(), or None
+            if the table should not exist
+        delta_sql: Script applied on top of the dataset
+        dialect: Question dialect; state grading is SQLite-only
+    """
+    if dialect != "sqlite":
+        return {
+            "error": f"Data-modifying questions are not supported on {dialect}."
+        }
+
+    try:
+        with ExitStack() as stack:
+            with trace_phase("fixture"):
+                session = stack.enter_context(backends["sqlite"].scratch(setup_sql, delta_sql))
+                conn = session.conn
+
+            with trace_phase("query"):
+                conn.set_authorizer(_state_authorizer)
+                statements = 0
+                for statement in split_statements(user_sql.splitlines(keepends=True)):
+                    try:
+                        # Reads any rows too, under the same deadline and row limit
+                        session.run(statement)
+                    except sqlite3.DatabaseError as e:
+                        if str(e) == "not authorized":
+                            return {
+                                "error": "Transaction control, ATTACH and PRAGMA statements are not allowed."
+                            }
+                        raise
+                    statements += 1
+                conn.set_authorizer(None)
+
+            if statements == 0:
+                return {"error": "No SQL statement to execute."}
+
+            with trace_phase("compare"):
+                tables = {
+                    table: table_fingerprint(conn, table) == expected
+                    for table, expected in expected_state.items()
+                }
+
+        return {
+            "passed": all(tables.values()),
+            "tables": tables
+        }
+
+    except QueryTimeoutError as e:
+        return {
+            "error": str(e),
+            "timeout": True
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e)
+        }
+
+
+class GradingCase(NamedTuple):
+    """
+    One test case of a question, as needed to grade a submission
+    """
+    setup_sql: str
+    delta_sql: Optional[str]
+    expected_output: Any
+    expected_state: Optional[Dict[str, Optional[str]]]
+    dialect: str
+
+
+def grade_submission(cases: List[GradingCase], user_sql: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Run a submission against every test case of a question
+
+    Stops at the first test case that errors.
+
+    Returns:
+        (response body, verdict), the verdict being pass, fail, error or timeout
+    """
+    results = []
+
+    for index, case in enumerate(cases):
+        if case.expected_state is not None:
+            execution = execute_dml_safely(
+                case.setup_sql,
+                user_sql,
+                case.expected_state,
+                delta_sql=case.delta_sql,
+                dialect=case.dialect
+            )
+        else:
+            execution = execute_sql_safely(
+                case.setup_sql,
+                user_sql,
+                case.expected_output,
+                delta_sql=case.delta_sql,
+                dialect=case.dialect
+            )
+
+        if "error" in execution:
+            return execution, "timeout" if execution.get("timeout") else "error"
+
+        results.append({
+            "test_case": index + 1,
+            "passed": execution["passed"]
+        })
+
+    all_passed = all(r["passed"] for r in results)
+    return {
+        "passed": all_passed,
+        "details": results
+    }, "pass" if all_passed else "fail"
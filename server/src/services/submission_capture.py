@@ -0,0 +1,251 @@
+"""
+Submission capture
+
+Opt-in (CAPTURE_ENABLED): every graded submission, or a CAPTURE_SAMPLE_RATE
+fraction of them, is appended as one JSON line to rotating files in
+CAPTURE_DIR, so real traffic can be replayed offline against a new engine
+version (benchmarks/replay_submissions.py):
+
+    {"ts": "2026-10-19T16:30:00Z", "question_id": 12, "dialect": "sqlite",
+     "sql": "SELECT ...", "verdict": "fail", "duration_ms": 4.1,
+     "phases_ms": {"fixture": 0.2, "query": 3.5, "compare": 0.1}, "error": null}
+
+Records are anonymized: no user, client address, request ID or headers, and
+timestamps are truncated to the minute. With CAPTURE_REDACT_LITERALS, string
+literals in the SQL are replaced by '?' as well (replaying such records still
+exercises the engine, but their verdicts may drift).
+
+Grading never waits on the disk: records go through a bounded queue to a
+writer thread, and are dropped (and counted) if it falls behind. Each worker
+writes its own files (the PID is in the name); a file is closed once it
+reaches CAPTURE_MAX_FILE_BYTES, and the oldest files in the directory are
+deleted beyond CAPTURE_MAX_FILES. The newest file of each live worker is
+still being written and is never deleted, whichever worker prunes.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import settings
+from src.core.metrics import CAPTURED_SUBMISSIONS
+from src.utils.tracing import current_trace
+
+logger = logging.getLogger("sqltown.capture")
+
+GRADING_PHASES = ("fixture", "query", "compare")
+FILE_PREFIX = "submissions-"
+FILE_SUFFIX = ".jsonl"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+_STOP = object()
+
+
+def redact_literals(sql: str) -> str:
+    """Replace every single-quoted string literal with '?'"""
+    return _STRING_LITERAL.sub("'?'", sql)
+
+
+def _file_pid(path: str) -> Optional[int]:
+    """PID of the worker that wrote a capture file (submissions-<stamp>-<pid>-<n>.jsonl)"""
+    parts = os.path.basename(path)[len(FILE_PREFIX):-len(FILE_SUFFIX)].split("-")
+    try:
+        return int(parts[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def capture_files(directory: str) -> List[str]:
+    """Capture files in a directory, oldest first"""
+    try:
+        names = [name for name in os.listdir(directory) if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    # Names start with the creation time, so they sort chronologically
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+class SubmissionCapture:
+    """
+    Background JSONL writer for graded submissions (one per worker)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 20,
+        queue_size: int = 10000,
+        max_sql_chars: int = 100000,
+        redact_literals: bool = False
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.max_sql_chars = max_sql_chars
+        self.redact = redact_literals
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._file_bytes = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(
+        self,
+        question_id: int,
+        dialect: str,
+        sql: str,
+        verdict: str,
+        seconds: float,
+        error: Optional[str] = None
+    ) -> None:
+        """Queue a graded submission (no-op unless capture is enabled)"""
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return
+        if len(sql) > self.max_sql_chars:
+            return
+
+        trace = current_trace()
+        phases = {}
+        if trace is not None:
+            phases = {
+                name: round(trace.phases[name] * 1000, 3)
+                for name in GRADING_PHASES
+                if name in trace.phases
+            }
+        record = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:00Z", time.gmtime()),
+            "question_id": question_id,
+            "dialect": dialect,
+            "sql": redact_literals(sql) if self.redact else sql,
+            "verdict": verdict,
+            "duration_ms": round(seconds * 1000, 3),
+            "phases_ms": phases,
+            "error": error[:500] if error else None,
+        }
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            CAPTURED_SUBMISSIONS.labels("dropped").inc()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._start_lock:
+            if self._writer is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._writer = threading.Thread(target=self._run, name="submission-capture", daemon=True)
+                self._writer.start()
+
+    def _open(self) -> None:
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        path = os.path.join(self.directory, f"{FILE_PREFIX}{stamp}-{os.getpid()}-{self.written}{FILE_SUFFIX}")
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_bytes = 0
+        self._prune()
+
+    def _prune(self) -> None:
+        files = capture_files(self.directory)
+        excess = len(files) - self.max_files
+        if excess <= 0:
+            return
+        # The newest file of each worker is the one it has open, unless it exited
+        newest = {}
+        for path in files:
+            newest[_file_pid(path)] = path
+        open_files = {
+            path for pid, path in newest.items()
+            if pid is not None and (pid == os.getpid() or _pid_alive(pid))
+        }
+        removable = [path for path in files if path not in open_files]
+        for path in removable[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            if self._file is None or self._file_bytes >= self.max_file_bytes:
+                if self._file is not None:
+                    self._file.close()
+                self._open()
+            line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+            self._file.write(line)
+            self._file_bytes += len(line.encode("utf-8"))
+        self._file.flush()
+        self.written += len(records)
+        CAPTURED_SUBMISSIONS.labels("written").inc(len(records))
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Write whatever else is already waiting in one go
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            records = [record for record in batch if record is not _STOP]
+            try:
+                if records:
+                    self._write(records)
+            except OSError as e:
+                self.dropped += len(records)
+                CAPTURED_SUBMISSIONS.labels("dropped").inc(len(records))
+                logger.warning("Could not write captured submissions: %s", e)
+            if stop:
+                break
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued records and stop the writer"""
+        writer = self._writer
+        if writer is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        writer.join(timeout)
+        self._writer = None
+
+
+submission_capture = SubmissionCapture(
+    settings.CAPTURE_DIR,
+    enabled=settings.CAPTURE_ENABLED,
+    sample_rate=settings.CAPTURE_SAMPLE_RATE,
+    max_file_bytes=settings.CAPTURE_MAX_FILE_BYTES,
+    max_files=settings.CAPTURE_MAX_FILES,
+    queue_size=settings.CAPTURE_QUEUE_SIZE,
+    max_sql_chars=settings.CAPTURE_MAX_SQL_CHARS,
+    redact_literals=settings.CAPTURE_REDACT_LITERALS,
+)
@@ -0,0 +1,324 @@
+"""
+Deterministic synthetic datasets
+
+Generates tables of any size from a question's `schema` JSON plus optional
+per-column distribution specs. The same schema, spec and seed always produce
+the same rows: every column draws from its own random stream seeded from
+(seed, table, column), so adding a column or changing the batch size leaves
+the other columns untouched. Values are generated a column batch at a time
+and loaded with executemany() in one transaction.
+
+Spec format:
+
+    {
+      "seed": 42,
+      "tables": {
+        "employees": {
+          "rows": 100000,
+          "columns": {
+            "salary": {"kind": "normal", "mean": 60000, "stddev": 15000, "min": 20000, "round": 0},
+            "department": {"kind": "choice", "values": ["HR", "IT", "Sales"], "weights": [1, 3, 2]}
+          }
+        }
+      }
+    }
+
+Column kinds: sequence, uniform_int, uniform, normal, choice (optionally
+Zipf-skewed), foreign_key, pattern, date. Any column may add
+"null_fraction". Columns without a spec get a default inferred from their
+type, constraints and sampleData.
+
+A test case can use a generated dataset as its fixture by setting its
+setup_sql to directive_setup_sql(schema, spec); the fixture cache recognises
+the directive and runs the generator instead of a script.
+"""
+import bisect
+import hashlib
+import json
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+DIRECTIVE_PREFIX = "-- sqltown:generate "
+
+DEFAULT_ROWS = 10000
+DEFAULT_BATCH_SIZE = 10000
+
+INTEGER_TYPES = ("INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT")
+REAL_TYPES = ("REAL", "FLOAT", "DOUBLE", "NUMERIC", "DECIMAL")
+DATE_TYPES = ("DATE", "DATETIME", "TIMESTAMP")
+
+
+class SyntheticDataError(ValueError):
+    """
+    Raised when a schema or distribution spec cannot be generated
+    """
+
+
+def _column_rng(seed: int, table: str, column: str) -> random.Random:
+    digest = hashlib.sha256(f"{seed}:{table}:{column}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _base_type(column_type: str) -> str:
+    return (column_type or "").upper().split("(")[0].strip()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def default_spec(column: Dict[str, Any], samples: List[Any]) -> Dict[str, Any]:
+    """Distribution for a column without an explicit spec"""
+    base_type = _base_type(column.get("type", ""))
+    constraints = " ".join(column.get("constraints", [])).upper()
+    values = [value for value in samples if value is not None]
+
+    if "PRIMARY KEY" in constraints and base_type in INTEGER_TYPES:
+        return {"kind": "sequence"}
+    if "UNIQUE" in constraints or "PRIMARY KEY" in constraints:
+        if base_type in INTEGER_TYPES:
+            return {"kind": "sequence"}
+        return {"kind": "pattern", "format": f"{column['name']}_{{}}"}
+
+    if base_type in DATE_TYPES:
+        dates = sorted(str(value)[:10] for value in values)
+        return {"kind": "date", "start": dates[0] if dates else "2020-01-01", "end": dates[-1] if dates else "2024-12-31"}
+
+    numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    if base_type in INTEGER_TYPES or base_type in REAL_TYPES or (numbers and len(numbers) == len(values)):
+        low, high = (min(numbers), max(numbers)) if numbers else (0, 1000)
+        # Widen the sample range so generated data is not limited to the hand-written rows
+        spread = max(high - low, abs(high) or 1)
+        low, high = low - spread / 2, high + spread / 2
+        if low >= 0 or (numbers and min(numbers) >= 0):
+            low = max(low, 0)
+        if base_type in REAL_TYPES or any(isinstance(value, float) for value in numbers):
+            return {"kind": "uniform", "min": low, "max": high, "round": 2}
+        return {"kind": "uniform_int", "min": int(low), "max": int(high)}
+
+    if values:
+        return {"kind": "choice", "values": sorted(set(values), key=str)}
+    return {"kind": "pattern", "format": f"{column['name']}_{{}}"}
+
+
+def _sequence_range(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {"start": spec.get("start", 1), "step": spec.get("step", 1)}
+
+
+class ColumnGenerator:
+    """
+    Produces a column's values in batches from its own random stream
+    """
+
+    def __init__(self, table: str, column: str, spec: Dict[str, Any], seed: int, resolve_rows: Callable[[str], int]):
+        self.name = column
+        self.spec = spec
+        self.rng = _column_rng(seed, table, column)
+        # Separate stream, so NULLs do not shift values between batches
+        self.null_rng = _column_rng(seed, table, column + ":null")
+        self._batch = self._build(spec, resolve_rows)
+        self.null_fraction = float(spec.get("null_fraction", 0))
+
+    def _build(self, spec: Dict[str, Any], resolve_rows: Callable[[str], int]) -> Callable[[int, int], List[Any]]:
+        kind = spec.get("kind")
+        rng = self.rng
+
+        if kind == "sequence":
+            start, step = spec.get("start", 1), spec.get("step", 1)
+            return lambda offset, n: [start + (offset + i) * step for i in range(n)]
+
+        if kind == "uniform_int":
+            low, high = int(spec["min"]), int(spec["max"])
+            span = high - low + 1
+            uniform = rng.random
+            return lambda offset, n: [low + int(uniform() * span) for _ in range(n)]
+
+        if kind == "uniform":
+            low, high = float(spec["min"]), float(spec["max"])
+            digits = spec.get("round")
+            uniform = rng.uniform
+            if digits is None:
+                return lambda offset, n: [uniform(low, high) for _ in range(n)]
+            return lambda offset, n: [round(uniform(low, high), digits) for _ in range(n)]
+
+        if kind == "normal":
+            mean, stddev = float(spec["mean"]), float(spec["stddev"])
+            low, high = spec.get("min", float("-inf")), spec.get("max", float("inf"))
+            digits = spec.get("round")
+            gauss = rng.gauss
+
+            def normal(offset, n):
+                values = [min(max(gauss(mean, stddev), low), high) for _ in range(n)]
+                if digits is None:
+                    return values
+                if digits == 0:
+                    return [int(round(value)) for value in values]
+                return [round(value, digits) for value in values]
+            return normal
+
+        if kind == "choice":
+            values = list(spec["values"])
+            if not values:
+                raise SyntheticDataError(f"Column {self.name}: no values to choose from")
+            cumulative = self._cumulative_weights(spec, len(values))
+            choices = rng.choices
+            return lambda offset, n: choices(values, cum_weights=cumulative, k=n)
+
+        if kind == "foreign_key":
+            # Ids of the referenced table's sequence, computed from a drawn
+            # index rather than listed: the table may have millions of rows.
+            # Draws match rng.choices() over the id list, value for value.
+            referenced = _sequence_range(spec.get("sequence", {}))
+            first, step = referenced["start"], referenced["step"]
+            count = resolve_rows(spec["table"])
+            if count <= 0:
+                raise SyntheticDataError(f"Column {self.name}: no values to choose from")
+            uniform = rng.random
+            cumulative = self._cumulative_weights(spec, count)
+            if cumulative is None:
+                scale = float(count)
+                return lambda offset, n: [first + int(uniform() * scale) * step for _ in range(n)]
+            total = cumulative[-1]
+            last = count - 1
+            return lambda offset, n: [
+                first + bisect.bisect(cumulative, uniform() * total, 0, last) * step for _ in range(n)
+            ]
+
+        if kind == "pattern":
+            fmt = spec["format"]
+            start = spec.get("start", 1)
+            return lambda offset, n: [fmt.format(start + offset + i) for i in range(n)]
+
+        if kind == "date":
+            start = date.fromisoformat(spec["start"])
+            days = (date.fromisoformat(spec["end"]) - start).days + 1
+            if days <= 0:
+                raise SyntheticDataError(f"Column {self.name}: end date is before start date")
+            uniform = rng.random
+            return lambda offset, n: [(start + timedelta(days=int(uniform() * days))).isoformat() for _ in range(n)]
+
+        raise SyntheticDataError(f"Column {self.name}: unknown distribution kind {kind!r}")
+
+    def _cumulative_weights(self, spec: Dict[str, Any], count: int) -> Optional[List[float]]:
+        """Running totals of a choice's weights, or None for a uniform choice"""
+        weights = spec.get("weights")
+        if weights is None and spec.get("skew"):
+            # Zipf-like: the k-th value is drawn proportionally to 1 / k^skew
+            skew = float(spec["skew"])
+            weights = (1 / (rank ** skew) for rank in range(1, count + 1))
+        elif weights is not None and len(weights) != count:
+            raise SyntheticDataError(f"Column {self.name}: weights and values differ in length")
+        if weights is None:
+            return None
+        total = 0.0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def batch(self, offset: int, n: int) -> List[Any]:
+        values = self._batch(offset, n)
+        if self.null_fraction:
+            uniform = self.null_rng.random
+            fraction = self.null_fraction
+            values = [None if uniform() < fraction else value for value in values]
+        return values
+
+
+def create_table_sql(table: Dict[str, Any]) -> str:
+    columns = ", ".join(
+        " ".join([_quote(column["name"]), column.get("type", "")] + list(column.get("constraints", []))).strip()
+        for column in table["columns"]
+    )
+    return f"CREATE TABLE {_quote(table['name'])} ({columns})"
+
+
+def generate(
+    conn: sqlite3.Connection,
+    schema: Dict[str, Any],
+    spec: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Create the schema's tables in `conn` and fill them with generated rows
+
+    Args:
+        conn: Empty SQLite database
+        schema: Question schema ({"tables": [{"name", "columns", "sampleData"}]})
+        spec: Seed, row counts and column distributions (see module docstring)
+        batch_size: Rows generated and inserted per executemany() call
+
+    Returns:
+        Rows generated per table
+
+    Raises:
+        SyntheticDataError: If the schema or spec is invalid
+    """
+    spec = spec or {}
+    seed = int(spec.get("seed", 0))
+    table_specs = spec.get("tables", {})
+    tables = schema.get("tables", []) if schema else []
+    if not tables:
+        raise SyntheticDataError("Schema has no tables")
+
+    known = {table["name"] for table in tables}
+    unknown = set(table_specs) - known
+    if unknown:
+        raise SyntheticDataError(f"Spec refers to unknown tables: {', '.join(sorted(unknown))}")
+
+    def resolve_rows(table_name: str) -> int:
+        if table_name not in known:
+            raise SyntheticDataError(f"Foreign key refers to unknown table {table_name}")
+        return int(table_specs.get(table_name, {}).get("rows", spec.get("rows", DEFAULT_ROWS)))
+
+    counts = {}
+    for table in tables:
+        name = table["name"]
+        rows = resolve_rows(name)
+        column_specs = table_specs.get(name, {}).get("columns", {})
+        samples = table.get("sampleData", [])
+        generators = [
+            ColumnGenerator(
+                name,
+                column["name"],
+                column_specs.get(column["name"]) or default_spec(column, [row[index] for row in samples if index < len(row)]),
+                seed,
+                resolve_rows,
+            )
+            for index, column in enumerate(table["columns"])
+        ]
+
+        conn.execute(create_table_sql(table))
+        insert = f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' for _ in generators)})"
+        for offset in range(0, rows, batch_size):
+            n = min(batch_size, rows - offset)
+            columns = [generator.batch(offset, n) for generator in generators]
+            conn.executemany(insert, zip(*columns))
+        counts[name] = rows
+
+    conn.commit()
+    return counts
+
+
+def directive_setup_sql(schema: Dict[str, Any], spec: Optional[Dict[str, Any]] = None) -> str:
+    """
+    setup_sql for a test case whose fixture is generated
+
+    The directive is canonical JSON, so equal schema/spec pairs share one
+    fixture key.
+    """
+    payload = json.dumps({"schema": schema, "spec": spec or {}}, sort_keys=True, separators=(",", ":"))
+    return DIRECTIVE_PREFIX + payload
+
+
+def parse_directive(setup_sql: str) -> Optional[Dict[str, Any]]:
+    """The {"schema", "spec"} of a generator directive, or None for a plain script"""
+    if not setup_sql or not setup_sql.startswith(DIRECTIVE_PREFIX):
+        return None
+    try:
+        return json.loads(setup_sql[len(DIRECTIVE_PREFIX):])
+    except ValueError as e:
+        raise SyntheticDataError(f"Invalid generator directive: {e}")
@@ -0,0 +1,128 @@
+"""
+Incremental JSON reading for large files
+"""
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+_decoder = json.JSONDecoder()
+
+# What the element scanner stops at inside a string, inside an array or
+# object, and after a bare number/true/false/null
+_STRING_STOP = re.compile(r'["\\]')
+_CONTAINER_STOP = re.compile(r'["\[\]{}]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time
+
+    Only the element being decoded (plus one read chunk) is held in memory,
+    so multi-gigabyte arrays can be processed without json.load(). An
+    element spanning several chunks is scanned for its end one chunk at a
+    time, resuming where the previous scan stopped, and decoded once.
+
+    Args:
+        stream: Text stream positioned at the start of the document
+        chunk_size: Number of characters read per refill
+
+    Raises:
+        ValueError: If the document is not a JSON array
+    """
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace() -> None:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    def read_element() -> None:
+        """Fill until the element at position is complete, or the stream ends"""
+        first = buffer[position] if position < len(buffer) else ""
+        depth = 1 if first in ("[", "{") else 0
+        in_string = first == '"'
+        scalar = not depth and not in_string
+        escaped = False
+        offset = 0 if scalar else 1
+        while True:
+            index = position + offset
+            while index < len(buffer):
+                if escaped:
+                    escaped = False
+                    index += 1
+                elif in_string:
+                    match = _STRING_STOP.search(buffer, index)
+                    if match is None:
+                        index = len(buffer)
+                        break
+                    index = match.end()
+                    if match.group() == "\\":
+                        escaped = True
+                    else:
+                        in_string = False
+                        if not depth:
+                            return
+                elif scalar:
+                    if _SCALAR_END.search(buffer, index):
+                        return
+                    index = len(buffer)
+                else:
+                    match = _CONTAINER_STOP.search(buffer, index)
+                    if match is None:
+                        index = len(buffer)
+                        break
+                    index = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if not depth:
+                            return
+            offset = index - position
+            if eof or not fill():
+                return
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == "]":
+        return
+
+    while True:
+        skip_whitespace()
+        read_element()
+        item, end = _decoder.raw_decode(buffer, position)
+        position = end
+        yield item
+
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        separator = buffer[position]
+        position += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected character {separator!r} in JSON array")
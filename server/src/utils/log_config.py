@@ -0,0 +1,70 @@
+"""
+Logging setup
+
+Configures the root logger once per process. With LOG_FORMAT=json every
+record is one JSON object per line (timestamp, level, logger, message,
+request_id and any fields passed via `extra={"fields": {...}}`), ready for
+a log pipeline; LOG_FORMAT=text keeps a human-readable layout for local
+development. The request ID of the request being served is attached to
+every record.
+"""
+import json
+import logging
+import sys
+import time
+
+from src.utils.tracing import current_request_id
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request's ID (or "-") to every record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "-")
+        if request_id != "-":
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json") -> None:
+    """
+    Send application logs to stderr in the given format
+
+    Idempotent: calling it again replaces the handler installed earlier.
+    uvicorn's own loggers keep their handlers.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "_sqltown", False):
+            root.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler._sqltown = True
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(_TEXT_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level.upper())
@@ -0,0 +1,441 @@
+"""
+Request profiling
+
+Two tools for finding where production time goes without redeploying:
+
+- On-demand profiles of a single request, triggered by an admin-signed
+  X-Profile header (or __profile query flag). A "sample" profile records the
+  request's stacks every PROFILE_SAMPLE_INTERVAL_MS and is stored as a
+  speedscope file; a "cprofile" profile records every call with cProfile and
+  is stored as a .prof file. Both also record the request's top allocations
+  with tracemalloc. Profiles go to PROFILE_DIR under an ID returned in the
+  X-Profile-ID response header.
+- Continuous low-rate sampling (PROFILE_CONTINUOUS_HZ) of every busy thread
+  in the worker, aggregated into a hot-path report.
+
+The sampler reads other threads' stacks with sys._current_frames(), so
+profiled code runs unmodified. Samples of the event loop thread can include
+other requests' coroutines interleaved with the profiled one.
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("sqltown.profiling")
+
+# (filename, first line, function name) from the outermost frame inwards
+Frame = Tuple[str, int, str]
+Stack = Tuple[Frame, ...]
+
+MAX_STACK_DEPTH = 128
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+PROFILE_MODES = ("sample", "cprofile")
+
+
+class ProfilingError(ValueError):
+    """
+    Raised for an invalid profile token or request
+    """
+
+
+def _stack(frame) -> Stack:
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        frames.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+def _is_idle(stack: Stack) -> bool:
+    if not stack:
+        return True
+    filename, _, function = stack[-1]
+    return (os.path.basename(filename), function) in IDLE_FRAMES
+
+
+class StackSampler:
+    """
+    Background thread that counts the stacks of a set of threads
+
+    Args:
+        interval: Seconds between samples
+        threads: Thread idents to sample, or None for every thread but the
+            sampler itself
+        max_stacks: Distinct stacks kept; samples of further new stacks are
+            only counted in `dropped`
+    """
+
+    def __init__(self, interval: float, threads: Optional[Set[int]] = None, max_stacks: int = 20000):
+        self.interval = interval
+        self.threads = threads
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="sqltown-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        # One final sample, so requests shorter than the interval are not empty
+        self.sample()
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                stack = _stack(frame)
+                if _is_idle(stack):
+                    continue
+                if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[stack] += 1
+                else:
+                    self.dropped += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks = Counter()
+            self.samples = 0
+            self.dropped = 0
+            self.started_at = time.time()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.stacks)
+
+
+def hot_functions(stacks: Counter, top: int = 30) -> List[Dict[str, Any]]:
+    """Functions by samples spent in them (self) and under them (total)"""
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for frame in set(stack):
+            total[frame] += count
+    samples = sum(stacks.values()) or 1
+    return [
+        {
+            "function": function,
+            "file": filename,
+            "line": line,
+            "self_samples": own[(filename, line, function)],
+            "total_samples": count,
+            "total_pct": round(count / samples * 100, 1),
+        }
+        for (filename, line, function), count in total.most_common(top)
+    ]
+
+
+def speedscope_document(stacks: Counter, name: str, interval: float) -> Dict[str, Any]:
+    """
+    Sampled profile in speedscope's file format
+
+    Open the file at https://www.speedscope.app or with the speedscope CLI.
+    """
+    index: Dict[Frame, int] = {}
+    frames = []
+    samples = []
+    weights = []
+    for stack, count in stacks.items():
+        indices = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[2], "file": frame[0], "line": frame[1]})
+            indices.append(index[frame])
+        samples.append(indices)
+        weights.append(round(count * interval * 1000, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "sqltown",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 3),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def sign_profile_request(secret: str, method: str, path: str, expires: int) -> str:
+    """Token allowing one method + path to be profiled until `expires` (unix time)"""
+    message = f"{expires}:{method.upper()}:{path}".encode()
+    signature = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(secret: str, token: str, method: str, path: str) -> bool:
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition(".")
+    try:
+        expires_at = int(expires)
+    except ValueError:
+        return False
+    if expires_at < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_request(secret, method, path, expires_at))
+
+
+class RequestProfile:
+    """
+    Profile of one request in progress
+    """
+
+    def __init__(self, profile_id: str, mode: str, interval: float, top_n: int):
+        if mode not in PROFILE_MODES:
+            raise ProfilingError(f"Unknown profile mode {mode!r}; use one of {', '.join(PROFILE_MODES)}")
+        self.id = profile_id
+        self.mode = mode
+        self.interval = interval
+        self.top_n = top_n
+        # Created on the event loop thread; worker threads join via enter_thread()
+        self.loop_thread = threading.get_ident()
+        self.threads: Set[int] = {self.loop_thread}
+        self._profilers: List[cProfile.Profile] = []
+        self._sampler: Optional[StackSampler] = None
+        self._tracing_memory = False
+        self.started = time.perf_counter()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(16)
+            self._tracing_memory = True
+        if self.mode == "sample":
+            self._sampler = StackSampler(self.interval, threads=self.threads).start()
+
+    def enter_thread(self) -> Optional[cProfile.Profile]:
+        """Include the calling thread; returns its cProfile profiler in cprofile mode"""
+        self.threads.add(threading.get_ident())
+        if self.mode != "cprofile":
+            return None
+        profiler = cProfile.Profile()
+        self._profilers.append(profiler)
+        return profiler
+
+    def leave_thread(self) -> None:
+        """Stop sampling a worker thread that has finished the request's work"""
+        if threading.get_ident() != self.loop_thread:
+            self.threads.discard(threading.get_ident())
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop profiling; returns the summary and the files to store"""
+        duration = time.perf_counter() - self.started
+        summary: Dict[str, Any] = {"id": self.id, "mode": self.mode, "duration_ms": round(duration * 1000, 2)}
+        files: Dict[str, bytes] = {}
+
+        if self._sampler is not None:
+            self._sampler.stop()
+            stacks = self._sampler.snapshot()
+            summary["samples"] = sum(stacks.values())
+            summary["top_functions"] = hot_functions(stacks, self.top_n)
+            document = speedscope_document(stacks, self.id, self.interval)
+            files["speedscope.json"] = json.dumps(document).encode()
+
+        if self._profilers:
+            stats = pstats.Stats(self._profilers[0])
+            for profiler in self._profilers[1:]:
+                stats.add(profiler)
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            summary["cprofile"] = out.getvalue()
+            # What Stats.dump_stats() writes; load with pstats or snakeviz
+            files["prof"] = marshal.dumps(stats.stats)
+
+        if self._tracing_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            summary["peak_traced_kb"] = round(peak / 1024, 1)
+            summary["allocations"] = [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:self.top_n]
+            ]
+        return {"summary": summary, "files": files}
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sqltown_request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def activate(profile: Optional[RequestProfile]):
+    return _current_profile.set(profile)
+
+
+def deactivate(token) -> None:
+    _current_profile.reset(token)
+
+
+class ProfileStore:
+    """
+    Profiles on local disk: <id>.json summary plus the profiler's files
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 200):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile_id: str, summary: Dict[str, Any], files: Dict[str, bytes]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        summary = dict(summary, files=sorted(files))
+        for suffix, content in files.items():
+            with open(self.path(profile_id, suffix), "wb") as f:
+                f.write(content)
+        with open(self.path(profile_id, "json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        self._prune()
+
+    def path(self, profile_id: str, suffix: str) -> str:
+        if not profile_id or "/" in profile_id or profile_id.startswith("."):
+            raise ProfilingError("Invalid profile id")
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def _summaries(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(".json")] for name in names if name.endswith(".json") and not name.endswith(".speedscope.json"))
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for profile_id in reversed(self._summaries()):
+            summary = self.get(profile_id)
+            if summary is not None:
+                profiles.append({key: summary.get(key) for key in ("id", "mode", "method", "path", "status", "duration_ms", "created_at")})
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(profile_id, "json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _prune(self) -> None:
+        summaries = self._summaries()
+        for profile_id in summaries[:max(len(summaries) - self.max_profiles, 0)]:
+            for name in os.listdir(self.directory):
+                if name.startswith(profile_id + "."):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+
+
+class ContinuousProfiler:
+    """
+    Low-rate sampling of every busy thread in this worker
+    """
+
+    def __init__(self, hz: float, max_stacks: int = 20000):
+        self.hz = hz
+        self.max_stacks = max_stacks
+        self._sampler: Optional[StackSampler] = None
+
+    @property
+    def running(self) -> bool:
+        return self._sampler is not None
+
+    def start(self) -> None:
+        if self.hz > 0 and self._sampler is None:
+            self._sampler = StackSampler(1 / self.hz, max_stacks=self.max_stacks).start()
+            logger.info("Continuous profiling at %.1f Hz", self.hz)
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+    def reset(self) -> None:
+        if self._sampler is not None:
+            self._sampler.reset()
+
+    def report(self, top: int = 30) -> Dict[str, Any]:
+        if self._sampler is None:
+            return {"running": False}
+        stacks = self._sampler.snapshot()
+        return {
+            "running": True,
+            "pid": os.getpid(),
+            "hz": self.hz,
+            "since": self._sampler.started_at,
+            "ticks": self._sampler.samples,
+            "busy_samples": sum(stacks.values()),
+            "dropped_samples": self._sampler.dropped,
+            "top_functions": hot_functions(stacks, top),
+        }
+
+    def speedscope(self) -> Optional[Dict[str, Any]]:
+        if self._sampler is None:
+            return None
+        return speedscope_document(self._sampler.snapshot(), f"sqltown worker {os.getpid()}", 1 / self.hz)
+
+
+def _configured():
+    from src.config import settings
+
+    return (
+        ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_STORED),
+        ContinuousProfiler(settings.PROFILE_CONTINUOUS_HZ),
+    )
+
+
+profile_store, continuous_profiler = _configured()
@@ -0,0 +1,32 @@
+"""
+Splitting SQL text into single statements
+"""
+import sqlite3
+from typing import Iterable, Iterator
+
+
+def split_statements(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Split SQL text, given line by line, into single statements
+
+    A ';' ends a statement unless it is inside a string, comment or trigger
+    body; sqlite3.complete_statement() knows the difference. A trailing
+    incomplete statement is yielded as is so executing it reports the syntax
+    error.
+    """
+    buffer = ""
+    for line in lines:
+        buffer += line
+        if ";" not in line:
+            continue
+        start = 0
+        end = buffer.find(";")
+        while end != -1:
+            if sqlite3.complete_statement(buffer[start:end + 1]):
+                yield buffer[start:end + 1]
+                start = end + 1
+            end = buffer.find(";", end + 1)
+        buffer = buffer[start:]
+
+    if buffer.strip():
+        yield buffer
@@ -0,0 +1,19 @@
+"""
+Helpers for serialized SQLite database images stored as files
+"""
+import os
+import sqlite3
+from urllib.parse import quote
+
+
+def open_readonly_image(path: str) -> sqlite3.Connection:
+    """
+    Open a database image file read-only
+
+    immutable=1 tells SQLite the file cannot change, so it skips locking and
+    change detection; pages are memory-mapped and shared through the page
+    cache by every connection (in any process) that opens the same file.
+    """
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size={os.path.getsize(path)}")
+    return conn
@@ -0,0 +1,40 @@
+"""
+Authorizer for running untrusted SQL scripts in a scratch SQLite database
+
+Scripts may create and fill tables, but not reach outside their database
+(ATTACH), reconfigure the connection (most PRAGMAs) or load extensions.
+"""
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+# Pragmas commonly found in dumps; anything else (journal_mode, writable_schema,
+# mmap_size, ...) would let a script reconfigure the sandbox
+ALLOWED_PRAGMAS = {
+    "foreign_keys",
+    "defer_foreign_keys",
+    "recursive_triggers",
+    "user_version",
+    "application_id",
+    "encoding",
+}
+
+
+def sandbox_authorizer(action, arg1, arg2, db_name, trigger):
+    if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_PRAGMA and (arg1 or "").lower() not in ALLOWED_PRAGMAS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() == "load_extension":
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+@contextmanager
+def sandboxed(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """The connection with sandbox_authorizer installed for the block"""
+    conn.set_authorizer(sandbox_authorizer)
+    try:
+        yield conn
+    finally:
+        conn.set_authorizer(None)
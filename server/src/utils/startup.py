@@ -0,0 +1,83 @@
+"""
+Startup profiler
+
+Records how long each subsystem takes to import and initialise, and the time
+from process start to the first completed request. The report is logged once
+after the first request and served at /api/admin/startup.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("sqltown.startup")
+
+
+def _process_age() -> float:
+    """Seconds since the interpreter process started (0 if unknown)"""
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupProfiler:
+    """
+    Collects named startup phases relative to a common origin
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        # Time the interpreter spent before this module was imported
+        self.pre_import_seconds = _process_age()
+        self.phases: List[Dict[str, Any]] = []
+        self.first_request_seconds: Optional[float] = None
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block of startup work under the given subsystem name"""
+        start = self._elapsed()
+        try:
+            yield
+        finally:
+            end = self._elapsed()
+            self.phases.append({
+                "name": name,
+                "start_ms": round(start * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+            })
+
+    def mark_first_request(self) -> None:
+        """Record the first completed request and log the startup report"""
+        if self.first_request_seconds is not None:
+            return
+        self.first_request_seconds = self._elapsed()
+        summary = ", ".join(f"{p['name']}={p['duration_ms']:.0f}ms" for p in self.phases)
+        logger.info(
+            "Startup: first request served %.0f ms after boot (%s)",
+            (self.pre_import_seconds + self.first_request_seconds) * 1000, summary
+        )
+
+    def report(self) -> Dict[str, Any]:
+        first_request = self.first_request_seconds
+        return {
+            "pid": os.getpid(),
+            "interpreter_ms": round(self.pre_import_seconds * 1000, 2),
+            "phases": self.phases,
+            "time_to_first_request_ms": (
+                round((self.pre_import_seconds + first_request) * 1000, 2)
+                if first_request is not None else None
+            ),
+        }
+
+
+startup_profiler = StartupProfiler()
+
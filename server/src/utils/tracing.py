@@ -0,0 +1,79 @@
+"""
+Per-request tracing
+
+Each HTTP request gets a RequestTrace holding its request ID and the time
+spent in named phases (auth, fixture, query, compare, ...). Code marks a
+phase with `with trace_phase("fixture"):`; outside a request, or with
+tracing disabled, that is a no-op. The trace lives in a context variable, so
+sync endpoints running in the threadpool record into the same trace.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class RequestTrace:
+    """
+    Phase timings of one request
+    """
+
+    __slots__ = ("request_id", "started", "phases", "endpoint_finished")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}  # seconds, summed over repeated phases
+        # When the endpoint function returned; what follows until the
+        # response starts is response serialization
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("sqltown_request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace of the request being served, if any"""
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+@contextmanager
+def start_trace(request_id: str) -> Iterator[RequestTrace]:
+    """Attribute phases recorded inside the block to a new RequestTrace"""
+    trace = RequestTrace(request_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def trace_phase(name: str) -> Iterator[None]:
+    """Add the block's duration to the current request's `name` phase"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+def mark_endpoint_finished() -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.endpoint_finished = time.perf_counter()
@@ -0,0 +1,101 @@
+"""
+Shared fixtures
+
+The app runs against a throwaway SQLite database, migrated and seeded from
+the question bank once per session. Settings are read when src.config is
+first imported, so the environment is set up before anything from src is.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_workdir = tempfile.mkdtemp(prefix="sqltown-tests-")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_workdir, 'sqltown.db')}",
+    DUCKDB_FIXTURE_DIR=os.path.join(_workdir, "duckdb"),
+    FIXTURE_BUNDLE_PATH="",
+    SHARED_FIXTURE_DIR="",
+    WARMUP_ENABLED="false",
+    RATE_LIMIT_ENABLED="false",
+    CAPTURE_ENABLED="false",
+    LOG_LEVEL="ERROR",
+)
+sys.path.insert(0, os.path.join(SERVER_DIR, "seed"))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from seed_questions import seed_questions
+
+    seed_questions(os.path.join(SERVER_DIR, "seed", "questions.json"), validate=False, bundle=False)
+
+    from main import app
+
+    yield app
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def question(client):
+    """An active SQLite question with its reference solution"""
+    from src.db.database import SessionLocal
+    from src.models.question import Question
+
+    db = SessionLocal()
+    try:
+        question = db.query(Question).filter(
+            Question.is_active == True, Question.dialect == "sqlite"
+        ).order_by(Question.id).first()
+        return {"id": question.id, "solution": question.solution}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer token of a freshly signed up user"""
+    response = client.post("/api/auth/signup", json={
+        "email": f"student-{uuid.uuid4().hex[:8]}@example.com",
+        "password": "correct horse battery staple",
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def cognito_user(app):
+    """
+    Claims of an existing user, accepted by routes that verify Cognito tokens
+
+    Those routes check the token against the user pool's JWKS, which is out
+    of reach here, so verify_token is overridden for the test.
+    """
+    from src.core.security import verify_token
+    from src.db.database import SessionLocal
+    from src.models.user import User
+
+    claims = {"sub": str(uuid.uuid4()), "email": f"cognito-{uuid.uuid4().hex[:8]}@example.com", "name": "Cognito"}
+    db = SessionLocal()
+    try:
+        db.add(User(id=claims["sub"], email=claims["email"], name=claims["name"], auth_provider="Cognito"))
+        db.commit()
+    finally:
+        db.close()
+
+    app.dependency_overrides[verify_token] = lambda: claims
+    yield claims
+    app.dependency_overrides.pop(verify_token, None)
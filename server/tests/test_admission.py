@@ -0,0 +1,92 @@
+"""
+Cost-weighted admission of grading work
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.admission import AdmissionController
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = dict(capacity=1.0, max_queue=2, queue_timeout=1.0, default_cost=0.05, smoothing=0.5)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_estimate_is_a_moving_average_of_observed_times():
+    controller = _controller()
+    assert controller.estimate(7) == 0.05
+
+    controller.observe(7, 0.4)
+    assert controller.estimate(7) == pytest.approx(0.4)
+    controller.observe(7, 0.2)
+    assert controller.estimate(7) == pytest.approx(0.3)
+    assert controller.estimate(8) == 0.05
+
+
+def test_admits_while_the_work_fits():
+    controller = _controller()
+
+    async def run():
+        await controller.acquire(0.4)
+        await controller.acquire(0.6)
+
+    asyncio.run(run())
+    assert controller.inflight == 2
+    assert controller.inflight_cost == pytest.approx(1.0)
+    assert controller.saturated()
+
+
+def test_idle_worker_admits_an_oversized_submission():
+    controller = _controller()
+    asyncio.run(controller.acquire(5.0))
+    assert controller.inflight == 1
+
+
+def test_queued_submission_is_admitted_on_release():
+    controller = _controller()
+
+    async def run():
+        await controller.acquire(0.8)
+        waiting = asyncio.ensure_future(controller.acquire(0.5))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        assert len(controller.queue) == 1
+
+        controller.release(0.8)
+        await waiting
+
+    asyncio.run(run())
+    assert controller.inflight == 1
+    assert controller.inflight_cost == pytest.approx(0.5)
+    assert not controller.queue
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = _controller(max_queue=0)
+
+    async def run():
+        await controller.acquire(1.0)
+        await controller.acquire(0.5)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert controller.rejected == 1
+
+
+def test_queue_timeout_is_rejected_and_leaves_the_queue():
+    controller = _controller(queue_timeout=0.01)
+
+    async def run():
+        await controller.acquire(1.0)
+        await controller.acquire(0.5)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 503
+    assert not controller.queue
+    assert controller.inflight == 1
@@ -0,0 +1,77 @@
+"""
+Reading bulk grading uploads
+"""
+import json
+
+import pytest
+
+from src.services.bulk_grading import BulkInputError, BulkItem, detect_format, parse_items
+
+
+def _parse(data, fmt, max_items=100, max_sql_chars=50):
+    if not isinstance(data, bytes):
+        data = data.encode()
+    return parse_items(data, fmt, max_items, max_sql_chars)
+
+
+@pytest.mark.parametrize("content_type, filename, fmt", [
+    ("application/json; charset=utf-8", None, "json"),
+    ("application/x-ndjson", None, "jsonl"),
+    ("text/plain", "answers.csv", "csv"),
+    (None, "answers.NDJSON", "jsonl"),
+    ("text/plain", None, None),
+])
+def test_detect_format(content_type, filename, fmt):
+    assert detect_format(content_type, filename) == fmt
+
+
+def test_json_list_and_items_object():
+    records = [{"student_ref": 7, "question_id": "3", "sql": "SELECT 1"}]
+    expected = [BulkItem(0, "7", 3, "SELECT 1")]
+
+    assert _parse(json.dumps(records), "json") == (expected, [])
+    assert _parse(json.dumps({"items": records}), "json") == (expected, [])
+
+
+def test_jsonl_reports_bad_lines_by_number():
+    text = '{"student_ref": "a", "question_id": 1, "sql": "SELECT 1"}\n\nnot json\n'
+    items, errors = _parse(text, "jsonl")
+
+    assert items == [BulkItem(0, "a", 1, "SELECT 1")]
+    assert len(errors) == 1
+    assert errors[0]["index"] == 1
+    assert errors[0]["error"].startswith("line 3: invalid JSON")
+
+
+def test_csv_with_a_byte_order_mark():
+    text = "\ufeffstudent_ref,question_id,sql\nbob,2,\"SELECT a, b FROM t\"\n"
+    assert _parse(text, "csv") == ([BulkItem(0, "bob", 2, "SELECT a, b FROM t")], [])
+
+
+def test_invalid_records_become_error_lines():
+    records = [
+        "SELECT 1",
+        {"student_ref": "a", "question_id": "three", "sql": "SELECT 1"},
+        {"student_ref": "b", "question_id": 1, "sql": "  "},
+        {"student_ref": "c", "question_id": 1, "sql": "SELECT " + "1" * 50},
+        {"question_id": 1, "sql": "SELECT 1"},
+    ]
+    items, errors = _parse(json.dumps(records), "json")
+
+    assert items == [BulkItem(4, "", 1, "SELECT 1")]
+    assert [error["index"] for error in errors] == [0, 1, 2, 3]
+    assert errors[1]["error"] == "question_id must be an integer"
+    assert errors[2]["error"] == "sql is required"
+    assert "longer than 50" in errors[3]["error"]
+
+
+@pytest.mark.parametrize("data, fmt, message", [
+    (b"\xff\xfe", "json", "UTF-8"),
+    ("[1,", "json", "Invalid JSON"),
+    ('{"answers": []}', "json", "Expected a list"),
+    ("student_ref,sql\n", "csv", "question_id"),
+    (json.dumps([{}] * 3), "json", "At most 2 items"),
+])
+def test_unreadable_uploads(data, fmt, message):
+    with pytest.raises(BulkInputError, match=message):
+        _parse(data, fmt, max_items=2)
@@ -0,0 +1,74 @@
+"""
+Deficit round robin order of the contest queue
+"""
+import asyncio
+import math
+
+import pytest
+
+from src.services.contest_scheduler import FIRST, ContestJob, ContestScheduler
+
+
+def _scheduler(quantum: float = 1.0, max_inflight_per_user: int = 1) -> ContestScheduler:
+    return ContestScheduler(
+        slots=1,
+        quantum=quantum,
+        max_inflight_per_user=max_inflight_per_user,
+        max_queued_per_user=100,
+        promote_after=60,
+    )
+
+
+def _picks(scheduler: ContestScheduler, queued, before=None):
+    """User IDs in the order _pick() hands out jobs queued as (user, cost, count)"""
+    async def run():
+        # Jobs carry a future, so they are made on a running loop
+        for user_id, cost, count in queued:
+            for _ in range(count):
+                scheduler._enqueue(ContestJob(1, user_id, 1, "SELECT 1", FIRST, cost), FIRST)
+        if before:
+            before(scheduler)
+        order = []
+        while True:
+            job = scheduler._pick(FIRST)
+            if job is None:
+                return order
+            order.append(job.user_id)
+
+    return asyncio.run(run())
+
+
+def test_equal_costs_alternate():
+    assert _picks(_scheduler(), [("a", 1.0, 3), ("b", 1.0, 3)]) == ["a", "b"] * 3
+
+
+def test_share_is_by_cost_not_by_count():
+    order = _picks(_scheduler(), [("a", 0.25, 8), ("b", 1.0, 2)])
+    assert order == ["a"] * 4 + ["b"] + ["a"] * 4 + ["b"]
+
+
+def test_a_job_dearer_than_the_quantum_still_runs():
+    assert _picks(_scheduler(quantum=0.1), [("a", 5.0, 1), ("b", 0.5, 1)]) == ["b", "a"]
+
+
+def test_users_at_their_inflight_limit_are_skipped():
+    def busy(scheduler):
+        scheduler._inflight["a"] = 1
+
+    scheduler = _scheduler()
+    assert _picks(scheduler, [("a", 1.0, 2), ("b", 1.0, 2)], before=busy) == ["b", "b"]
+    assert list(scheduler._rings[FIRST]) == ["a"]
+    assert len(scheduler._flows[FIRST]["a"].jobs) == 2
+
+
+def test_emptied_flows_leave_the_ring():
+    scheduler = _scheduler()
+    _picks(scheduler, [("a", 0.5, 1), ("b", 0.5, 1)])
+    assert not scheduler._rings[FIRST]
+    assert not scheduler._flows[FIRST]
+
+
+@pytest.mark.parametrize("quantum", [0, -0.05, math.inf, math.nan])
+def test_quantum_must_be_positive(quantum):
+    with pytest.raises(ValueError, match="quantum"):
+        _scheduler(quantum=quantum)
@@ -0,0 +1,63 @@
+"""
+Dataset index loading, refreshes and concurrent uploads
+"""
+from src.integrations.dataset_index import MANIFEST_VERSION, DatasetIndex
+
+
+def _entry(name):
+    return {"key": f"datasets/{name}", "filename": name, "size": 1}
+
+
+class StubS3:
+    """Serves a fixed listing; on_list runs part way through it"""
+
+    def __init__(self, listing, manifest=None):
+        self.listing = listing
+        self.manifest = manifest
+        self.on_list = None
+
+    def iter_database_files(self):
+        for index, entry in enumerate(self.listing):
+            if index == 1 and self.on_list:
+                self.on_list()
+            yield entry
+
+    def get_json(self, key):
+        return self.manifest
+
+    def get_json_versioned(self, key):
+        return self.manifest, "etag" if self.manifest else None
+
+    def put_json(self, key, data, if_match=None, if_none_match=False):
+        self.manifest = data
+
+
+def _keys(index):
+    return [entry["key"] for entry in index.query()[0]]
+
+
+def test_upload_during_a_refresh_survives_it():
+    s3 = StubS3([_entry("a.sql"), _entry("b.sql")])
+    index = DatasetIndex(s3)
+    index.ensure_loaded()
+    assert _keys(index) == ["datasets/a.sql", "datasets/b.sql"]
+
+    # The upload lands after the refresh listed its first page
+    s3.on_list = lambda: index.add(_entry("new.sql"))
+    assert index.rebuild() == 3
+    assert _keys(index) == ["datasets/a.sql", "datasets/b.sql", "datasets/new.sql"]
+    assert [entry["key"] for entry in s3.manifest["datasets"]] == _keys(index)
+
+    # Nothing is carried over once the refresh has finished
+    s3.on_list = None
+    s3.listing = [_entry("a.sql")]
+    assert index.rebuild() == 1
+
+
+def test_upload_during_a_cold_load_is_indexed():
+    s3 = StubS3([_entry("a.sql"), _entry("b.sql")])
+    index = DatasetIndex(s3)
+    s3.on_list = lambda: index.add(_entry("new.sql"))
+    index.ensure_loaded()
+    assert _keys(index) == ["datasets/a.sql", "datasets/b.sql", "datasets/new.sql"]
+
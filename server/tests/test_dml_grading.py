@@ -0,0 +1,96 @@
+"""
+Grading data-modifying submissions on the final table state
+"""
+import time
+
+import pytest
+
+from src.services import sql_engine
+from src.services.engines import ExecutionLimits, SQLiteBackend
+from src.services.fixture_cache import fixture_cache
+from src.services.sql_engine import execute_dml_safely, table_fingerprint
+
+SETUP_SQL = """
+CREATE TABLE accounts (id INTEGER PRIMARY KEY, owner TEXT NOT NULL, balance INTEGER NOT NULL);
+INSERT INTO accounts VALUES (1, 'ada', 100), (2, 'grace', 250), (3, 'linus', 0);
+"""
+REFERENCE = "UPDATE accounts SET balance = balance + 10 WHERE balance > 0; DELETE FROM accounts WHERE balance = 0;"
+
+
+@pytest.fixture
+def sqlite(monkeypatch):
+    backend = SQLiteBackend(ExecutionLimits(timeout_seconds=1.0, max_rows=100))
+    monkeypatch.setitem(sql_engine.backends, "sqlite", backend)
+    return backend
+
+
+@pytest.fixture
+def expected_state(sqlite):
+    with fixture_cache.scratch(SETUP_SQL) as conn:
+        conn.executescript(REFERENCE)
+        return {"accounts": table_fingerprint(conn, "accounts"), "audit": None}
+
+
+def test_reference_passes_and_is_rolled_back(sqlite, expected_state):
+    assert execute_dml_safely(SETUP_SQL, REFERENCE, expected_state) == {
+        "passed": True,
+        "tables": {"accounts": True, "audit": True},
+    }
+    # The next submission sees the fixture as built
+    result = execute_dml_safely(SETUP_SQL, "UPDATE accounts SET balance = 0", expected_state)
+    assert result["passed"] is False
+    assert execute_dml_safely(SETUP_SQL, REFERENCE, expected_state)["passed"] is True
+
+
+def test_deadline_covers_rows_read_by_a_select(sqlite, expected_state):
+    slow_select = (
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+        "SELECT x FROM c WHERE x = 1 OR x = 30000000 LIMIT 2"
+    )
+    start = time.monotonic()
+    result = execute_dml_safely(SETUP_SQL, f"{REFERENCE}\n{slow_select};", expected_state)
+    assert result["timeout"] is True
+    assert time.monotonic() - start < 3
+
+
+def test_deadline_is_shared_by_all_statements(sqlite, expected_state):
+    # Each statement alone stays under the limit; together they do not
+    spin = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 2000000) SELECT COUNT(*) FROM c;"
+    start = time.monotonic()
+    with sqlite.session(SETUP_SQL) as session:
+        session.run(spin)
+    single = time.monotonic() - start
+    repeats = int(1.0 / single) + 2
+
+    result = execute_dml_safely(SETUP_SQL, spin * repeats, expected_state)
+    assert result["timeout"] is True
+
+
+def test_runaway_insert_times_out(sqlite, expected_state):
+    result = execute_dml_safely(
+        SETUP_SQL,
+        "INSERT INTO accounts (owner, balance) WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT 'bot', x FROM c",
+        expected_state,
+    )
+    assert result["timeout"] is True
+
+
+def test_row_limit(sqlite, expected_state):
+    result = execute_dml_safely(SETUP_SQL, "SELECT * FROM accounts a, accounts b, accounts c, accounts d, accounts e", expected_state)
+    assert "more than 100 rows" in result["error"]
+    assert "timeout" not in result
+
+
+@pytest.mark.parametrize("statement", [
+    "SAVEPOINT sp",
+    "RELEASE sp",
+    "BEGIN",
+    "COMMIT",
+    "ATTACH DATABASE 'stolen.db' AS stolen",
+    "PRAGMA foreign_keys = OFF",
+    "PRAGMA table_info(accounts)",
+])
+def test_transaction_control_attach_and_pragma_are_denied(sqlite, expected_state, statement):
+    result = execute_dml_safely(SETUP_SQL, f"{REFERENCE}\n{statement};", expected_state)
+    assert result == {"error": "Transaction control, ATTACH and PRAGMA statements are not allowed."}
+    assert execute_dml_safely(SETUP_SQL, REFERENCE, expected_state)["passed"] is True
@@ -0,0 +1,111 @@
+"""
+Execution backends: limits, and SQLite/DuckDB parity on the same fixture
+"""
+import time
+
+import pytest
+
+from src.services import sql_engine
+from src.services.engines import (
+    DuckDBBackend,
+    ExecutionLimits,
+    QueryLimitError,
+    QueryTimeoutError,
+    SQLiteBackend,
+)
+from src.services.sql_engine import GradingCase, grade_submission
+
+LIMITS = ExecutionLimits(timeout_seconds=1.0, max_rows=100)
+
+# Finds its first row at once, its second only after 30M more iterations
+SLOW_SECOND_ROW = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+    "SELECT x FROM c WHERE x = 1 OR x = 30000000 LIMIT 2"
+)
+
+SETUP_SQL = """
+CREATE TABLE employees (id INTEGER PRIMARY KEY, name TEXT, department TEXT, salary REAL, hired DATE, manager_id INTEGER);
+INSERT INTO employees VALUES
+    (1, 'Ada', 'Engineering', 185000.5, '2019-03-01', NULL),
+    (2, 'Grace', 'Engineering', 142000, '2020-07-15', 1),
+    (3, 'Linus', 'Operations', 98000, '2021-01-04', 1),
+    (4, 'Barbara', 'Operations', 101500.25, '2018-11-30', 3),
+    (5, 'Edsger', NULL, 87000, '2022-05-09', 3);
+"""
+
+CASES = [
+    (
+        "SELECT department, COUNT(*) AS headcount, SUM(salary) AS payroll FROM employees GROUP BY department",
+        "SELECT department, COUNT(*) AS headcount, SUM(salary) AS payroll FROM employees WHERE department IS NOT NULL GROUP BY department",
+    ),
+    (
+        "SELECT name, hired FROM employees WHERE hired >= '2020-01-01'",
+        "SELECT name, hired FROM employees WHERE hired > '2020-07-15'",
+    ),
+    (
+        "SELECT e.name, m.name AS manager FROM employees e LEFT JOIN employees m ON m.id = e.manager_id",
+        "SELECT e.name, m.name AS manager FROM employees e JOIN employees m ON m.id = e.manager_id",
+    ),
+    (
+        "SELECT name, RANK() OVER (ORDER BY salary DESC) AS pay_rank FROM employees",
+        "SELECT name, ROW_NUMBER() OVER (ORDER BY hired) AS pay_rank FROM employees",
+    ),
+]
+
+
+@pytest.fixture
+def engines(monkeypatch, tmp_path):
+    """Fresh backends with a one second limit, used by the grading functions"""
+    sqlite = SQLiteBackend(LIMITS)
+    duckdb = DuckDBBackend(LIMITS, directory=str(tmp_path / "duckdb"), threads=1)
+    monkeypatch.setitem(sql_engine.backends, "sqlite", sqlite)
+    monkeypatch.setitem(sql_engine.backends, "duckdb", duckdb)
+    return {"sqlite": sqlite, "duckdb": duckdb}
+
+
+def test_sqlite_deadline_covers_reading_the_rows(engines):
+    start = time.monotonic()
+    with engines["sqlite"].session(SETUP_SQL) as session:
+        with pytest.raises(QueryTimeoutError):
+            session.run(SLOW_SECOND_ROW)
+    assert time.monotonic() - start < 3
+
+
+def test_slow_rows_grade_as_a_timeout(engines):
+    case = GradingCase(SETUP_SQL, None, [{"x": 1}, {"x": 30000000}], None, "sqlite")
+    body, verdict = grade_submission([case], SLOW_SECOND_ROW)
+    assert verdict == "timeout"
+    assert body["timeout"] is True
+
+
+def test_duckdb_interrupts_a_long_query(engines):
+    start = time.monotonic()
+    with engines["duckdb"].session(SETUP_SQL) as session:
+        with pytest.raises(QueryTimeoutError):
+            session.run("SELECT SUM(a.range * b.range) FROM range(1000000) a, range(1000000) b")
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "duckdb"])
+def test_row_limit(engines, dialect):
+    with engines[dialect].session(SETUP_SQL) as session:
+        with pytest.raises(QueryLimitError):
+            session.run("SELECT a.id FROM employees a, employees b, employees c")
+
+
+@pytest.mark.parametrize("reference, wrong", CASES)
+def test_engines_agree_on_verdicts(engines, reference, wrong):
+    # The expected output is recorded on SQLite, as the seeder does
+    with engines["sqlite"].session(SETUP_SQL) as session:
+        session.run(reference)
+        columns, rows = session.fetch()
+    expected = sql_engine.normalize_result(rows, columns)
+
+    verdicts = {}
+    for dialect in engines:
+        case = GradingCase(SETUP_SQL, None, expected, None, dialect)
+        verdicts[dialect] = (
+            grade_submission([case], reference)[1],
+            grade_submission([case], wrong)[1],
+        )
+    assert verdicts == {"sqlite": ("pass", "fail"), "duckdb": ("pass", "fail")}
@@ -0,0 +1,153 @@
+"""
+Routing, retries and fixture resends against a live executor app
+"""
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import HTTPException
+
+from src.config import settings
+from src.executor import service
+from src.services.executor_pool import ExecutorPool
+from src.services.fixture_cache import fixture_key
+from src.services.sql_engine import GradingCase
+
+SETUP_SQL = "CREATE TABLE t (x INTEGER); INSERT INTO t VALUES (1), (2), (3);"
+CASES = [GradingCase(SETUP_SQL, None, [{"total": 6}], None, "sqlite")]
+KEY = fixture_key(SETUP_SQL)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def executor_url():
+    """The executor app served on a loopback port for the module"""
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(service.app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "executor did not start"
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(10)
+
+
+@pytest.fixture(autouse=True)
+def empty_script_store():
+    service.executor.scripts._scripts.clear()
+
+
+def _pool(*urls, **options) -> ExecutorPool:
+    pool = ExecutorPool(list(urls), **{"timeout": 5.0, "retries": 2, "fallback_local": False, **options})
+    pool.check_all()
+    return pool
+
+
+def test_grades_remotely_and_learns_the_fixture(executor_url):
+    pool = _pool(executor_url)
+    assert pool.grade(CASES, "SELECT SUM(x) AS total FROM t") == ({"passed": True, "details": [{"test_case": 1, "passed": True}]}, "pass")
+    node = pool.nodes[0]
+    assert node.fixtures == {KEY}
+    assert node.sent == 0
+
+
+def test_missing_script_is_resent_after_409(executor_url, monkeypatch):
+    pool = _pool(executor_url)
+    node = pool.nodes[0]
+    # The pool believes the executor holds the script, so it sends the key only
+    node.fixtures.add(KEY)
+    payloads = []
+    original = pool._payload
+
+    def record(cases, keys, user_sql, send):
+        payloads.append(set(send))
+        return original(cases, keys, user_sql, send)
+
+    monkeypatch.setattr(pool, "_payload", record)
+    body, verdict = pool.grade(CASES, "SELECT SUM(x) AS total FROM t")
+    assert verdict == "pass"
+    assert payloads == [set(), {KEY}]
+    assert service.executor.scripts.get(KEY) == SETUP_SQL
+
+
+def test_unreachable_executor_is_marked_down_and_retried(executor_url):
+    dead = f"http://127.0.0.1:{_free_port()}"
+    pool = _pool(dead, executor_url)
+    # Route to the dead one first, as if it had been healthy at the last check
+    pool.nodes[0].healthy = True
+    pool.nodes[0].fixtures = {KEY}
+
+    body, verdict = pool.grade(CASES, "SELECT SUM(x) AS total FROM t")
+    assert verdict == "pass"
+    assert not pool.nodes[0].healthy
+    assert pool.nodes[0].failures >= 1
+    assert pool.nodes[1].healthy
+
+
+def test_rejected_key_marks_the_executor_down(executor_url, monkeypatch):
+    pool = _pool(executor_url, api_key="wrong")
+    pool.nodes[0].healthy = True
+    monkeypatch.setattr(settings, "EXECUTOR_API_KEY", "right")
+
+    with pytest.raises(HTTPException) as error:
+        pool.grade(CASES, "SELECT SUM(x) AS total FROM t")
+    assert error.value.status_code == 503
+    assert not pool.nodes[0].healthy
+    assert pool.nodes[0].error.startswith("HTTP 403")
+
+
+def test_falls_back_to_local_grading(executor_url, monkeypatch):
+    pool = _pool(executor_url, api_key="wrong", fallback_local=True)
+    pool.nodes[0].healthy = True
+    monkeypatch.setattr(settings, "EXECUTOR_API_KEY", "right")
+
+    assert pool.grade(CASES, "SELECT SUM(x) AS total FROM t")[1] == "pass"
+
+
+def test_read_timeout_is_a_timeout_verdict(executor_url):
+    pool = _pool(executor_url, timeout=0.2)
+    slow = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3000000) SELECT COUNT(*) AS total FROM c"
+
+    body, verdict = pool.grade(CASES, slow)
+    assert verdict == "timeout"
+    assert body["timeout"] is True
+    # Not the executor's fault: it stays in rotation
+    assert pool.nodes[0].healthy
+
+
+def test_routing_prefers_warm_executors_with_a_free_slot():
+    pool = ExecutorPool(["http://a", "http://b", "http://c"])
+
+    def choose(exclude=frozenset()):
+        node = pool.choose([KEY], set(exclude))
+        if node is not None:
+            pool._done(node)
+        return node
+
+    a, b, c = pool.nodes
+    for node in pool.nodes:
+        node.healthy = True
+        node.slots = 2
+    b.fixtures = {KEY}
+    b.reported_load = 1
+    assert choose() is b
+
+    # A full warm executor loses to the least loaded cold one
+    b.reported_load = 2
+    c.reported_load = 1
+    assert choose() is a
+
+    # Excluded and unhealthy executors are skipped
+    a.healthy = False
+    assert choose({"http://c"}) is b
+    assert choose({"http://b", "http://c"}) is None
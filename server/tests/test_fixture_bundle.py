@@ -0,0 +1,100 @@
+"""
+Incremental fixture bundle builds
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.dataset import Dataset
+from src.models.question import Question
+from src.models.test_case import TestCase as CaseRow
+from src.services.fixture_bundle import build_from_database, open_bundle
+from src.services.fixture_cache import fixture_key
+
+PLAYERS = "CREATE TABLE players (id INTEGER, name TEXT); INSERT INTO players VALUES (1, 'ann'), (2, 'bo');"
+TEAMS = "CREATE TABLE teams (id INTEGER); INSERT INTO teams VALUES (7);"
+DELTA = "INSERT INTO players VALUES (3, 'cy');"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [Question.__table__, Dataset.__table__, CaseRow.__table__]
+    Question.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _dataset(db, name, setup_sql) -> Dataset:
+    dataset = Dataset(name=name, setup_sql=setup_sql, content_hash=fixture_key(setup_sql))
+    db.add(dataset)
+    db.flush()
+    return dataset
+
+
+def _rows(bundle, key, table):
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.deserialize(bytes(bundle.get_image(key)))
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _build(db, path):
+    db.commit()
+    return build_from_database(db, path, workers=1)
+
+
+def test_rebuilds_only_what_changed(db, tmp_path):
+    path = str(tmp_path / "fixtures.bundle")
+    players = _dataset(db, "players", PLAYERS)
+    db.add_all([
+        CaseRow(id=1, dataset_id=players.id),
+        CaseRow(id=2, dataset_id=players.id, delta_sql=DELTA),
+        CaseRow(id=3, setup_sql=TEAMS),
+    ])
+    first = _build(db, path)
+    assert {name: first[name] for name in ("fixtures", "reused", "built", "failed", "removed")} == {
+        "fixtures": 3, "reused": 0, "built": 3, "failed": 0, "removed": 0,
+    }
+
+    bundle = open_bundle(path)
+    assert bundle.test_cases[2] == {"fixture": fixture_key(PLAYERS, DELTA)}
+    assert _rows(bundle, fixture_key(PLAYERS), "players") == 2
+    assert _rows(bundle, fixture_key(PLAYERS, DELTA), "players") == 3
+    bundle.close()
+
+    unchanged = _build(db, path)
+    assert (unchanged["reused"], unchanged["built"], unchanged["removed"]) == (3, 0, 0)
+
+    # A new delta on the existing dataset is layered on the bundled image;
+    # the teams fixture is no longer used
+    db.query(CaseRow).filter(CaseRow.id == 3).delete()
+    db.add(CaseRow(id=4, dataset_id=players.id, delta_sql="DELETE FROM players WHERE id = 1;"))
+    changed = _build(db, path)
+    assert (changed["fixtures"], changed["reused"], changed["built"], changed["removed"]) == (3, 2, 1, 1)
+
+    bundle = open_bundle(path)
+    assert fixture_key(TEAMS) not in bundle
+    assert _rows(bundle, fixture_key(PLAYERS, "DELETE FROM players WHERE id = 1;"), "players") == 1
+    bundle.close()
+
+
+def test_broken_scripts_are_left_out(db, tmp_path):
+    path = str(tmp_path / "fixtures.bundle")
+    db.add_all([
+        CaseRow(id=1, setup_sql=PLAYERS),
+        CaseRow(id=2, setup_sql="CREATE TABLE broken (;"),
+        CaseRow(id=3, setup_sql="CREATE TABLE broken (;", delta_sql=DELTA),
+    ])
+    result = _build(db, path)
+    assert (result["fixtures"], result["built"], result["failed"]) == (1, 1, 2)
+
+    # Still missing next time, so they are retried rather than reused
+    again = _build(db, path)
+    assert (again["reused"], again["failed"]) == (1, 2)
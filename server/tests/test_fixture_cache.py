@@ -0,0 +1,64 @@
+"""
+Per-worker fixture LRU
+"""
+import logging
+
+import pytest
+
+from src.services.fixture_cache import FixtureCache, build_image, fixture_key
+
+
+def _setup(name: str, rows: int = 10) -> str:
+    values = ", ".join(f"({i}, '{name}-{i}')" for i in range(rows))
+    return f"CREATE TABLE {name} (id INTEGER, label TEXT); INSERT INTO {name} VALUES {values};"
+
+
+@pytest.fixture
+def image_size():
+    return len(build_image(_setup("a")))
+
+
+def test_evicts_least_recently_used_past_max_bytes(image_size):
+    cache = FixtureCache(max_entries=100, max_bytes=2 * image_size)
+    a, b, c = _setup("a"), _setup("b"), _setup("c")
+
+    cache.get_image(a)
+    cache.get_image(b)
+    cache.get_image(a)  # b is now least recently used
+    cache.get_image(c)
+
+    assert list(cache._images) == [fixture_key(a), fixture_key(c)]
+    assert cache.stats()["bytes"] == 2 * image_size
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_evicts_past_max_entries(image_size):
+    cache = FixtureCache(max_entries=2, max_bytes=100 * image_size)
+    for name in "abc":
+        cache.get_image(_setup(name))
+    assert list(cache._images) == [fixture_key(_setup("b")), fixture_key(_setup("c"))]
+    assert cache.stats()["bytes"] == 2 * image_size
+
+
+def test_oversized_images_are_not_cached_and_warned_about_once(image_size, caplog):
+    cache = FixtureCache(max_entries=100, max_bytes=image_size)
+    small, large = _setup("a"), _setup("big", rows=2000)
+    cache.get_image(small)
+
+    with caplog.at_level(logging.WARNING, logger="sqltown.fixtures"):
+        for _ in range(3):
+            cache.get_image(large)
+
+    assert list(cache._images) == [fixture_key(small)]
+    assert cache.stats()["uncacheable"] == 1
+    warnings = [record for record in caplog.records if "FIXTURE_CACHE_MAX_BYTES" in record.getMessage()]
+    assert len(warnings) == 1
+
+
+def test_replacing_an_entry_keeps_the_byte_count(image_size):
+    cache = FixtureCache(max_entries=10, max_bytes=10 * image_size)
+    key = fixture_key(_setup("a"))
+    image = build_image(_setup("a"))
+    cache._store(key, image)
+    cache._store(key, image)
+    assert cache.stats()["bytes"] == image_size
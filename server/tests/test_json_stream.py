@@ -0,0 +1,62 @@
+"""
+Incremental reading of large JSON arrays
+"""
+import io
+import json
+
+import pytest
+
+from src.utils import json_stream
+from src.utils.json_stream import iter_json_array
+
+DOCUMENT = [
+    {"id": 1, "name": "alice", "score": 12345.678},
+    [1, 2, 3],
+    "a string with , and ] inside",
+    {"quoted": "say \"hi\" to C:\\ and {[ brackets ]}", "empty": ""},
+    -1.5e-10,
+    123456789,
+    True,
+    None,
+    {"nested": {"deep": [1.25, {"x": -42}]}},
+    98765,
+]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 12))
+def test_elements_survive_any_chunk_boundary(chunk_size):
+    text = json.dumps(DOCUMENT)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == DOCUMENT
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 8))
+def test_numbers_split_at_a_chunk_boundary(chunk_size):
+    text = "[ 1234567 , 89.125e2,\n-7 ]"
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == [1234567, 8912.5, -7]
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_empty_arrays(text):
+    assert list(iter_json_array(io.StringIO(text), 2)) == []
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', "[1 2]", "[1,", "nope"])
+def test_rejects_documents_that_are_not_arrays(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 3))
+
+
+def test_large_element_is_decoded_once(monkeypatch):
+    element = {"rows": [[i, f"name-{i}", i * 0.5] for i in range(20000)]}
+    decodes = []
+    decoder = json_stream._decoder
+
+    class CountingDecoder:
+        def raw_decode(self, buffer, position):
+            decodes.append(len(buffer) - position)
+            return decoder.raw_decode(buffer, position)
+
+    monkeypatch.setattr(json_stream, "_decoder", CountingDecoder())
+    text = json.dumps([element, 1])
+    assert list(iter_json_array(io.StringIO(text), 256)) == [element, 1]
+    assert len(decodes) == 2
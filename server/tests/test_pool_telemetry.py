@@ -0,0 +1,56 @@
+"""
+Connection pool gauges
+"""
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from src.db.instrumentation import InstrumentedQueuePool
+
+
+def _engine(tmp_path):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=5,
+    )
+
+
+def test_checkouts_with_a_free_connection_are_not_waiters(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    pool = engine.pool
+    # The gauge as seen from inside each checkout
+    seen = []
+    get = pool._pool.get
+
+    def recording_get(*args, **kwargs):
+        seen.append(pool.waiters)
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(pool._pool, "get", recording_get)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert seen == [0, 0, 0]
+    assert pool.telemetry()["total_checkouts"] == 3
+
+def test_checkout_blocked_on_a_full_pool_is_a_waiter(tmp_path):
+    engine = _engine(tmp_path)
+    pool = engine.pool
+    held = engine.connect()
+
+    def checkout():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    waiter = threading.Thread(target=checkout)
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while pool.telemetry()["waiters"] != 1:
+        assert time.monotonic() < deadline, "checkout never blocked"
+        time.sleep(0.01)
+
+    held.close()
+    waiter.join(5)
+    assert pool.telemetry()["waiters"] == 0
+    assert pool.telemetry()["total_checkouts"] == 2
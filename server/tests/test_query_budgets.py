@@ -0,0 +1,62 @@
+"""
+Every endpoint in QUERY_BUDGETS stays within its budget
+
+Question reads are measured with the catalog cold, the path that queries.
+"""
+import pytest
+
+from src.db.instrumentation import QUERY_BUDGETS, QueryBudgetExceeded, query_budget
+from src.services.question_catalog import question_catalog
+
+
+def _questions(client, question, headers):
+    return client.get("/api/questions/")
+
+
+def _question(client, question, headers):
+    return client.get(f"/api/questions/{question['id']}")
+
+
+def _execute(client, question, headers):
+    return client.post("/api/sql/execute", json={"question_id": question["id"], "sql": question["solution"]})
+
+
+def _submit_progress(client, question, headers):
+    return client.post(
+        "/api/progress/submit",
+        json={"question_id": question["id"], "time_taken": 42},
+        headers={"Authorization": "Bearer cognito"},
+    )
+
+
+def _me(client, question, headers):
+    return client.get("/api/auth/me", headers=headers)
+
+
+REQUESTS = {
+    "GET /api/questions/": _questions,
+    "GET /api/questions/{question_id}": _question,
+    "POST /api/sql/execute": _execute,
+    "POST /api/progress/submit": _submit_progress,
+    "GET /api/auth/me": _me,
+}
+
+
+def test_every_budgeted_endpoint_is_covered():
+    assert set(REQUESTS) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(QUERY_BUDGETS))
+def test_endpoint_stays_within_budget(client, question, auth_headers, cognito_user, endpoint):
+    question_catalog.invalidate()
+    with query_budget(QUERY_BUDGETS[endpoint]) as stats:
+        response = REQUESTS[endpoint](client, question, auth_headers)
+    assert response.status_code == 200, response.text
+    assert stats.queries > 0
+
+
+def test_budget_is_enforced(client):
+    question_catalog.invalidate()
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(0):
+            client.get("/api/questions/")
@@ -0,0 +1,66 @@
+"""
+Question catalog snapshots and invalidation
+"""
+import json
+import threading
+
+from src.db.database import SessionLocal
+from src.services.question_catalog import QuestionCatalog
+
+
+def test_list_and_questions_come_from_one_load(app):
+    catalog = QuestionCatalog(ttl_seconds=60)
+    db = SessionLocal()
+    try:
+        questions = json.loads(catalog.list_body(db))
+        assert questions
+        for question in questions:
+            assert json.loads(catalog.question_body(db, question["id"])) == question
+        assert catalog.question_body(db, -1) is None
+    finally:
+        db.close()
+
+
+def test_invalidate_drops_the_catalog():
+    catalog = QuestionCatalog(ttl_seconds=60)
+    loads = []
+
+    def build(db):
+        loads.append(db)
+        return b"[]", {}
+
+    catalog._build = build
+    catalog.list_body("db")
+    catalog.list_body("db")
+    catalog.invalidate()
+    catalog.list_body("db")
+    assert len(loads) == 2
+
+
+def test_load_in_flight_does_not_undo_an_invalidate():
+    catalog = QuestionCatalog(ttl_seconds=60)
+    reading = threading.Event()
+    invalidated = threading.Event()
+    results = []
+
+    def build(db):
+        if db == "stale":
+            reading.set()
+            invalidated.wait(5)
+            return b"[1]", {1: b"1"}
+        return b"[2]", {2: b"2"}
+
+    catalog._build = build
+    loader = threading.Thread(target=lambda: results.append(catalog.list_body("stale")))
+    loader.start()
+    assert reading.wait(5)
+    catalog.invalidate()
+    invalidated.set()
+    loader.join(5)
+
+    # The request that started the load is served what it read...
+    assert results == [b"[1]"]
+    # ...but the next one reloads instead of seeing the stale snapshot
+    assert catalog.list_body("fresh") == b"[2]"
+    assert catalog.question_body("fresh", 1) is None
+    assert catalog.question_body("fresh", 2) == b"2"
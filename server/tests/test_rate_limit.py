@@ -0,0 +1,65 @@
+"""
+GCRA buckets behind the rate limiter
+"""
+import pytest
+
+from src.core.rate_limit import RateLimitRule, _Buckets, parse_rate
+
+
+def test_parse_rate():
+    rule = parse_rate("execute", "100/10minutes")
+    assert (rule.limit, rule.period) == (100, 600)
+    assert rule.interval == 6
+    assert rule.policy == "100;w=600"
+
+
+@pytest.mark.parametrize("rate", ["", "60", "60/fortnight", "0/minute"])
+def test_parse_rate_rejects_malformed_rates(rate):
+    with pytest.raises(ValueError):
+        parse_rate("execute", rate)
+
+
+def test_burst_up_to_the_limit_then_reject():
+    rule = RateLimitRule("execute", 3, 60)
+    buckets = _Buckets(max_keys=10)
+
+    debts = [buckets.hit("alice", 0.0, rule.interval, rule.tolerance) for _ in range(4)]
+
+    assert debts == [20, 40, 60, 80]
+    assert [debt <= rule.tolerance for debt in debts] == [True, True, True, False]
+    assert [rule.remaining(debt) for debt in debts[:3]] == [2, 1, 0]
+
+
+def test_rejected_hit_leaves_the_bucket_untouched():
+    rule = RateLimitRule("execute", 1, 10)
+    buckets = _Buckets(max_keys=10)
+
+    assert buckets.hit("alice", 0.0, rule.interval, rule.tolerance) <= rule.tolerance
+    for _ in range(5):
+        assert buckets.hit("alice", 1.0, rule.interval, rule.tolerance) > rule.tolerance
+    # Retry-After is debt - tolerance, and holds however often the client retried
+    assert buckets.hit("alice", 10.0, rule.interval, rule.tolerance) <= rule.tolerance
+
+
+def test_tokens_are_restored_at_the_emission_interval():
+    rule = RateLimitRule("execute", 2, 10)
+    buckets = _Buckets(max_keys=10)
+
+    for _ in range(2):
+        buckets.hit("alice", 0.0, rule.interval, rule.tolerance)
+    assert buckets.hit("alice", 4.9, rule.interval, rule.tolerance) > rule.tolerance
+    assert buckets.hit("alice", 5.0, rule.interval, rule.tolerance) <= rule.tolerance
+
+
+def test_keys_are_independent_and_least_recent_is_evicted():
+    rule = RateLimitRule("execute", 1, 60)
+    buckets = _Buckets(max_keys=2)
+
+    assert buckets.hit("alice", 0.0, rule.interval, rule.tolerance) <= rule.tolerance
+    assert buckets.hit("bob", 0.0, rule.interval, rule.tolerance) <= rule.tolerance
+    assert buckets.hit("alice", 0.0, rule.interval, rule.tolerance) > rule.tolerance
+
+    # carol takes bob's slot (alice was seen last), so bob starts afresh
+    assert buckets.hit("carol", 0.0, rule.interval, rule.tolerance) <= rule.tolerance
+    assert len(buckets.arrivals) == 2
+    assert buckets.hit("bob", 0.0, rule.interval, rule.tolerance) <= rule.tolerance
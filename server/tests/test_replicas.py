@@ -0,0 +1,204 @@
+"""
+Read-replica routing and read-your-writes
+"""
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, create_engine, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from src.config import settings
+from src.db import database
+from src.db.replicas import (
+    READ_YOUR_WRITES_COOKIE,
+    ReadOnlySessionError,
+    ReplicaRouter,
+    mark_write,
+    track_writes,
+    wrote_recently,
+)
+from src.middleware.read_your_writes import ReadYourWritesMiddleware
+
+Base = declarative_base()
+
+
+class Note(Base):
+    __tablename__ = "notes"
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture
+def urls(tmp_path):
+    """Two replica databases and the URL of one that cannot be opened"""
+    replicas = []
+    for name in ("a", "b"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        replicas.append(url)
+    dead = f"sqlite:///{tmp_path / 'missing' / 'dead.db'}"
+    return {"replicas": replicas, "dead": dead, "primary": f"sqlite:///{tmp_path / 'primary'}.db"}
+
+
+@pytest.fixture
+def router_for(urls):
+    routers = []
+    primary = sessionmaker(bind=create_engine(urls["primary"]))
+
+    def make(replica_urls, **options) -> ReplicaRouter:
+        router = ReplicaRouter(replica_urls, primary, **options)
+        routers.append(router)
+        return router
+
+    yield make
+    for router in routers:
+        for replica in router.replicas:
+            replica.engine.dispose()
+
+
+def _route(router: ReplicaRouter, **options):
+    session = router.open_session(**options)
+    try:
+        return session.info.get("replica")
+    finally:
+        session.close()
+
+
+def test_round_robin(router_for, urls):
+    router = router_for(urls["replicas"])
+    assert [_route(router) for _ in range(4)] in (
+        ["replica-0", "replica-1"] * 2,
+        ["replica-1", "replica-0"] * 2,
+    )
+
+
+def test_least_connections(router_for, urls):
+    router = router_for(urls["replicas"], strategy="least_connections")
+    busy = router.open_session()
+    try:
+        other = "replica-1" if busy.info["replica"] == "replica-0" else "replica-0"
+        assert [_route(router) for _ in range(3)] == [other] * 3
+    finally:
+        busy.close()
+
+
+def test_unknown_strategy(router_for, urls):
+    with pytest.raises(ValueError):
+        router_for(urls["replicas"], strategy="random")
+
+
+def test_dead_replica_falls_back_and_cools_down(router_for, urls, monkeypatch):
+    router = router_for([urls["dead"], urls["replicas"][0]], retry_seconds=30)
+    assert [_route(router) for _ in range(3)] == ["replica-1"] * 3
+    dead = router.replicas[0]
+    assert not dead.healthy
+    assert [status["healthy"] for status in router.status()] == [False, True]
+
+    # Tried again once the cool-down has passed
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert dead.healthy
+    # Round robin reaches it within two sessions
+    assert [_route(router) for _ in range(2)] == ["replica-1"] * 2
+    assert not dead.healthy
+
+
+def test_primary_when_no_replica_is_usable(router_for, urls):
+    router = router_for([urls["dead"]])
+    session = router.open_session()
+    try:
+        assert "read_only" not in session.info
+        assert session.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        session.close()
+
+
+def test_prefer_primary_skips_replicas(router_for, urls):
+    router = router_for(urls["replicas"])
+    assert _route(router, prefer_primary=True) is None
+
+
+def test_replica_sessions_reject_writes(router_for, urls):
+    router = router_for(urls["replicas"])
+    session = router.open_session()
+    try:
+        session.add(Note(id=1))
+        with pytest.raises(ReadOnlySessionError):
+            session.flush()
+    finally:
+        session.close()
+
+
+def test_primary_flush_marks_the_request_as_writing(app):
+    from src.models.user import User
+
+    with track_writes() as wrote:
+        db = database.SessionLocal()
+        try:
+            assert not wrote
+            db.add(User(id="rw-test", email="rw@example.com", name="rw", auth_provider="local"))
+            db.flush()
+            assert wrote
+        finally:
+            db.rollback()
+            db.close()
+
+
+def test_wrote_recently():
+    assert wrote_recently(str(time.time() + 5))
+    assert not wrote_recently(str(time.time() - 1))
+    assert not wrote_recently("tomorrow")
+    assert not wrote_recently(None)
+
+
+@pytest.fixture
+def rw_client():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=5)
+
+    @app.post("/write")
+    def write():
+        mark_write()
+        return {}
+
+    @app.get("/read")
+    def read(request: Request):
+        return {"primary": wrote_recently(request.cookies.get(READ_YOUR_WRITES_COOKIE))}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_cookie_pins_reads_after_a_write(rw_client):
+    assert READ_YOUR_WRITES_COOKIE not in rw_client.get("/read").headers.get("set-cookie", "")
+    assert rw_client.get("/read").json() == {"primary": False}
+
+    response = rw_client.post("/write")
+    cookie = response.headers["set-cookie"]
+    assert "Max-Age=5" in cookie and "HttpOnly" in cookie
+    assert time.time() < float(response.cookies[READ_YOUR_WRITES_COOKIE]) <= time.time() + 6
+
+    assert rw_client.get("/read").json() == {"primary": True}
+
+
+def test_get_read_db_honours_the_cookie(router_for, urls, monkeypatch):
+    router = router_for(urls["replicas"])
+    monkeypatch.setattr(database, "read_router", router)
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 5)
+
+    def replica_for(cookie):
+        headers = [(b"cookie", f"{READ_YOUR_WRITES_COOKIE}={cookie}".encode())] if cookie else []
+        request = Request({"type": "http", "headers": headers})
+        sessions = database.get_read_db(request)
+        session = next(sessions)
+        try:
+            return session.info.get("replica")
+        finally:
+            sessions.close()
+
+    assert replica_for(None) is not None
+    assert replica_for(f"{time.time() + 5:.0f}") is None
+    assert replica_for(f"{time.time() - 5:.0f}") is not None
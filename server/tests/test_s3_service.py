@@ -0,0 +1,158 @@
+"""
+Streaming multipart uploads and non-blocking S3 calls, against a stub client
+"""
+import asyncio
+import base64
+import contextvars
+import hashlib
+import io
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.config import settings
+from src.integrations.s3_service import S3Service
+
+MiB = 1024 * 1024
+
+
+class StubS3:
+    """Records the calls upload_stream() makes"""
+
+    def __init__(self, fail_part=None, delay=0.02):
+        self.fail_part = fail_part
+        self.delay = delay
+        self.calls = []
+        self.parts = {}
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, **kwargs):
+        self.calls.append(("put_object", kwargs))
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append(("create_multipart_upload", kwargs))
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if kwargs["PartNumber"] == self.fail_part:
+                raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "UploadPart")
+            digest = base64.b64encode(hashlib.sha256(kwargs["Body"]).digest()).decode("ascii")
+            assert kwargs["ChecksumSHA256"] == digest
+            with self._lock:
+                self.parts[kwargs["PartNumber"]] = kwargs
+            return {"ETag": f'"etag-{kwargs["PartNumber"]}"', "ChecksumSHA256": digest}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def complete_multipart_upload(self, **kwargs):
+        self.calls.append(("complete_multipart_upload", kwargs))
+
+    def abort_multipart_upload(self, **kwargs):
+        self.calls.append(("abort_multipart_upload", kwargs))
+
+
+class CountingStream(io.BytesIO):
+    """Counts how many chunks have been read and not yet uploaded"""
+
+    def __init__(self, data, stub):
+        super().__init__(data)
+        self.stub = stub
+        self.reads = 0
+        self.max_held = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        if chunk:
+            self.reads += 1
+            self.max_held = max(self.max_held, self.reads - len(self.stub.parts))
+        return chunk
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNK_SIZE", 5 * MiB)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CONCURRENCY", 2)
+    service = S3Service()
+    yield service
+    service.shutdown()
+
+
+def _payload(size: int) -> bytes:
+    return bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+
+
+def test_small_files_use_one_put(s3):
+    s3._client = stub = StubS3()
+    entry = s3.upload_stream(io.BytesIO(b"CREATE TABLE t (x);"), "t.sql", key="datasets/t.sql")
+
+    assert [name for name, _ in stub.calls] == ["put_object"]
+    assert stub.calls[0][1]["ChecksumAlgorithm"] == "SHA256"
+    assert entry["size"] == 19
+    assert entry["key"] == "datasets/t.sql"
+
+
+def test_parts_are_hashed_and_completed_in_order(s3):
+    s3._client = stub = StubS3()
+    data = _payload(16 * MiB + 123)
+    entry = s3.upload_stream(io.BytesIO(data), "big.sql", key="datasets/big.sql")
+
+    assert entry["size"] == len(data)
+    assert b"".join(stub.parts[number]["Body"] for number in sorted(stub.parts)) == data
+    name, complete = stub.calls[-1]
+    assert name == "complete_multipart_upload"
+    parts = complete["MultipartUpload"]["Parts"]
+    assert [part["PartNumber"] for part in parts] == [1, 2, 3, 4]
+    assert [part["ETag"] for part in parts] == [f'"etag-{number}"' for number in range(1, 5)]
+    for part in parts:
+        body = stub.parts[part["PartNumber"]]["Body"]
+        assert part["ChecksumSHA256"] == base64.b64encode(hashlib.sha256(body).digest()).decode("ascii")
+
+
+def test_concurrency_and_memory_are_bounded(s3):
+    s3._client = stub = StubS3(delay=0.05)
+    stream = CountingStream(_payload(40 * MiB), stub)
+    s3.upload_stream(stream, "big.sql", key="datasets/big.sql")
+
+    assert len(stub.parts) == 8
+    assert stub.max_active == 2
+    # The parts being uploaded plus the one just read
+    assert stream.max_held <= 3
+
+
+def test_failed_part_aborts_the_upload(s3):
+    s3._client = stub = StubS3(fail_part=2)
+    stream = CountingStream(_payload(60 * MiB), stub)
+
+    with pytest.raises(ClientError):
+        s3.upload_stream(stream, "big.sql", key="datasets/big.sql")
+
+    names = [name for name, _ in stub.calls]
+    assert names == ["create_multipart_upload", "abort_multipart_upload"]
+    assert stub.calls[-1][1]["UploadId"] == "upload-1"
+    # Stopped reading soon after the failure
+    assert stream.reads < 12
+
+
+def test_run_uses_the_s3_executor_and_keeps_context(s3):
+    request_id = contextvars.ContextVar("request_id")
+
+    def blocking():
+        return threading.current_thread().name, request_id.get()
+
+    async def call():
+        request_id.set("req-1")
+        return await s3.run(blocking)
+
+    thread, value = asyncio.run(call())
+    assert thread.startswith("s3")
+    assert value == "req-1"
@@ -0,0 +1,23 @@
+"""
+Seeder input checks
+"""
+import pytest
+
+from seed_questions import SeedValidationError, check_unique_slugs, seed_batch
+
+
+def _question(slug):
+    return {"slug": slug, "title": slug, "description": "", "difficulty": "easy", "test_cases": []}
+
+
+def test_duplicate_slug_in_a_batch_is_named():
+    batch = [_question("top-earners"), _question("second-highest"), _question("top-earners")]
+    # Rejected before the database or the pool is touched
+    with pytest.raises(SeedValidationError, match="Duplicate question slug\\(s\\): top-earners$"):
+        seed_batch(None, batch, None)
+
+
+def test_duplicate_slug_across_batches_is_named():
+    check_unique_slugs([_question("a"), _question("b")])
+    with pytest.raises(SeedValidationError, match="b, c"):
+        check_unique_slugs([_question("b"), _question("c"), _question("d")], {"a", "b", "c"})
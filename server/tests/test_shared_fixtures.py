@@ -0,0 +1,139 @@
+"""
+Fixture files shared between worker processes
+"""
+import logging
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from src.services.shared_fixtures import SharedFixtureStore
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Attaches, reports, and detaches once a line arrives on stdin
+WORKER = """
+import sys
+from src.services.shared_fixtures import SharedFixtureStore
+store = SharedFixtureStore(sys.argv[1], 1 << 20)
+print(store.attach(), flush=True)
+sys.stdin.readline()
+store.detach()
+"""
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "shared")
+
+
+@pytest.fixture
+def store(directory):
+    store = SharedFixtureStore(directory, max_bytes=1 << 20)
+    yield store
+    store.detach()
+
+
+def _workers(directory):
+    return sorted(os.listdir(os.path.join(directory, "workers")))
+
+
+def _start_worker(directory) -> subprocess.Popen:
+    worker = subprocess.Popen(
+        [sys.executable, "-c", WORKER, directory],
+        cwd=SERVER_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    assert worker.stdout.readline().strip() == "True"
+    return worker
+
+
+def _stop_worker(worker: subprocess.Popen) -> None:
+    worker.communicate("\n", timeout=10)
+
+
+def test_attach_creates_a_private_directory(store, directory):
+    assert store.attach()
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert _workers(directory) == [str(os.getpid())]
+
+
+@pytest.mark.parametrize("mode", [0o777, 0o750, 0o701])
+def test_refuses_a_directory_others_can_use(store, directory, mode, caplog):
+    os.mkdir(directory)
+    os.chmod(directory, mode)
+    with caplog.at_level(logging.WARNING, logger="sqltown.fixtures"):
+        assert not store.attach()
+    assert f"mode {mode:o} is not 700" in caplog.text
+    assert not os.path.exists(os.path.join(directory, "workers"))
+
+
+def test_refuses_a_symlink(store, directory, tmp_path):
+    target = tmp_path / "elsewhere"
+    target.mkdir(mode=0o700)
+    os.symlink(target, directory)
+    assert not store.attach()
+    assert not os.listdir(target)
+
+
+def test_refuses_a_directory_owned_by_someone_else(store, directory, monkeypatch):
+    os.mkdir(directory, 0o700)
+    monkeypatch.setattr(os, "geteuid", lambda: os.stat(directory).st_uid + 1)
+    assert not store.attach()
+    assert not store.attached
+
+
+def test_last_worker_out_removes_the_store(store, directory):
+    assert store.attach()
+    worker = _start_worker(directory)
+    try:
+        assert _workers(directory) == sorted([str(os.getpid()), str(worker.pid)])
+        store.detach()
+        assert _workers(directory) == [str(worker.pid)]
+    finally:
+        _stop_worker(worker)
+    assert not os.path.exists(directory)
+
+
+def test_registrations_of_dead_workers_are_pruned(store, directory):
+    worker = _start_worker(directory)
+    # Killed without detaching, so its registration stays behind
+    worker.kill()
+    worker.wait()
+    assert _workers(directory) == [str(worker.pid)]
+
+    assert store.attach()
+    assert _workers(directory) == [str(os.getpid())]
+    store.detach()
+    assert not os.path.exists(directory)
+
+
+def test_materialize_writes_each_fixture_once(store):
+    assert store.attach()
+    writes = []
+
+    def write(path):
+        writes.append(path)
+        with open(path, "wb") as f:
+            f.write(b"x" * 1000)
+
+    path = store.materialize("abc", write)
+    assert store.materialize("abc", write) == path == store.get("abc")
+    assert len(writes) == 1
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o444
+    assert store.stats()["fixtures"] == 1
+
+
+def test_materialize_stops_at_max_bytes(directory):
+    store = SharedFixtureStore(directory, max_bytes=1000)
+    assert store.attach()
+    try:
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(b"x" * 1000)
+
+        assert store.materialize("first", write) is not None
+        assert store.materialize("second", write) is None
+    finally:
+        store.detach()
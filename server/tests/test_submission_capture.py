@@ -0,0 +1,46 @@
+"""
+Capture file rotation in a directory shared by several workers
+"""
+import os
+import subprocess
+import sys
+
+from src.services.submission_capture import SubmissionCapture, capture_files
+
+
+def _touch(directory, stamp, pid, written):
+    path = directory / f"submissions-{stamp}-{pid}-{written}.jsonl"
+    path.write_text("{}\n")
+    return path
+
+
+def test_prune_spares_files_other_workers_are_writing(tmp_path):
+    other = os.getppid()
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead = int(exited.stdout)
+
+    rotated = _touch(tmp_path, "20000101T000000", other, 0)
+    writing = _touch(tmp_path, "20000101T000100", other, 5)
+    abandoned = _touch(tmp_path, "20000101T000200", dead, 0)
+
+    capture = SubmissionCapture(str(tmp_path), enabled=True, max_files=2)
+    capture.record(1, "sqlite", "SELECT 1", "pass", 0.001)
+    capture.close()
+
+    files = capture_files(str(tmp_path))
+    assert len(files) == 2
+    assert str(writing) in files
+    assert not rotated.exists() and not abandoned.exists()
+    assert f"-{os.getpid()}-" in os.path.basename(files[-1])
+
+
+def test_prune_keeps_open_files_over_the_limit(tmp_path):
+    # Every file is some live worker's current one: nothing can go
+    writing = _touch(tmp_path, "20000101T000000", os.getppid(), 0)
+
+    capture = SubmissionCapture(str(tmp_path), enabled=True, max_files=1)
+    capture.record(1, "sqlite", "SELECT 1", "pass", 0.001)
+    capture.close()
+
+    assert writing.exists()
+    assert len(capture_files(str(tmp_path))) == 2
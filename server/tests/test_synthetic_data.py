@@ -0,0 +1,72 @@
+"""
+Deterministic synthetic datasets
+"""
+import sqlite3
+from itertools import accumulate
+
+import pytest
+
+from src.services.synthetic_data import ColumnGenerator, SyntheticDataError, _column_rng, generate
+
+
+def _generator(spec, parent_rows):
+    return ColumnGenerator("orders", "customer_id", spec, 42, lambda table: parent_rows)
+
+
+@pytest.mark.parametrize("spec", [
+    {"kind": "foreign_key", "table": "customers"},
+    {"kind": "foreign_key", "table": "customers", "sequence": {"start": 100, "step": 10}},
+    {"kind": "foreign_key", "table": "customers", "skew": 1.1},
+    {"kind": "foreign_key", "table": "customers", "weights": [5, 1, 1, 1, 1, 1, 1, 1, 1, 3]},
+])
+def test_foreign_keys_match_a_choice_over_the_id_list(spec):
+    """Fixtures generated before ids were computed rather than listed stay identical"""
+    sequence = spec.get("sequence", {})
+    ids = [sequence.get("start", 1) + i * sequence.get("step", 1) for i in range(10)]
+    weights = spec.get("weights")
+    if spec.get("skew"):
+        weights = [1 / (rank ** spec["skew"]) for rank in range(1, 11)]
+    rng = _column_rng(42, "orders", "customer_id")
+    cumulative = list(accumulate(weights)) if weights else None
+    expected = rng.choices(ids, cum_weights=cumulative, k=300) + rng.choices(ids, cum_weights=cumulative, k=200)
+
+    generator = _generator(spec, 10)
+    assert generator.batch(0, 300) + generator.batch(300, 200) == expected
+
+
+def test_foreign_keys_into_a_huge_table_are_not_listed():
+    generator = _generator({"kind": "foreign_key", "table": "customers"}, 10 ** 12)
+    values = generator.batch(0, 1000)
+    assert all(1 <= value <= 10 ** 12 for value in values)
+    assert len(set(values)) == 1000
+
+
+def test_foreign_key_to_an_empty_table():
+    with pytest.raises(SyntheticDataError):
+        _generator({"kind": "foreign_key", "table": "customers"}, 0)
+
+
+def test_generate_is_deterministic_and_keys_resolve():
+    schema = {"tables": [
+        {"name": "customers", "columns": [{"name": "id", "type": "INTEGER", "constraints": ["PRIMARY KEY"]}]},
+        {"name": "orders", "columns": [
+            {"name": "id", "type": "INTEGER", "constraints": ["PRIMARY KEY"]},
+            {"name": "customer_id", "type": "INTEGER"},
+        ]},
+    ]}
+    spec = {"seed": 3, "tables": {
+        "customers": {"rows": 50},
+        "orders": {"rows": 500, "columns": {"customer_id": {"kind": "foreign_key", "table": "customers"}}},
+    }}
+
+    dumps = []
+    for _ in range(2):
+        conn = sqlite3.connect(":memory:")
+        assert generate(conn, schema, spec, batch_size=64) == {"customers": 50, "orders": 500}
+        orphans = conn.execute(
+            "SELECT COUNT(*) FROM orders WHERE customer_id NOT IN (SELECT id FROM customers)"
+        ).fetchone()[0]
+        assert orphans == 0
+        dumps.append(list(conn.iterdump()))
+        conn.close()
+    assert dumps[0] == dumps[1]